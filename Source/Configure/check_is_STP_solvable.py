@@ -1,28 +1,53 @@
+import random
 import numpy as np
 
 
+def sort_and_count_inversions(values):
+    """Merge sorts a list and counts its pairs i < j with values[i] > values[j], returns (sorted list, inversions)."""
+    if len(values) < 2:
+        return list(values), 0
+    middle = len(values) // 2
+    left, left_inversions = sort_and_count_inversions(values[:middle])
+    right, right_inversions = sort_and_count_inversions(values[middle:])
+
+    # Merge the sorted halves, every element taken from the right half is inverted with all remaining left elements
+    merged = []
+    inversions = left_inversions + right_inversions
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if right[j] < left[i]:
+            merged.append(right[j])
+            inversions += len(left) - i
+            j += 1
+        else:
+            merged.append(left[i])
+            i += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    return merged, inversions
+
+
+def count_sequence_inversions(values):
+    """Counts the pairs i < j with values[i] > values[j] with a merge sort in O(n log n)."""
+    return sort_and_count_inversions(list(values))[1]
+
+
 def count_inversions(tiles, board_size):
-    """Counts the number of inversions in the tile list."""
-    flattened = [pos[0] * board_size + pos[1] for pos in tiles]  # Flatten tiles using 1D index
-    inversions = 0
-    for i in range(len(flattened)):
-        for j in range(i + 1, len(flattened)):
-            if flattened[i] != 0 and flattened[j] != 0 and flattened[i] > flattened[j]:
-                inversions += 1
-    return inversions
+    """Counts the number of inversions in the tile list, in O(n log n)."""
+    return count_sequence_inversions(pos[0] * board_size + pos[1] for pos in tiles)  # Flatten tiles using 1D index
 
 
-def get_blank_position(state, board_size):
-    """Finds the position of the blank tile and returns its row from the bottom."""
-    all_positions = {(row, col) for row in range(board_size) for col in range(board_size)}  # All possible positions
-    occupied_positions = {tuple(pos) for pos in state.tolist()}  # Positions that are occupied
-    blank_position = list(all_positions - occupied_positions)  # The difference gives the blank tile's position
+def get_blank_cell(state, board_size):
+    """Finds the cell index of the blank tile."""
+    blank_cells = set(range(board_size ** 2)) - {x * board_size + y for x, y in np.asarray(state).tolist()}
+    if len(blank_cells) != 1:
+        raise ValueError(f"Expected one blank position, found {len(blank_cells)}.")
+    return blank_cells.pop()
 
-    if not blank_position:
-        raise ValueError("No blank position found in the state.")
 
-    blank_pos = blank_position[0]  # Assume only one blank
-    blank_row_from_top = blank_pos[0]  # Row of the blank (0-indexed from the top)
+def get_blank_position(state, board_size):
+    """Finds the position of the blank tile and returns its row from the bottom."""
+    blank_row_from_top = get_blank_cell(state, board_size) // board_size  # Row of the blank (0-indexed from the top)
     blank_row_from_bottom = board_size - blank_row_from_top  # Row from bottom
     return blank_row_from_bottom
 
@@ -31,23 +56,56 @@ def is_solvable(state, goal_state=None):
     """
     Check if a sliding tile puzzle is solvable.
 
+    Every move swaps the blank with a tile, so it flips the parity of the permutation from the goal to the state and
+    moves the blank by one cell. A state is reachable iff the parity of that permutation (over all cells, the blank
+    included) equals the parity of the Manhattan distance of the blank to its goal cell.
+
     Args:
         state (ndarray): Current state of the sliding tile puzzle as a 2D numpy array of shape (n, 2).
+        goal_state (ndarray, optional): Goal state in the same format. If None, tile i has cell i in row-major order
+            and the blank is in the bottom right corner.
 
     Returns:
         bool: True if the puzzle is solvable, False otherwise.
     """
+    state = np.asarray(state)
     n = state.shape[0]  # Number of tiles
-    board_size = int(np.sqrt(n + 1))  # Derive board size (e.g., 3x3 if n=8, 4x4 if n=15)
+    board_size = int(round(np.sqrt(n + 1)))  # Derive board size (e.g., 3x3 if n=8, 4x4 if n=15)
+    if goal_state is None:
+        goal_state = [divmod(cell, board_size) for cell in range(n)]
+    goal_state = np.asarray(goal_state)
+
+    # Cell of every tile and of the blank in the state, ordered by their cell in the goal state
+    state_cells = [x * board_size + y for x, y in state.tolist()] + [get_blank_cell(state, board_size)]
+    goal_cells = [x * board_size + y for x, y in goal_state.tolist()] + [get_blank_cell(goal_state, board_size)]
+    permutation = [state_cell for _, state_cell in sorted(zip(goal_cells, state_cells))]
+    inversions = count_sequence_inversions(permutation)
 
-    # Count inversions in the linearized tile list
-    inversions = count_inversions(state, board_size)
+    blank_distance = (abs(state_cells[-1] // board_size - goal_cells[-1] // board_size) +
+                      abs(state_cells[-1] % board_size - goal_cells[-1] % board_size))
+    return inversions % 2 == blank_distance % 2
 
-    if board_size % 2 == 1:  # Odd-sized board
-        return inversions % 2 == 0
-    else:  # Even-sized board
-        blank_row_from_bottom = get_blank_position(state, board_size)
-        return (inversions + blank_row_from_bottom) % 2 == 0
+
+def sample_solvable_state(board_size, goal_state, rng=random):
+    """
+    Draw a state uniformly from all solvable states of a sliding tile puzzle.
+
+    A uniform random placement of the tiles is solvable with probability 1/2, swapping two tiles flips the parity of
+    the permutation, so the unsolvable half is mapped one-to-one onto the solvable half and no state is rejected.
+
+    Args:
+        board_size (int): The size of the board (n x n).
+        goal_state (ndarray): Goal state as a 2D numpy array of shape (n * n - 1, 2).
+        rng (random.Random, optional): Random number generator.
+
+    Returns:
+        ndarray: The state as a 2D numpy array of shape (n * n - 1, 2).
+    """
+    cells = rng.sample(range(board_size ** 2), board_size ** 2 - 1)
+    state = np.array([divmod(cell, board_size) for cell in cells], dtype=int)
+    if not is_solvable(state, goal_state):
+        state[[0, 1]] = state[[1, 0]]
+    return state
 
 
 if __name__ == "__main__":
@@ -76,3 +134,4 @@ if __name__ == "__main__":
 
     result = is_solvable(state, goal_state)
     print(f"Is the state solvable? {'Yes' if result else 'No'}")
+    print(f"Random solvable state:\n{sample_solvable_state(3, goal_state)}")
@@ -0,0 +1,173 @@
+"""
+- dedup index of the generated configs of one config_id
+- every config is identified by a 64-bit BLAKE2 hash of its canonical (init, goal) encoding, see
+  board_symmetry.canonical_puzzle_key, so puzzles that only differ by a rotation, reflection or the geom order count
+  as duplicates
+- the hashes are kept in an open-addressing hash set backed by one uint64 NumPy array (8 bytes per slot, at most half
+  full), instead of a Python set of tuples of tuples
+- two different puzzles share a hash with a probability of about n^2 / 2^65 for n configs, e.g. 3e-8 for a million
+- the index is saved to Data/DedupIndex/<config_id>.npy, so resumed or extended runs of a config_id skip every
+  config generated before, a missing index is rebuilt from the config files already in the config directory
+"""
+
+# Import statements
+import os
+import json
+import fnmatch
+import hashlib
+import numpy as np
+
+from Source.Solver.board_symmetry import canonical_puzzle_key
+
+INITIAL_CAPACITY = 1 << 12
+EMPTY = np.uint64(0)  # Marks a free slot, hashes of 0 are stored as 1
+
+
+def get_dedup_index_path(config_id):
+    """Return the path of the saved dedup index of a config_id."""
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(base_dir, 'Data', 'DedupIndex', f"{config_id}.npy")
+
+
+def hash_puzzle(board_size, init_state, goal_state):
+    """
+    Hash the canonical encoding of a puzzle to a 64-bit integer.
+
+    Args:
+        board_size (int): Board size (n x n).
+        init_state (list): List of starting geom positions (list of [x, y] pairs or an (n, 2) array).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+
+    Returns:
+        int: The hash, never 0.
+    """
+    board_size, init_cells, goal_cells = canonical_puzzle_key(board_size, init_state, goal_state)
+    encoding = bytes([board_size, len(init_cells), *init_cells, *goal_cells])
+    return int.from_bytes(hashlib.blake2b(encoding, digest_size=8).digest(), 'little') or 1
+
+
+class DedupIndex:
+
+    def __init__(self, file_path=None, capacity=INITIAL_CAPACITY):
+        """
+        Create an empty index.
+
+        Args:
+            file_path (str, optional): Path the index is saved to, not saved if None.
+            capacity (int, optional): Initial number of slots, a power of two.
+        """
+        self.file_path = file_path
+        self.slots = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _find(self, puzzle_hash):
+        """Return the slot of a hash, or the free slot where it would be inserted (linear probing)."""
+        mask = len(self.slots) - 1
+        slot = puzzle_hash & mask
+        value = np.uint64(puzzle_hash)
+        while self.slots[slot] != EMPTY and self.slots[slot] != value:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _grow(self):
+        """Double the number of slots and reinsert all hashes."""
+        hashes = self.slots[self.slots != EMPTY]
+        self.slots = np.zeros(2 * len(self.slots), dtype=np.uint64)
+        for puzzle_hash in hashes.tolist():
+            self.slots[self._find(puzzle_hash)] = puzzle_hash
+
+    def add_hash(self, puzzle_hash):
+        """Insert a hash, return False if it was already in the index."""
+        slot = self._find(puzzle_hash)
+        if self.slots[slot] != EMPTY:
+            return False
+        self.slots[slot] = puzzle_hash
+        self.size += 1
+        if 2 * self.size > len(self.slots):
+            self._grow()
+        return True
+
+    def add(self, board_size, init_state, goal_state):
+        """
+        Insert a puzzle.
+
+        Args:
+            board_size (int): Board size (n x n).
+            init_state (list): List of starting geom positions (list of [x, y] pairs or an (n, 2) array).
+            goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+
+        Returns:
+            bool: True if the puzzle is new, False if it (or an equivalent puzzle) was added before.
+        """
+        return self.add_hash(hash_puzzle(board_size, init_state, goal_state))
+
+    def contains(self, board_size, init_state, goal_state):
+        """Check if a puzzle (or an equivalent puzzle) was added before."""
+        return self.slots[self._find(hash_puzzle(board_size, init_state, goal_state))] != EMPTY
+
+    def add_config_files(self, config_dir):
+        """Insert the puzzles of all config files of a config directory."""
+        if not os.path.isdir(config_dir):
+            return
+        for file_name in sorted(os.listdir(config_dir)):
+            if fnmatch.fnmatch(file_name, "config*.json"):
+                with open(os.path.join(config_dir, file_name), 'r') as f:
+                    config = json.load(f)
+                landmarks = config['landmarks']
+                self.add(config['grid_size'], [landmark['start_coordinate'] for landmark in landmarks],
+                         [landmark['goal_coordinate'] for landmark in landmarks])
+
+    def save(self):
+        """Write the index to its file, via a temporary file so that an interrupted save keeps the old index."""
+        if self.file_path is None:
+            return
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_file_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, 'wb') as f:
+            np.save(f, self.slots)
+        os.replace(tmp_file_path, self.file_path)
+
+
+def load_dedup_index(config_id, config_dir=None):
+    """
+    Load the dedup index of a config_id, or rebuild it from the config files of the config directory.
+
+    Args:
+        config_id (str): The ID of the config dataset.
+        config_dir (str, optional): Directory with the config files of the dataset, used if no index is saved.
+
+    Returns:
+        DedupIndex: The index, saved to get_dedup_index_path(config_id).
+    """
+    file_path = get_dedup_index_path(config_id)
+    index = DedupIndex(file_path)
+    if os.path.exists(file_path):
+        index.slots = np.load(file_path)
+        index.size = int(np.count_nonzero(index.slots))
+        return index
+
+    if config_dir is not None:
+        index.add_config_files(config_dir)
+    return index
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Insert random 5x5 puzzles with 10 geoms, every puzzle is inserted twice, once as a rotated copy
+    rng = random.Random(0)
+    index = DedupIndex()
+    start_time = time.perf_counter()
+    for _ in range(20_000):
+        cells = rng.sample(range(25), 20)
+        init_state = [divmod(cell, 5) for cell in cells[:10]]
+        goal_state = [divmod(cell, 5) for cell in cells[10:]]
+        assert index.add(5, init_state, goal_state)
+        rotated = [[[y, 4 - x] for x, y in state] for state in (init_state, goal_state)]
+        assert not index.add(5, *rotated)
+    print(f"{len(index):,} puzzles in {time.perf_counter() - start_time:.2f} s, "
+          f"{index.slots.nbytes / len(index):.1f} bytes per puzzle")
@@ -1,22 +1,7 @@
 import numpy as np
 import random
 
-
-def get_neighbors(state, n):
-    """
-    Generate all valid neighboring states for a given state.
-    A neighbor is obtained by sliding a tile into an adjacent empty position.
-    """
-    neighbors = []
-    tiles_set = set(map(tuple, state))  # Convert tiles' coordinates to a set for fast lookup
-    for i, (x, y) in enumerate(state):
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Possible moves: up, down, left, right
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < n and 0 <= new_y < n and (new_x, new_y) not in tiles_set:
-                new_state = state.copy()
-                new_state[i] = [new_x, new_y]
-                neighbors.append(new_state)
-    return neighbors
+from Source.Solver.shortest_path_solver import get_neighbors
 
 
 def generate_random_valid_path(n, initial_state, max_steps=100):
@@ -1,104 +1,18 @@
 # Import statements
-import heapq
 import numpy as np
 import random
 
-def calculate_manhattan_heuristic(initial_states, goal_states):
-    """Calculate the cumulative Manhattan distance of all geoms from their initial to their goal positions."""
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.shortest_path_solver import a_star, solve_packed
+from Source.Solver.distance_tables import AUTO_BUILD_TABLE_STATES, get_distance_table
+from Source.Solver.frontier_search import exact_distance_layers, layer_path, unpack_frontier
+from Source.Solver.heuristics import get_heuristic
 
-    # Ensure the arrays have the same shape
-    assert initial_states.shape == goal_states.shape, "Initial and goal states must have the same shape."
+MAX_LAYER_STATES = 2_000_000  # Largest backward search of find_config_by_exact_layer before it falls back
 
-    # Calculate Manhattan distances
-    distances = np.abs(initial_states - goal_states).sum(axis=1)  # Sum differences along coordinates for each object
 
-    # Return cumulative Manhattan distance
-    return int(distances.sum())
-
-
-def get_neighbors(state, n):
-    """
-    Generate all valid neighboring states for a given state.
-    A neighbor is obtained by sliding a tile into an adjacent empty position.
-    """
-    neighbors = []
-    tiles_set = set(map(tuple, state))  # Convert tiles' coordinates to a set for fast lookup
-    for i, (x, y) in enumerate(state):
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Possible moves: up, down, left, right
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < n and 0 <= new_y < n and (new_x, new_y) not in tiles_set:
-                # Generate a new state by moving the current tile
-                new_state = state.copy()
-                new_state[i] = [new_x, new_y]
-                neighbors.append(new_state)
-    return neighbors
-
-
-
-def a_star(n, initial_state, goal_state, max_depth=None):
-    """
-    Solve the n x n sliding tile puzzle using A* algorithm with an early stopping condition.
-    If no solution is possible within the given max depth, it returns None.
-
-    Args:
-        n (int): Board size (n x n)
-        initial_state (list): List of starting tile positions (list of [x, y] pairs)
-        goal_state (list): List of goal tile positions (list of [x, y] pairs)
-        max_depth (int, optional): The maximum depth to search. If None, search is unlimited.
-
-    Returns:
-        list: List of states from initial to goal in JSON-compatible format, or None if no solution is found within the max depth
-    """
-    initial_state = np.array(initial_state)
-    goal_state = np.array(goal_state)
-
-    # Priority queue for A* search
-    open_set = []
-    heapq.heappush(open_set, (0, tuple(map(tuple, initial_state))))
-    came_from = {}  # Map to reconstruct the path
-    g_score = {tuple(map(tuple, initial_state)): 0}
-    f_score = {tuple(map(tuple, initial_state)): calculate_manhattan_heuristic(initial_state, goal_state)}
-
-    while open_set:
-        # Get the state with the lowest f_score
-        current_f_score, current_tuple = heapq.heappop(open_set)
-        current_state = np.array(current_tuple)
-
-        # If the current state is the goal state, reconstruct the path
-        if np.array_equal(current_state, goal_state):
-            path = []
-            while current_tuple in came_from:
-                path.append([[int(coord) for coord in pair] for pair in current_tuple])  # Ensure JSON-compatible
-                current_tuple = came_from[current_tuple]
-            path.append([[int(coord) for coord in pair] for pair in tuple(map(tuple, initial_state))])  # Add initial state
-            return path[::-1]
-
-        # If we exceed the max depth, skip further exploration of this path
-        if max_depth is not None and g_score[current_tuple] > max_depth:
-            continue
-
-        # Early stop criteria: If the lowest f_score in the open set is greater than max_depth, return None
-        if max_depth is not None and open_set and min(f_score[t] for _, t in open_set) > max_depth:
-            return None  # No solution possible within the given max depth
-
-        # Explore neighbors
-        for neighbor in get_neighbors(current_state, n):
-            neighbor_tuple = tuple(map(tuple, neighbor))
-            tentative_g_score = g_score[current_tuple] + 1
-
-            if tentative_g_score < g_score.get(neighbor_tuple, float('inf')):  # Found a better path
-                came_from[neighbor_tuple] = current_tuple
-                g_score[neighbor_tuple] = tentative_g_score
-                f_score[neighbor_tuple] = tentative_g_score + calculate_manhattan_heuristic(neighbor, goal_state)
-
-                # Push to the priority queue if it’s within the max depth (only if max_depth is specified)
-                if max_depth is None or f_score[neighbor_tuple] <= max_depth:
-                    heapq.heappush(open_set, (f_score[neighbor_tuple], neighbor_tuple))
-
-    return None  # No solution found within the max depth
-
-
-def find_config_by_random_expand(n, goal_state, path_length, max_steps=100):
+def find_config_by_random_expand(n, goal_state, path_length, max_steps=100, backend=None, cache=None,
+                                 return_path=False):
     """
     Generate a valid initial configuration for a sliding tile puzzle that has a path length of 'path_length'
     from the initial state to the goal state.
@@ -108,28 +22,34 @@ def find_config_by_random_expand(n, goal_state, path_length, max_steps=100):
         goal_state (list): The goal state of the puzzle (list of [x, y] pairs).
         path_length (int): The required distance (in optimal moves) from the generated initial state to the goal state.
         max_steps (int, optional): Maximum number of backward moves to try before stopping.
+        backend (str, optional): Search backend of the shortest path solver, bounded A* if None.
+        cache (SolverCache, optional): Cache of the shortest path solver results.
+        return_path (bool, optional): Also return the shortest path of the generated state, found by the last search.
 
     Returns:
-        list: The generated initial state, or None if no valid state was found.
+        list: The generated initial state, or None if no valid state was found. With return_path, a tuple of the
+        state and its shortest path to the goal state (list of states in JSON-compatible format), or (None, None).
     """
-    current_state = goal_state.copy()
+    codec = PackedStateCodec(n, len(goal_state))
+    goal = codec.pack(goal_state)
+    current_state = goal
     for step in range(max_steps):
         # Calculate the current path length to the goal
-        current_path = a_star(n, current_state, goal_state, max_depth=path_length)
+        current_path = solve_packed(codec, current_state, goal, max_depth=path_length, backend=backend, cache=cache)
         if current_path is None:
-            print(f"Failed to calculate path from {current_state} to the goal.")
+            print(f"Failed to calculate path from {codec.unpack(current_state)} to the goal.")
             break
         current_path_length = len(current_path) - 1  # Subtract 1 since the first state doesn't count as a step
 
         #print(f"Step {step + 1}: Current path length from state to goal is {current_path_length}")
 
         # Get all possible neighbors of the current state
-        neighbors = get_neighbors(current_state, n)
+        neighbors = codec.neighbors(current_state)
         random.shuffle(neighbors)  # Randomize the neighbor selection process
 
         valid_next_state = None  # Track if we find a valid next state
         for neighbor in neighbors:
-            neighbor_path = a_star(n, neighbor, goal_state, max_depth=path_length)
+            neighbor_path = solve_packed(codec, neighbor, goal, max_depth=path_length, backend=backend, cache=cache)
 
             if neighbor_path is not None:
                 neighbor_path_length = len(neighbor_path) - 1  # Subtract 1 since the first state doesn't count as a step
@@ -145,13 +65,138 @@ def find_config_by_random_expand(n, goal_state, path_length, max_steps=100):
             #print(f"Step {step + 1}: No valid backward step found from state {current_state}")
 
         # If the current state's path to the goal has the desired path length, return it
-        final_path = a_star(n, current_state, goal_state, max_depth=path_length)
+        final_path = solve_packed(codec, current_state, goal, max_depth=path_length, backend=backend, cache=cache)
         if final_path is not None and len(final_path) - 1 == path_length:
             #print(f"Found valid initial configuration after {step + 1} steps")
-            return current_state
+            if return_path:
+                return codec.unpack_array(current_state), [codec.unpack(state) for state in final_path]
+            return codec.unpack_array(current_state)
 
     print("Failed to find a valid initial configuration within the max steps.")
-    return None
+    return (None, None) if return_path else None
+
+def find_config_by_heuristic_walk(n, goal_state, path_length, heuristic='walking_distance', max_steps=None,
+                                  cache=None, return_path=False):
+    """
+    Generate an initial configuration at exactly 'path_length' moves from the goal state by a random walk from the goal.
+    The walk never steps back to the state it came from and is restarted from the goal once the heuristic exceeds
+    path_length. The state graph is bipartite, so a state reached after k walk steps has a distance of at most k and of
+    the parity of k. Every state with k >= path_length, the parity of path_length and a heuristic of at most
+    path_length is checked with one IDA* search bounded at path_length, which returns a shortest path, and is accepted
+    iff that path has exactly path_length moves. Every state of the layer can be drawn, but not uniformly: states the
+    walk reaches by many short walks are drawn more often. Walks only reach solvable states, so no unsolvable instance
+    is ever searched, which makes this the sampler of the sliding tile puzzle on boards where the layers are too large
+    for find_config_by_exact_layer.
+
+    Args:
+        n (int): The board size (n x n).
+        goal_state (list): The goal state of the puzzle (list of [x, y] pairs).
+        path_length (int): The required distance (in optimal moves) from the generated initial state to the goal state.
+        heuristic (str, optional): Admissible heuristic of the walk and the search, one of HEURISTICS.
+        max_steps (int, optional): Maximum number of walk steps, 1000 * path_length if None.
+        cache (SolverCache, optional): Cache of the shortest path solver results, the shortest path of the drawn
+            state is stored in it, so measuring the config afterwards is a cache hit.
+        return_path (bool, optional): Also return the shortest path of the drawn state found by the IDA* search, so
+            the config does not have to be solved again.
+
+    Returns:
+        list: The generated initial state, or None if no state was found within max_steps. With return_path, a tuple
+        of the state and its shortest path to the goal state (list of states in JSON-compatible format), or
+        (None, None).
+    """
+    codec = PackedStateCodec(n, len(goal_state))
+    goal = codec.pack(goal_state)
+    estimate = get_heuristic(codec, goal, heuristic)
+    if path_length == 0:
+        return (codec.unpack_array(goal), [codec.unpack(goal)]) if return_path else codec.unpack_array(goal)
+
+    previous_state, current_state, walk_length = None, goal, 0
+    for step in range(max_steps or 1000 * path_length):
+        next_state = random.choice([state for state in codec.neighbors(current_state) if state != previous_state])
+        previous_state, current_state, walk_length = current_state, next_state, walk_length + 1
+
+        current_estimate = estimate(current_state)
+        if current_estimate > path_length:
+            previous_state, current_state, walk_length = None, goal, 0  # The distance is larger as well, restart
+        elif walk_length >= path_length and (walk_length - path_length) % 2 == 0:
+            path = solve_packed(codec, current_state, goal, max_depth=path_length, backend='ida_star',
+                                heuristic=heuristic, cache=cache)
+            if path is not None and len(path) - 1 == path_length:
+                if return_path:
+                    return codec.unpack_array(current_state), [codec.unpack(state) for state in path]
+                return codec.unpack_array(current_state)
+
+    return (None, None) if return_path else None
+
+
+def find_config_by_exact_layer(n, goal_state, path_length, c2=None, max_layer_states=MAX_LAYER_STATES, backend=None,
+                               cache=None, max_build_table_states=AUTO_BUILD_TABLE_STATES, return_path=False):
+    """
+    Draw an initial configuration uniformly from all states at exactly 'path_length' moves from the goal state.
+    The layer is read from the distance table of the goal if one is available, otherwise it is collected with one
+    backward breadth-first search to depth path_length. If the search would exceed max_layer_states,
+    find_config_by_random_expand is used.
+
+    Args:
+        n (int): The board size (n x n).
+        goal_state (list): The goal state of the puzzle (list of [x, y] pairs).
+        path_length (int): The required distance (in optimal moves) from the generated initial state to the goal state.
+        c2 (int, optional): The required number of detours, (path_length - Manhattan distance) / 2. Not applied by
+            the random expand fallback.
+        max_layer_states (int, optional): Maximum number of states of the backward search.
+        backend (str, optional): Search backend of the random expand fallback, bounded A* if None.
+        cache (SolverCache, optional): Cache of the shortest path solver results, the shortest path of the drawn
+            state is stored in it, so measuring the config afterwards is a cache hit.
+        max_build_table_states (int, optional): Largest state space for which a missing distance table of the goal
+            is built, see get_distance_table. 0 uses only tables that already exist, e.g. for goals that are drawn
+            once and never used again, whose table would cost more than the backward search.
+        return_path (bool, optional): Also return a shortest path of the drawn state, read from the table or the
+            layers, so the config does not have to be solved again.
+
+    Returns:
+        list: The generated initial state, or None if no state with this path length (and c2) exists. With
+        return_path, a tuple of the state and its shortest path to the goal state (list of states in JSON-compatible
+        format), or (None, None).
+    """
+    codec = PackedStateCodec(n, len(goal_state))
+    goal = codec.pack(goal_state)
+    manhattan = None if c2 is None else path_length - 2 * c2
+
+    table = get_distance_table(n, goal_state, max_build_table_states)
+    if table is not None:
+        state = table.sample_state(path_length, manhattan)
+        if state is None:
+            return (None, None) if return_path else None
+        path = table.path(state) if cache is not None or return_path else None
+        if cache is not None:
+            packed_path = [codec.pack(step) for step in path]
+            cache.put_path(codec, packed_path[0], goal, packed_path)
+        state = np.array(state, dtype=int).reshape(-1, 2)
+        return (state, path) if return_path else state
+
+    if codec.bits * codec.num_geoms <= 63:
+        layers = exact_distance_layers(codec, goal, path_length, max_layer_states)
+        if layers is not None:
+            states = layers[path_length]
+            if manhattan is not None and len(states):
+                frontier = unpack_frontier(codec, states)
+                goal_frontier = unpack_frontier(codec, [goal])
+                states = states[np.abs(frontier - goal_frontier).sum(axis=(1, 2)) == manhattan]
+            if not len(states):
+                return (None, None) if return_path else None
+
+            state = int(states[random.randrange(len(states))])
+            packed_path = layer_path(codec, layers, state, path_length) if cache is not None or return_path else None
+            if cache is not None:
+                cache.put_path(codec, state, goal, packed_path)
+            if return_path:
+                return codec.unpack_array(state), [codec.unpack(step) for step in packed_path]
+            return codec.unpack_array(state)
+
+    return find_config_by_random_expand(n, goal_state, path_length, max_steps=1000, backend=backend, cache=cache,
+                                        return_path=return_path)
+
+
 
 if __name__ == "__main__":
     board_size = 5
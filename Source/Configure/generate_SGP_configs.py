@@ -2,20 +2,237 @@
 
 # Import statements
 import os
+import queue
 import random
+import hashlib
+import multiprocessing
+from collections import Counter
+import numpy as np
 import pandas as pd
 import time
 import warnings
 from datetime import datetime
 
-from find_shortest_move_sequence import a_star, calculate_manhattan_heuristic, find_config_by_random_expand
+from Source.Solver.shortest_path_solver import calculate_manhattan_heuristic
+from Source.Solver.solver_cache import SolverCache, get_solver_cache
+from find_shortest_move_sequence import find_config_by_exact_layer
+from dedup_index import load_dedup_index
+from generation_checkpoint import load_generation_checkpoint, save_generation_checkpoint
 from encode_config_to_json import encode_SGP_config_to_json
 from find_random_move_sequence import generate_random_valid_path, generate_random_invalid_path
 import configuration_utilities as util
 
 
+def get_worker_seed(seed, num_geoms, path_length, worker_index, run=0):
+    """
+    Derive the deterministic seed of one sampling worker, None if the generation is not seeded.
+
+    Every run of a config_id gets its own seeds, so a resumed run does not replay the candidates of the earlier runs.
+    The seed is a digest of the arguments, the built-in hash() of a string seed differs between processes.
+    """
+    if seed is None:
+        return None
+    encoding = repr((seed, run, num_geoms, path_length, worker_index)).encode()
+    return int.from_bytes(hashlib.blake2b(encoding, digest_size=4).digest(), 'little')
+
+
+def increment_complexity_bins(complexity_bins, complexity, use_c1_c2, count=1):
+    """
+    Count configs of one complexity in the complexity bins.
+
+    Args:
+        complexity_bins (pd.DataFrame): Number of configs per c1 (index) and c2 (columns).
+        complexity (dict): The 'c1' and 'c2' of the configs.
+        use_c1_c2 (list): Whether c1 and c2 are sampled, a complexity that is not sampled counts for all of its bins.
+        count (int, optional): Number of configs.
+    """
+    if use_c1_c2[0] and use_c1_c2[1]:  # Both c1 and c2 are used
+        complexity_bins.loc[complexity["c1"], complexity["c2"]] += count
+    elif not use_c1_c2[1]:  # Only c1 is used, increment all c2 bins for this c1
+        complexity_bins.loc[complexity["c1"], :] += count
+    elif not use_c1_c2[0]:  # Only c2 is used, increment all c1 bins for this c2
+        complexity_bins.loc[:, complexity["c2"]] += count
+
+
+def get_bin_index(complexity_min_max, c1, c2):
+    """Return the index of a (c1, c2) bin in the flat list of all bins of the dataset, None if it is out of range."""
+    if not complexity_min_max["c1"]["min"] <= c1 <= complexity_min_max["c1"]["max"]:
+        return None
+    if not complexity_min_max["c2"]["min"] <= c2 <= complexity_min_max["c2"]["max"]:
+        return None
+    num_c2 = complexity_min_max["c2"]["max"] - complexity_min_max["c2"]["min"] + 1
+    return (c1 - complexity_min_max["c1"]["min"]) * num_c2 + c2 - complexity_min_max["c2"]["min"]
+
+
+def update_full_bins(full_bins, complexity_bins, complexity_bin_size, complexity_min_max, c1):
+    """Flag the bins of one c1 row that are full, the flags are shared with the sampling workers."""
+    for c2, bin_fill in complexity_bins.loc[c1].items():
+        full_bins[get_bin_index(complexity_min_max, c1, c2)] = bin_fill >= complexity_bin_size
+
+
+def format_generation_stats(stats):
+    """Summarize the acceptance rate of the sampled candidates and the time split of the sampling."""
+    acceptance_rate = stats['accepted'] / stats['sampled'] if stats['sampled'] else 0
+    return (f"accepted {stats['accepted']:,}/{stats['sampled']:,} sampled candidates ({acceptance_rate:.1%}), "
+            f"{stats['rejected']:,} rejected by the bin check, {stats['sample_seconds']:.1f} s sampling, "
+            f"{stats['bin_check_seconds']:.1f} s bin check")
+
+
+def sample_SGP_candidate(board_size, num_geoms, path_length, complexity_min_max, solver_backend=None,
+                         solver_cache=None, full_bins=None, stats=None):
+    """
+    Sample one goal state and a start state at the target path length, together with its shortest move sequence.
+
+    The start state is drawn at exactly path_length moves from the goal and with the c2 of a bin that is not full yet,
+    and the sampler returns the shortest path it found the state with, so no config is ever solved. The bin check
+    rejects candidates whose bin is out of range or already full.
+
+    Args:
+        board_size: Board size (n x n).
+        num_geoms: Number of geoms on the board.
+        path_length: The target shortest path length.
+        complexity_min_max: The c1 and c2 ranges of the dataset.
+        solver_backend: Search backend of the random expand fallback of the sampler.
+        solver_cache: Cache of the shortest path solver results.
+        full_bins: Flags of the full bins, see get_bin_index. If None, only the bin range is checked.
+        stats: Counter of the sampled and rejected candidates and of the seconds spent on sampling and the bin
+            check, updated in place.
+
+    Returns:
+        dict: 'init_state', 'goal_state', 'shortest_move_sequence' and 'manhattan_heuristic', or None if the sample
+        is rejected.
+    """
+    stats = Counter() if stats is None else stats
+    start_time = time.perf_counter()
+
+    # Draw the c2 of a bin that can still accept a config, so the candidate lands in an open bin
+    open_c2 = [c2 for c2 in range(complexity_min_max["c2"]["min"], complexity_min_max["c2"]["max"] + 1)
+               if path_length - 2 * c2 >= 0 and
+               (full_bins is None or not full_bins[get_bin_index(complexity_min_max, path_length, c2)])]
+    if not open_c2:
+        return None
+    c2 = random.choice(open_c2)
+
+    # Sample initial and goal states
+    goal_state = util.sample_board_states(num_geoms, board_size)
+    # Every candidate has its own random goal, so only distance tables that already exist are used
+    init_state, shortest_move_sequence = find_config_by_exact_layer(
+        board_size, goal_state, path_length, c2=c2, backend=solver_backend, cache=solver_cache,
+        max_build_table_states=0, return_path=True)
+    sampled_time = time.perf_counter()
+    stats['sample_seconds'] += sampled_time - start_time
+    if init_state is None:
+        return None
+    stats['sampled'] += 1
+
+    # Calculate cumulative Manhattan distance, c1 is path_length by construction, so it fixes the bin. The bin is
+    # checked because the random expand fallback of the sampler does not apply c2
+    manhattan_heuristic = calculate_manhattan_heuristic(init_state, goal_state)
+    bin_index = get_bin_index(complexity_min_max, path_length, (path_length - manhattan_heuristic) // 2)
+    stats['bin_check_seconds'] += time.perf_counter() - sampled_time
+    if bin_index is None or (full_bins is not None and full_bins[bin_index]):
+        stats['rejected'] += 1
+        return None
+
+    return {
+        'init_state': init_state,
+        'goal_state': goal_state,
+        'shortest_move_sequence': shortest_move_sequence,
+        'manhattan_heuristic': manhattan_heuristic
+    }
+
+
+def _sampling_worker(candidate_queue, stop_event, seed, board_size, num_geoms, path_length, complexity_min_max,
+                     solver_backend, use_solver_cache, full_bins):
+    """Sample and measure candidates in a worker process until the coordinator sets the stop event."""
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    # SQLite connections must not cross a fork, every worker opens its own connection to the shared database
+    solver_cache = SolverCache() if use_solver_cache else None
+
+    stats = Counter()
+    while not stop_event.is_set():
+        candidate = sample_SGP_candidate(board_size, num_geoms, path_length, complexity_min_max, solver_backend,
+                                         solver_cache, full_bins, stats)
+        if candidate is not None:
+            candidate['stats'] = stats  # Sampling statistics since the previous candidate of this worker
+            candidate_queue.put(candidate)
+            stats = Counter()
+
+    if solver_cache is not None:
+        solver_cache.commit()
+
+
+def stream_SGP_candidates(board_size, num_geoms, path_length, complexity_min_max, workers=1, seed=None,
+                          solver_backend=None, use_solver_cache=True, solver_cache=None, run=0,
+                          full_bins=None):
+    """
+    Yield measured candidates for one target path length until the stream is closed by the coordinator.
+
+    With one worker the candidates are sampled in the calling process, otherwise every worker process samples with its
+    own deterministic seed and the candidates are yielded in the order they arrive.
+
+    Args:
+        board_size: Board size (n x n).
+        num_geoms: Number of geoms on the board.
+        path_length: The target shortest path length.
+        complexity_min_max: The c1 and c2 ranges of the dataset.
+        workers: Number of sampling processes.
+        seed: Base seed of the sampling, see get_worker_seed. Not seeded if None.
+        solver_backend: Search backend of the shortest path solver.
+        use_solver_cache: Keep the solver results of the workers in the persistent solver cache.
+        solver_cache: The solver cache of the calling process, used if the candidates are sampled here.
+        run: Index of the run of the config_id, see get_worker_seed.
+        full_bins: Shared flags of the full bins, updated by the coordinator, see get_bin_index.
+
+    Yields:
+        dict: A candidate, see sample_SGP_candidate, with the sampling statistics since the previous candidate of
+        its worker in 'stats'.
+    """
+    if workers == 1:
+        worker_seed = get_worker_seed(seed, num_geoms, path_length, 0, run)
+        if worker_seed is not None:
+            random.seed(worker_seed)
+            np.random.seed(worker_seed)
+        stats = Counter()
+        while True:
+            candidate = sample_SGP_candidate(board_size, num_geoms, path_length, complexity_min_max, solver_backend,
+                                             solver_cache, full_bins, stats)
+            if candidate is not None:
+                candidate['stats'] = stats
+                yield candidate
+                stats = Counter()
+
+    candidate_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=_sampling_worker, daemon=True, args=(
+            candidate_queue, stop_event, get_worker_seed(seed, num_geoms, path_length, worker_index, run), board_size,
+            num_geoms, path_length, complexity_min_max, solver_backend, use_solver_cache, full_bins))
+        for worker_index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        while True:
+            yield candidate_queue.get()
+    finally:
+        # Drain the queue while the workers finish their current sample, a worker with unflushed items cannot exit
+        stop_event.set()
+        while any(process.is_alive() for process in processes):
+            try:
+                candidate_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for process in processes:
+            process.join()
+
+
 def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min_max, complexity_bin_size, shapes,
-                         colors, interval = 60):
+                         colors, interval = 60, solver_backend=None, use_solver_cache=True, workers=1,
+                         seed=None):
     """
 
     Args:
@@ -25,12 +242,23 @@ def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min
         complexity_bin_size:
         shapes:
         colors:
+        solver_backend: Search backend of the shortest path solver, e.g. 'ida_star' for long shortest paths on large
+            boards where A* runs out of memory. Bounded A* if None.
+        use_solver_cache: Keep the solver results in the persistent solver cache shared with other runs.
+        workers: Number of worker processes that sample and measure configs, the calling process keeps the bins and
+            the dedup set and writes the config files.
+        seed: Base seed of the sampling, every worker derives its own seed from it. With one worker the generated
+            dataset is reproducible, with several the order in which the candidates arrive is not.
+
+    An existing config_id is resumed: the bins are refilled from its config files, its dedup index is reloaded, and
+    only the bins that are not full yet are sampled.
 
     Returns:
 
     """
 
     geoms = [(shape, color) for shape in shapes for color in colors]
+    solver_cache = get_solver_cache() if use_solver_cache else None
     util.validate_parameters(complexity_min_max, num_geoms_min_max, board_size, len(geoms), complexity_bin_size)
 
     # Set up directories
@@ -39,6 +267,14 @@ def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min
     config_dir = os.path.join(base_dir, 'Data', 'Configs', config_id)
     os.makedirs(config_dir, exist_ok=True)
 
+    # Resume earlier runs of this config_id, their configs are never emitted again
+    config_counts, run, in_sync = load_generation_checkpoint(config_id, config_dir)
+    dedup_index = load_dedup_index(config_id)
+    if not in_sync:
+        dedup_index.add_config_files(config_dir)
+    if config_counts:
+        print(f"Resuming {config_id} with {sum(config_counts.values())} existing configs")
+
     # Sampling independently of c2 or c1
     use_c1_c2 = [True, True]
     if not complexity_min_max["c2"]:
@@ -72,15 +308,30 @@ def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min
 
         # Track used combinations
         complexity_bins = pd.DataFrame(0, index=complexity_range["c1"], columns=complexity_range["c2"])
-        seen_state_combinations = set()
-        total_bin_values_checkpoint = 0
+        for (config_num_geoms, c1, c2), count in config_counts.items():
+            if config_num_geoms == num_geoms and c1 in complexity_bins.index and c2 in complexity_bins.columns:
+                increment_complexity_bins(complexity_bins, {"c1": c1, "c2": c2}, use_c1_c2, count)
+        total_bin_values_checkpoint = complexity_bins.sum().sum()
         last_checked_time = time.time()  # Initialize the last checked time
+
+        # Full bins are shared with the workers, so candidates of full bins are rejected before the exact solve
+        full_bins = multiprocessing.Array('b', len(complexity_range["c1"]) * len(complexity_range["c2"]), lock=False)
+        generation_stats = Counter()
         print(f"Start sampling SlidingGeomPuzzle configs for {num_geoms} geoms.")
 
         #while True:
         for path_length in range(complexity_min_max['c1']['min'], complexity_min_max['c1']['max'] + 1):
+            if (complexity_bins.loc[path_length] >= complexity_bin_size).any():
+                continue  # Filled by an earlier run
+            update_full_bins(full_bins, complexity_bins, complexity_bin_size, complexity_min_max, path_length)
+
+            # The candidates are sampled and measured here or by worker processes, this loop owns bins and dedup set
+            candidates = stream_SGP_candidates(board_size, num_geoms, path_length, complexity_min_max, workers, seed,
+                                               solver_backend, use_solver_cache, solver_cache, run,
+                                               full_bins)
+            for candidate in candidates:
+                generation_stats.update(candidate.pop('stats'))
 
-            while True:
                 # Check progress every 'interval' seconds
                 if time.time() - last_checked_time >= interval:
                     num_configs_current = complexity_bins.sum().sum()
@@ -90,64 +341,46 @@ def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min
                         #break # Break in case you want simulation to stop after a time interval
 
                     print(f"Checking at {datetime.now().strftime('%H:%M')}: {num_configs_current * (i + 1)}/{num_configs_total} "
-                          f"new configs, checked {len(seen_state_combinations):,} total configs")
+                          f"new configs, {len(dedup_index):,} configs in the dedup index")
+                    print(f"Sampling: {format_generation_stats(generation_stats)}")
 
                     total_bin_values_checkpoint = num_configs_current
                     last_checked_time = time.time()
 
-                # Sample initial and goal states
-                #init_state = util.sample_board_states(num_geoms, board_size)
-                goal_state = util.sample_board_states(num_geoms, board_size)
-                init_state = find_config_by_random_expand(board_size, goal_state, path_length, max_steps=1000)
+                    save_generation_checkpoint(config_id, config_counts, run + 1)
+                    dedup_index.save()
 
-                if init_state is None:
-                    continue
+                init_state, goal_state = candidate['init_state'], candidate['goal_state']
+                shortest_move_sequence = candidate['shortest_move_sequence']
 
                 # Create a hashable unique combination of init and goal state
                 state_combination = (tuple(map(tuple, init_state)), tuple(map(tuple, goal_state)))
 
-                # Compress the state combination using zlib
-                compressed_state_combination = util.compress_with_zlib(state_combination)
-
-                # Check if the combination is already seen
-                if compressed_state_combination  in seen_state_combinations:
+                # Check if the combination is already seen, puzzles that only differ by a rotation, reflection or
+                # the geom order are the same puzzle, they are only added once accepted into a bin
+                if dedup_index.contains(board_size, init_state, goal_state):
                     continue  # Skip this iteration if already sampled
-                else: # Add the combination to the seen set
-                    seen_state_combinations.add(state_combination)
-
-                # Calculate cumulative Manhattan distance
-                manhattan_heuristic = calculate_manhattan_heuristic(init_state, goal_state)
-                if manhattan_heuristic < complexity_min_max["c1"]["min"]-complexity_min_max["c2"]["max"]*2:
-                    continue
-                if manhattan_heuristic > complexity_min_max["c1"]["max"]:
-                    continue
 
                 # Sample geoms without replacement
                 geoms_sample = random.sample(geoms, num_geoms)
 
-                # Measure complexity in form of shortest sequence length and cumulative Manhattan distance
-                shortest_move_sequence = a_star(board_size, init_state, goal_state, max_depth=complexity_min_max["c1"]["max"])
-                if shortest_move_sequence == None:
-                    continue
-
                 complexity =  {
                     "c1": len(shortest_move_sequence)-1,
-                    "c2": (len(shortest_move_sequence)-1 - manhattan_heuristic)//2
+                    "c2": (len(shortest_move_sequence)-1 - candidate['manhattan_heuristic'])//2
                 }
 
                 # Check if the complexity bin is valid
                 if complexity['c1'] not in complexity_bins.index or complexity['c2'] not in complexity_bins.columns:
                     continue
-                #elif complexity_bins.loc[complexity['c1'], complexity['c2']] >= complexity_bin_size:
-                #    continue
+                elif complexity_bins.loc[complexity['c1'], complexity['c2']] >= complexity_bin_size:
+                    continue  # Sampled by a worker before the bin was flagged full
 
                 # Increment bins based on the flags
-                if use_c1_c2[0] and use_c1_c2[1]:  # Both c1 and c2 are used
-                    complexity_bins.loc[complexity["c1"], complexity["c2"]] += 1
-                elif not use_c1_c2[1]:  # Only c1 is used, increment all c2 bins for this c1
-                    complexity_bins.loc[complexity["c1"], :] += 1
-                elif not use_c1_c2[0]:  # Only c2 is used, increment all c1 bins for this c2
-                    complexity_bins.loc[:, complexity["c2"]] += 1
+                dedup_index.add(board_size, init_state, goal_state)
+                increment_complexity_bins(complexity_bins, complexity, use_c1_c2)
+                config_counts[(num_geoms, complexity["c1"], complexity["c2"])] += 1
+                update_full_bins(full_bins, complexity_bins, complexity_bin_size, complexity_min_max, complexity["c1"])
+                generation_stats['accepted'] += 1
 
                 bin_fill = complexity_bins.loc[complexity["c1"], complexity["c2"]]
 
@@ -160,12 +393,20 @@ def generate_SGP_configs(config_id,board_size, num_geoms_min_max, complexity_min
                                       random_valid_move_sequence, random_invalid_move_sequence,
                                       config_id, config_dir)
 
-                # Check if all bins are full
-                #TODO this now only works for c2==0
-                if complexity_bins.loc[complexity["c1"], complexity["c2"]] >= complexity_bin_size:
+                # Check if all bins of this path length are full, closing the stream stops the workers
+                if (complexity_bins.loc[path_length] >= complexity_bin_size).all():
                     print(f"Successfully finished building all configurations for {num_geoms} geoms")
+                    candidates.close()
                     break
 
+            save_generation_checkpoint(config_id, config_counts, run + 1)
+            dedup_index.save()
+
+        print(f"Sampling of {num_geoms} geoms: {format_generation_stats(generation_stats)}")
+
+    if solver_cache is not None:
+        solver_cache.report()
+
     return config_id
 
 
@@ -181,5 +422,9 @@ if __name__ == "__main__":
                                                                                           "c2": {"min": 0, "max": 0}}),
                                      complexity_bin_size= params.get('complexity_bin_size', 100),
                                      shapes=params.get('shapes', ['cube', 'sphere', 'cylinder', 'pyramid']),
-                                     colors=params.get('colors', ['red', 'green', 'blue', 'yellow']))
+                                     colors=params.get('colors', ['red', 'green', 'blue', 'yellow']),
+                                     solver_backend=params.get('solver_backend', None),
+                                     use_solver_cache=params.get('use_solver_cache', True),
+                                     workers=params.get('workers', 1),
+                                     seed=params.get('seed', None))
     print(f"Finished Generate Sliding Geom Puzzle (SGP) configuration files with ID: {config_id}")
\ No newline at end of file
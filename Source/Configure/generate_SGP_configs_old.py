@@ -8,7 +8,7 @@ import time
 import warnings
 from datetime import datetime
 
-from find_shortest_move_sequence import a_star, calculate_manhattan_heuristic
+from Source.Solver.shortest_path_solver import a_star, calculate_manhattan_heuristic
 from encode_config_to_json import encode_SGP_config_to_json
 from find_random_move_sequence import generate_random_valid_path, generate_random_invalid_path
 import configuration_utilities as util
@@ -12,12 +12,22 @@ import zlib
 import pickle
 
 import configuration_utilities as util
-from find_shortest_move_sequence import a_star, find_config_by_random_expand
-from check_is_STP_solvable import is_solvable
+from Source.Solver.shortest_path_solver import solve
+from Source.Solver.heuristics import get_heuristic
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.solver_cache import get_solver_cache
+from find_shortest_move_sequence import find_config_by_exact_layer, find_config_by_heuristic_walk
+from dedup_index import load_dedup_index
+from generation_checkpoint import load_generation_checkpoint, save_generation_checkpoint
+from check_is_STP_solvable import sample_solvable_state
 from encode_config_to_json import encode_STP_config_to_json
 from Source.Plot.visualise_configs_statistics import visualise_config_stats
 from find_random_move_sequence import generate_random_valid_path, generate_random_invalid_path
 
+STP_SAMPLING_MODES = ['exact_layer', 'heuristic_walk', 'permutation']
+STP_HEURISTIC = 'walking_distance'  # Heuristic of the sampling walks and the searches, see heuristics.HEURISTICS
+MAX_FAILED_SAMPLES = 100_000  # Samples in a row without a new config before the generation of a path length aborts
+
 
 def validate_parameters(complexity_min_max, board_size, complexity_bin_size):
     # Validate complexity ranges
@@ -75,7 +85,70 @@ def compress_with_zlib(state_combination):
     return zlib.compress(state_str.encode())  # Compress the encoded string and return bytes
 
 
-def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, interval = 20):
+def get_default_sampling_mode(board_size):
+    """Return the sampling mode used if none is specified, the exact layers are only collected up to 3x3 boards."""
+    return 'exact_layer' if board_size <= 3 else 'heuristic_walk'
+
+
+def get_typical_depth(board_size, goal_state, heuristic=STP_HEURISTIC, num_samples=100):
+    """
+    Estimate the typical shortest path length of uniformly drawn solvable states as the median of their heuristic.
+    The heuristic is admissible, so the typical depth is at least as large.
+
+    Args:
+        board_size: Board size (n x n).
+        goal_state: The goal state as an (n * n - 1, 2) array.
+        heuristic: Admissible heuristic, one of HEURISTICS.
+        num_samples: Number of drawn states.
+
+    Returns:
+        float: The median heuristic of the drawn states.
+    """
+    codec = PackedStateCodec(board_size, len(goal_state))
+    estimate = get_heuristic(codec, codec.pack(goal_state), heuristic)
+    return float(np.median([estimate(codec.pack(sample_solvable_state(board_size, goal_state)))
+                            for _ in range(num_samples)]))
+
+
+def sample_STP_state(board_size, goal_state, path_length, max_depth, sampling, heuristic=STP_HEURISTIC,
+                     solver_cache=None):
+    """
+    Sample a solvable start state of the sliding tile puzzle.
+
+    Args:
+        board_size: Board size (n x n).
+        goal_state: The goal state as an (n * n - 1, 2) array.
+        path_length: The target shortest path length, not used by 'permutation'.
+        max_depth: The largest shortest path length of the dataset.
+        sampling: One of STP_SAMPLING_MODES:
+            - 'exact_layer': uniform from the states at exactly path_length moves, see find_config_by_exact_layer
+            - 'heuristic_walk': random walk from the goal to a state at exactly path_length moves, see
+              find_config_by_heuristic_walk
+            - 'permutation': uniform from all solvable states by permutation-parity construction, for datasets of
+              large c1, states whose heuristic exceeds max_depth are rejected without a search
+        heuristic: Admissible heuristic of the walk and the pre-screen, one of HEURISTICS.
+        solver_cache: Cache of the shortest path solver results.
+
+    Returns:
+        tuple: The start state and its shortest path to the goal state if the sampler found one (None for
+        'permutation'), or (None, None) if no state was found.
+    """
+    if sampling == 'exact_layer':
+        return find_config_by_exact_layer(board_size, goal_state, path_length, cache=solver_cache, return_path=True)
+    if sampling == 'heuristic_walk':
+        return find_config_by_heuristic_walk(board_size, goal_state, path_length, heuristic, cache=solver_cache,
+                                             return_path=True)
+    if sampling == 'permutation':
+        init_state = sample_solvable_state(board_size, goal_state)
+        codec = PackedStateCodec(board_size, len(goal_state))
+        if get_heuristic(codec, codec.pack(goal_state), heuristic)(codec.pack(init_state)) > max_depth:
+            return None, None
+        return init_state, None
+    raise ValueError(f"Unsupported sampling mode: {sampling}. Must be one of {STP_SAMPLING_MODES}.")
+
+
+def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, interval = 20, config_id=None,
+                         sampling=None, heuristic=STP_HEURISTIC, use_solver_cache=True):
     """
 
     Args:
@@ -85,19 +158,39 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
         complexity_bin_size:
         shapes:
         colors:
+        config_id: ID of the dataset, a new ID if None. An existing config_id is resumed, only the bins that are not
+            full yet are sampled.
+        sampling: How start states are sampled, one of STP_SAMPLING_MODES, see get_default_sampling_mode if None.
+            Every mode samples solvable states only.
+        heuristic: Admissible heuristic of the sampling and the IDA* searches, one of HEURISTICS.
+        use_solver_cache: Keep the solver results in the persistent solver cache shared with other runs.
 
     Returns:
 
     """
 
     validate_parameters(complexity_min_max, board_size, complexity_bin_size)
+    sampling = sampling or get_default_sampling_mode(board_size)
+    if sampling not in STP_SAMPLING_MODES:
+        raise ValueError(f"Unsupported sampling mode: {sampling}. Must be one of {STP_SAMPLING_MODES}.")
+    solver_cache = get_solver_cache() if use_solver_cache else None
 
     # Set up directories
-    config_id = f"STP_ID_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    config_id = config_id if config_id else f"STP_ID_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
     config_dir = os.path.join(base_dir, 'Data', 'Configs', config_id)
     os.makedirs(config_dir, exist_ok=True)
 
+    # Resume earlier runs of this config_id, their configs are never emitted again
+    config_counts, run, in_sync = load_generation_checkpoint(config_id, config_dir)
+    dedup_index = load_dedup_index(config_id)
+    if not in_sync:
+        dedup_index.add_config_files(config_dir)
+    if config_counts:
+        print(f"Resuming {config_id} with {sum(config_counts.values())} existing configs")
+    num_geoms = board_size**2-1
+    goal_state = generate_goal_state(num_geoms, board_size)
+
     # Sampling independently of c2 or c1
     use_c1 = True
     if not complexity_min_max["c1"]:
@@ -108,6 +201,14 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
         use_c1 = False
         print("Not using c1")
 
+    # Uniform permutations almost never fall below the typical depth, e.g. about 50 moves on 4x4
+    if sampling == 'permutation':
+        typical_depth = get_typical_depth(board_size, goal_state, heuristic)
+        if complexity_min_max["c1"]["max"] < typical_depth:
+            raise ValueError(f"Sampling 'permutation' needs a c1 max of at least the typical depth {typical_depth:g} "
+                             f"of {board_size}x{board_size}, got {complexity_min_max['c1']['max']}. Use "
+                             f"'exact_layer' or 'heuristic_walk' for shorter path lengths.")
+
     # Initialize nested bins
     complexity_range = {"c1": range(complexity_min_max["c1"]["min"], complexity_min_max["c1"]["max"] + 1)}
 
@@ -121,15 +222,25 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
     # Sample initial and goal states until complexity bins are filled with bin size amount of samples
     # Track used combinations
     complexity_bins = pd.Series(0, index=complexity_range["c1"])
-    seen_state_combinations = set()
-    total_bin_values_checkpoint = 0
+    for (_, c1, _), count in config_counts.items():
+        if c1 in complexity_bins.index:
+            complexity_bins.loc[c1] += count
+    total_bin_values_checkpoint = complexity_bins.sum()
     last_checked_time = time.time()  # Initialize the last checked time
-    num_geoms = board_size**2-1
-    goal_state = generate_goal_state(num_geoms, board_size)
     #pbar = tqdm(total=100, desc="Manual Progress")
 
     for path_length in range(complexity_min_max['c1']['min'], complexity_min_max['c1']['max']+1):
+        if complexity_bins.loc[path_length] >= complexity_bin_size:
+            continue  # Filled by an earlier run
+
+        num_failed_samples = 0
         while True:
+            if num_failed_samples >= MAX_FAILED_SAMPLES:
+                raise RuntimeError(f"No new config for c1={path_length} in {MAX_FAILED_SAMPLES} samples in a row with "
+                                   f"sampling '{sampling}', {complexity_bins.loc[path_length]}/{complexity_bin_size} "
+                                   f"configs found.")
+            num_failed_samples += 1
+
             # Check progress every 'interval' seconds
             if time.time() - last_checked_time >= interval:
                 num_configs_current = complexity_bins.sum().sum()
@@ -139,32 +250,34 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
                     #break # Break in case you want simulation to stop after a time interval
 
                 print(f"Checking at {datetime.now().strftime('%H:%M')}: {num_configs_current}/{num_configs_total} "
-                      f"new configs, checked {len(seen_state_combinations):,} total configs")
+                      f"new configs, {len(dedup_index):,} configs in the dedup index")
                 #how_many_solutions = len(seen_state_combinations)/1000000
                 #pbar.update(how_many_solutions)  # Manually update the progress by 10 units
                 total_bin_values_checkpoint = num_configs_current
                 last_checked_time = time.time()
 
-            # Sample initial and goal states
-            init_state = find_config_by_random_expand(board_size, goal_state, path_length, max_steps=1000)
+                save_generation_checkpoint(config_id, config_counts, run + 1)
+                dedup_index.save()
+
+            # Sample initial states, all sampling modes only produce solvable ones
+            init_state, shortest_move_sequence = sample_STP_state(board_size, goal_state, path_length,
+                                                                  complexity_min_max["c1"]["max"], sampling, heuristic,
+                                                                  solver_cache)
+            if init_state is None:
+                continue
 
             # Create a hashable unique combination of init and goal state
             state_combination = (tuple(map(tuple, init_state)), tuple(map(tuple, goal_state)))
 
-            # Compress and check if the state exists
-            compressed_state = compress_state(init_state, goal_state)
-            if compressed_state in seen_state_combinations:
+            # Check if the combination is already seen, it is only added once accepted into a bin
+            if dedup_index.contains(board_size, init_state, goal_state):
                 continue  # Skip this iteration if already sampled
-                print("seen")
-            else:
-                seen_state_combinations.add(compressed_state)
 
-            if not is_solvable(init_state):
-                print("Unsolvable")
-                continue
-
-            # Measure complexity in form of shortest sequence length and cumulative Manhattan distance
-            shortest_move_sequence = a_star(board_size, init_state, goal_state, max_depth=complexity_min_max["c1"]["max"]+10)
+            # Measure complexity in form of shortest sequence length, the path of the sampler is reused if it has one
+            if shortest_move_sequence is None:
+                shortest_move_sequence = solve(board_size, init_state, goal_state,
+                                               max_depth=complexity_min_max["c1"]["max"], backend='ida_star',
+                                               heuristic=heuristic, cache=solver_cache)
             if shortest_move_sequence==None:
                 #print("A* None")
                 continue
@@ -180,10 +293,15 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
             if complexity['c1'] not in complexity_bins.index:
                 print("Invalid c1")
                 continue
+            elif complexity_bins.loc[complexity['c1']] >= complexity_bin_size:
+                continue  # A permutation sample of a full bin
 
             # Increment bins based on the flags
+            dedup_index.add(board_size, init_state, goal_state)
             if use_c1:  # Both c1 and c2 are used
                 complexity_bins.loc[complexity["c1"]] += 1
+            config_counts[(num_geoms, complexity["c1"], None)] += 1
+            num_failed_samples = 0
 
             bin_fill = complexity_bins.loc[complexity["c1"]]
 
@@ -193,11 +311,17 @@ def generate_STP_configs(board_size, complexity_min_max, complexity_bin_size, in
                                   random_valid_move_sequence, random_invalid_move_sequence,
                                   config_id, config_dir)
 
-            # Check if all bins are full
-            if (complexity_bins >= complexity_bin_size).all().all():
-                print(f"Successfully finished building all configurations for {num_geoms} geoms")
+            # Check if the bin of this path length is full
+            if complexity_bins.loc[path_length] >= complexity_bin_size:
+                print(f"Successfully finished building all configurations for path length {path_length}")
                 break
 
+        save_generation_checkpoint(config_id, config_counts, run + 1)
+        dedup_index.save()
+
+    if solver_cache is not None:
+        solver_cache.report()
+
     #pbar.close()  # Close the progress bar
     return config_id
 
@@ -209,7 +333,11 @@ if __name__ == "__main__":
     # Generate Sliding Tile Puzzle (STP) configuration files
     config_id = generate_STP_configs(board_size=params.get('board_size', 5),
                                      complexity_min_max=params.get('complexity_min_max', {"c1": {"min": 16, "max": 16}}),
-                                     complexity_bin_size=params.get('complexity_bin_size', 10))
+                                     complexity_bin_size=params.get('complexity_bin_size', 10),
+                                     config_id=params.get('config_id', None),
+                                     sampling=params.get('sampling', None),
+                                     heuristic=params.get('heuristic', STP_HEURISTIC),
+                                     use_solver_cache=params.get('use_solver_cache', True))
     print(f"Finished Generate Sliding Geom Puzzle (SGP) configuration files with ID: {config_id}")
 
     # Visualise config stats
@@ -0,0 +1,96 @@
+"""
+- checkpoints of a config generation run, so an interrupted or extended run of a config_id continues where it stopped
+- a checkpoint holds the number of configs written per (num_geoms, c1, c2) bin and the number of runs of the
+  config_id, it is saved to Data/ConfigCheckpoints/<config_id>.json next to the dedup index of the run, see
+  dedup_index
+- the random number generators are not checkpointed, seeded runs derive their seeds from the run number (see
+  get_worker_seed) and the dedup index keeps every run from emitting configs of earlier runs
+- the config files themselves are the ground truth, the bin counts are always rebuilt from the config file names
+  (cheap, no file is opened), if they do not match the checkpoint (e.g. configs written after the last checkpoint, or
+  no checkpoint at all) the dedup index is completed from the config files as well
+"""
+
+# Import statements
+import os
+import re
+import json
+import logging
+from collections import Counter
+
+CONFIG_FILE_PATTERN = re.compile(r"^config_.*_b_(\d+)_g_(\d+)_c1_(\d+)(?:_c2_(\d+))?_i_(\d+)\.json$")
+
+
+def get_generation_checkpoint_path(config_id):
+    """Return the path of the generation checkpoint of a config_id."""
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(base_dir, 'Data', 'ConfigCheckpoints', f"{config_id}.json")
+
+
+def count_config_files(config_dir):
+    """
+    Count the config files of a config directory per complexity bin, from their file names.
+
+    Args:
+        config_dir (str): Directory with the config files of the dataset.
+
+    Returns:
+        Counter: (num_geoms, c1, c2) -> number of config files, c2 is None for configs without c2 (STP).
+    """
+    config_counts = Counter()
+    if not os.path.isdir(config_dir):
+        return config_counts
+    for file_name in os.listdir(config_dir):
+        match = CONFIG_FILE_PATTERN.match(file_name)
+        if match:
+            _, num_geoms, c1, c2, _ = match.groups()
+            config_counts[(int(num_geoms), int(c1), None if c2 is None else int(c2))] += 1
+    return config_counts
+
+
+def save_generation_checkpoint(config_id, config_counts, runs):
+    """
+    Save the progress of a generation run, via a temporary file so that an interrupted save keeps the old checkpoint.
+
+    Args:
+        config_id (str): The ID of the config dataset.
+        config_counts (Counter): (num_geoms, c1, c2) -> number of configs written, see count_config_files.
+        runs (int): Number of runs of the config_id so far, including the current one.
+    """
+    checkpoint_file = get_generation_checkpoint_path(config_id)
+    os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+    checkpoint_state = {
+        'config_id': config_id,
+        'runs': runs,
+        'num_configs': sum(config_counts.values()),
+        'bins': [[num_geoms, c1, c2, count] for (num_geoms, c1, c2), count in config_counts.items()]
+    }
+    tmp_checkpoint_file = f"{checkpoint_file}.{os.getpid()}.tmp"
+    with open(tmp_checkpoint_file, 'w') as f:
+        json.dump(checkpoint_state, f)
+    os.replace(tmp_checkpoint_file, checkpoint_file)
+    logging.info(f"Saved generation checkpoint {checkpoint_file}")
+
+
+def load_generation_checkpoint(config_id, config_dir):
+    """
+    Load the progress of earlier runs of a config_id.
+
+    Args:
+        config_id (str): The ID of the config dataset.
+        config_dir (str): Directory with the config files of the dataset.
+
+    Returns:
+        tuple: (config_counts, runs, in_sync), config_counts maps (num_geoms, c1, c2) to the number of configs already
+        written, runs is the number of earlier runs and in_sync is False if the config files were written after the
+        checkpoint (or there is no checkpoint), i.e. the dedup index may miss some of them.
+    """
+    checkpoint_file = get_generation_checkpoint_path(config_id)
+    checkpoint_state = None
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file, 'r') as f:
+            checkpoint_state = json.load(f)
+
+    config_counts = count_config_files(config_dir)
+    runs = 0 if checkpoint_state is None else checkpoint_state['runs']
+    in_sync = checkpoint_state is not None and checkpoint_state['num_configs'] == sum(config_counts.values())
+    return config_counts, runs, in_sync
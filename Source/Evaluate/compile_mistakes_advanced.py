@@ -1,11 +1,17 @@
 import os
 import json
+import glob
 import pandas as pd
 import Source.Evaluate.evaluation_utilities as util
+from Source.Solver.productive_moves import classify_episode
 
 def compile_mistakes(experiment_id, experiment_signature="InteractivePuzzle"):
     """
     Compile episode evaluation data from experiment directories, including productivity analysis.
+    Every step is classified with a productive-move oracle of the episode's goal, so a move counts as productive
+    whenever it lies on any shortest path, and the number of optimal moves that were available is reported as well.
+    The classes are read from the 'move_productivity' entry of the episode evaluation, episodes evaluated without
+    it are classified here.
 
     Args:
         experiment_id (str): The experiment ID to locate the experiment directory.
@@ -74,19 +80,28 @@ def compile_mistakes(experiment_id, experiment_signature="InteractivePuzzle"):
                     out_of_bounds_count += valididy_list.count("Destination out of bounds")
                     not_legal_command_count += valididy_list.count("not a legal command")
 
-            # Parse move_heuristics for productivity analysis
-            move_heuristics = eval_data.get("move_heuristics", {}).get("values", [])
-            productive_actions = 0
-            unproductive_actions = 0
-            incorrect_actions = 0
-
-            for prev, curr in zip(move_heuristics[:-1], move_heuristics[1:]):
-                if curr < prev:
-                    productive_actions += 1
-                elif curr > prev:
-                    unproductive_actions += 1
-                else:
-                    incorrect_actions += 1
+            # The step classes were looked up by evaluate_episodes, only older evaluations are classified again
+            episode = eval_data.get('move_productivity')
+            if not episode or not episode.get('valid'):
+                # Load the episode config for the board size
+                config_file_paths = glob.glob(os.path.join(sub_dir, "config_*.json"))
+                if not config_file_paths:
+                    print(f"No config file found in {sub_dir}. Skipping...")
+                    continue
+
+                with open(config_file_paths[0], 'r') as config_file:
+                    env_config = json.load(config_file)
+
+                # Classify every step by a table lookup of all moves, the first logged state is the goal state
+                step_states = util.extract_all_states_from_config(sim_message_log)
+                goal_state = step_states.pop(0)
+                episode = classify_episode(env_config.get('grid_size'), goal_state, step_states)
+
+            productive_actions = episode['classes'].count('decreasing')
+            unproductive_actions = episode['classes'].count('increasing')
+            incorrect_actions = episode['classes'].count('keeping')
+            productive_options = episode['productive_options'][:-1]  # Options of the states an action was taken in
+            mean_productive_options = sum(productive_options) / len(productive_options) if productive_options else 0
 
             # Append episode-level data to list
             episode_data.append({
@@ -102,7 +117,8 @@ def compile_mistakes(experiment_id, experiment_signature="InteractivePuzzle"):
                 'not_legal_commands': not_legal_command_count,
                 'productive_actions': productive_actions,
                 'unproductive_actions': unproductive_actions,
-                'incorrect_actions': incorrect_actions
+                'incorrect_actions': incorrect_actions,
+                'mean_productive_options': mean_productive_options
             })
 
         except Exception as e:
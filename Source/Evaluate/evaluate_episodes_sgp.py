@@ -11,10 +11,14 @@ import os
 import json
 
 import evaluation_utilities as util
-from calculate_shortest_path_length import calculate_shortest_path_length
+from Source.Solver.goal_distance_oracle import GoalDistanceOracle
+from Source.Solver.solver_cache import get_solver_cache
+from Source.Solver.batch_solver import map_many
+from Source.Solver.productive_moves import ProductiveMoveOracle, classify_episode
 
 
-def evaluate_episodes(experiment_id, experiment_signature="InteractivePuzzle"):
+def evaluate_episodes(experiment_id, experiment_signature="InteractivePuzzle", solver_backend='a_star',
+                      use_solver_cache=True, workers=1):
     # Set signatures and file paths
     system_json_files_signature = "sim_message_log.json"
     config_json_files_signature = "config_*.json"
@@ -23,11 +27,12 @@ def evaluate_episodes(experiment_id, experiment_signature="InteractivePuzzle"):
     # Get directory and file paths
     experiment_dir, results_dir = util.make_results_dir(experiment_id)
     sub_dirs = util.filter_experiment_sub_dirs(experiment_dir, experiment_signature)
+    solver_cache = get_solver_cache() if use_solver_cache else None
 
-    # Loop over directories
+    # Load board size, goal state and current step state of all episodes
+    episodes = []
     for sub_dir in sub_dirs:
         file_dict = util.bulk_load_files(sub_dir, file_signatures)
-        # Load board size, goal state and current step state
         try:
             with open(file_dict[system_json_files_signature][0], 'r') as system_config_file:
                 interaction_log = json.load(system_config_file)
@@ -35,12 +40,21 @@ def evaluate_episodes(experiment_id, experiment_signature="InteractivePuzzle"):
                 env_config = json.load(env_config_file)
         except Exception as e:
             print(f"Error loading file")
+            continue
+        episodes.append((sub_dir, interaction_log, env_config))
 
+    # Measure the goal distances of all episodes, with several workers every episode is measured in a worker process
+    # with one oracle for its goal
+    tasks = [(interaction_log, env_config, solver_backend) for _, interaction_log, env_config in episodes]
+    goal_distance_results = map_many(_check_goal_distances_task, tasks, workers=workers, cache=solver_cache)
+
+    # Loop over episodes
+    for (sub_dir, interaction_log, env_config), goal_distances in zip(episodes, goal_distance_results):
         try:
-            move_heuristics = check_shortest_path_length(interaction_log, env_config)
+            move_heuristics = {'move_heuristics': goal_distances['move_heuristics']}
 
             merged_dict = {
-                **move_heuristics,
+                **goal_distances,
                 **check_min_shortest_path_length(move_heuristics),
                 **check_regret(move_heuristics, env_config),
                 **check_spl_at_episode_total_shortest_path_length(move_heuristics, env_config),
@@ -59,14 +73,63 @@ def evaluate_episodes(experiment_id, experiment_signature="InteractivePuzzle"):
         except Exception as e:
             print(f"Error saving board state to {episode_eval_json_file_path}.json: {e}")
 
+    if solver_cache is not None:
+        solver_cache.report()
+
+
+def check_goal_distances(interaction_log, env_config, solver_backend='a_star', solver_cache=None):
+    """
+    Runs check_shortest_path_length and check_move_productivity with one ProductiveMoveOracle, so every episode costs
+    one distance table or backward search from its goal state.
+
+    Args:
+        interaction_log (dict): The interaction log with step-by-step states.
+        env_config (dict): Environment configuration containing board size.
+        solver_backend (str, optional): Search backend for states the backward search does not cover.
+        solver_cache (SolverCache, optional): Persistent cache of shortest path lengths shared with earlier runs.
+
+    Returns:
+        dict: The 'move_heuristics' and 'move_productivity' results of the episode. If the oracle cannot be built,
+        both are invalid with the error.
+    """
+    oracle = None
+    try:
+        step_states = util.extract_all_states_from_config(interaction_log)
+        if step_states:
+            oracle = ProductiveMoveOracle(env_config.get('grid_size'), step_states[0], backend=solver_backend,
+                                          cache=solver_cache)
+    except (KeyError, TypeError, ValueError) as e:
+        # Malformed states or an unsupported backend, both checks would fail the same way
+        error = f"Goal distance oracle could not be built: {e}"
+        return {
+            'move_heuristics': {'values': [], 'valid': False, 'error': error},
+            'move_productivity': {'classes': [], 'productive_options': [], 'valid': False, 'error': error}
+        }
+
+    return {
+        **check_shortest_path_length(interaction_log, env_config, solver_backend, solver_cache, oracle),
+        **check_move_productivity(interaction_log, env_config, solver_backend, solver_cache, oracle)
+    }
+
+
+def _check_goal_distances_task(task, solver_cache):
+    """Run check_goal_distances for one episode, the task of map_many."""
+    interaction_log, env_config, solver_backend = task
+    return check_goal_distances(interaction_log, env_config, solver_backend, solver_cache)
+
 
-def check_shortest_path_length(interaction_log, env_config):
+def check_shortest_path_length(interaction_log, env_config, solver_backend='a_star', solver_cache=None, oracle=None):
     """
     Calculates the shortest path length for each step in the interaction log.
 
     Args:
         env_config (dict): Environment configuration containing board size.
         interaction_log (dict): The interaction log with step-by-step states.
+        solver_backend (str, optional): Search backend for states the backward search does not cover, e.g.
+            'bidirectional'.
+        solver_cache (SolverCache, optional): Persistent cache of shortest path lengths shared with earlier runs.
+        oracle (GoalDistanceOracle or ProductiveMoveOracle, optional): Oracle of the goal state of the episode,
+            shared with check_move_productivity by check_goal_distances. If None, a GoalDistanceOracle is built.
 
     Returns:
         dict: A dictionary containing:
@@ -95,9 +158,14 @@ def check_shortest_path_length(interaction_log, env_config):
 
         goal_state = step_states.pop(0)
 
-        # Loop over each step and calculate heuristic
+        # Solve the whole episode with one backward search from the goal state
+        if oracle is None:
+            oracle = GoalDistanceOracle(board_size, goal_state, backend=solver_backend, cache=solver_cache)
+        oracle.cover(step_states)
+
+        # Loop over each step and look up the heuristic
         for step_state in step_states:
-            shortest_move_sequence_length = calculate_shortest_path_length(board_size, step_state, goal_state)
+            shortest_move_sequence_length = oracle.distance(step_state)
             result['move_heuristics']['values'].append(shortest_move_sequence_length)
 
         # Mark as valid if successful
@@ -109,6 +177,58 @@ def check_shortest_path_length(interaction_log, env_config):
     return result
 
 
+def check_move_productivity(interaction_log, env_config, solver_backend='a_star', solver_cache=None, oracle=None):
+    """
+    Classifies every step of the interaction log by its effect on the distance to the goal, using one distance table
+    per goal to look up all legal moves of every state.
+
+    Args:
+        interaction_log (dict): The interaction log with step-by-step states.
+        env_config (dict): Environment configuration containing board size.
+        solver_backend (str, optional): Search backend for states the backward search does not cover.
+        solver_cache (SolverCache, optional): Persistent cache of shortest path lengths shared with earlier runs.
+        oracle (ProductiveMoveOracle, optional): Oracle of the goal state of the episode, shared with
+            check_shortest_path_length by check_goal_distances. If None, one is built.
+
+    Returns:
+        dict: A dictionary containing:
+            - 'move_productivity' (dict):
+                - 'classes' (list): 'decreasing', 'keeping' or 'increasing' for each step.
+                - 'productive_options' (list): Number of optimal moves available in each state.
+                - 'valid' (bool): True if the classification was successful, False otherwise.
+                - 'error' (str or None): Error message if the classification fails.
+    """
+    result = {
+        'move_productivity': {
+            'classes': [],
+            'productive_options': [],
+            'valid': False,
+            'error': None
+        }
+    }
+
+    try:
+        board_size = env_config.get('grid_size')
+        step_states = util.extract_all_states_from_config(interaction_log)
+
+        if not step_states:
+            result['move_productivity']['error'] = "No states found in interaction log."
+            return result
+
+        goal_state = step_states.pop(0)
+        episode = classify_episode(board_size, goal_state, step_states, oracle=oracle, backend=solver_backend,
+                                   cache=solver_cache)
+
+        result['move_productivity']['classes'] = episode['classes']
+        result['move_productivity']['productive_options'] = episode['productive_options']
+        result['move_productivity']['valid'] = True
+
+    except Exception as e:
+        result['move_productivity']['error'] = str(e)
+
+    return result
+
+
 def check_min_shortest_path_length(move_heuristics):
     """
     Returns the minimum shortest path length from the dictionary of move heuristics.
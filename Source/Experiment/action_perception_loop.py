@@ -1,18 +1,22 @@
 import websockets
 import base64
-import time
+import asyncio
+import inspect
 import json
 import logging
 import experiment_utilities as util
 
 from experiment_logging import log_separator
+from web_server import BINARY_FRAMES
 
-async def initialize_connection(uri):
+async def initialize_connection(uri, partner_id=None):
     """
     Initialize the WebSocket connection, perform the handshake, and register the partner ID.
 
     Args:
         uri (str): The WebSocket server URI.
+        partner_id (str, optional): The network ID of the game client, e.g. of a headless simulator. If None, the user
+            is asked to enter it.
 
     Returns:
         tuple: A tuple containing the WebSocket connection, network ID, and partner ID.
@@ -31,16 +35,18 @@ async def initialize_connection(uri):
 
         # Register partner ID
         isConnected = False
-        partner_id = None
+        ask_partner_id = partner_id is None
         while not isConnected:
-            partner_id = input("Please enter the remote client id: ")
-            print()  # This ensures the cursor moves to a new line
+            if ask_partner_id:
+                partner_id = input("Please enter the remote client id: ")
+                print()  # This ensures the cursor moves to a new line
             message_data = {
                 "command": "Handshake",
                 "from": network_id,
                 "to": partner_id,
                 "messages": ["Action Perception client attempting to register partner id with the game"],
                 "payload": base64.b64encode(b"nothing here").decode("utf-8"),
+                "capabilities": [BINARY_FRAMES],  # Ignored by clients without binary frames, e.g. the WebGL build
             }
             await websocket.send(json.dumps(message_data))
             logging.info("Sending handshake...")
@@ -50,6 +56,8 @@ async def initialize_connection(uri):
             logging.info(f"Received {command}: {message_data.get('messages')}")
             if command == "ACK":
                 isConnected = True
+            elif not ask_partner_id:
+                raise RuntimeError(f"Handshake with partner {partner_id} failed: {message_data.get('messages')}")
 
         return websocket, network_id, partner_id
     except Exception as e:
@@ -57,6 +65,40 @@ async def initialize_connection(uri):
         raise e
 
 
+async def receive_message(websocket):
+    """
+    Receive the next message of the partner, with its screenshot if it was sent as a separate binary frame.
+
+    Args:
+        websocket: The active WebSocket connection.
+
+    Returns:
+        dict: The message, its payload holds the raw pixels if they were sent as a binary frame.
+    """
+    message_data = json.loads(await websocket.recv())
+    if message_data.get("binary_payload"):
+        message_data["payload"] = await websocket.recv()
+    return message_data
+
+
+async def get_agent_action(agent, observation, i):
+    """
+    Let the agent act without blocking the event loop.
+
+    Args:
+        agent: The agent performing the actions.
+        observation: The observation of the game system.
+        i (int): The step of the episode.
+
+    Returns:
+        str: The action of the agent. Agents with an `async def act` (API agents) are awaited, synchronous agents
+        (scripted, user input, local models) run in the default thread pool.
+    """
+    if inspect.iscoroutinefunction(agent.act):
+        return await agent.act(observation, i)
+    return await asyncio.to_thread(agent.act, observation, i)
+
+
 async def interact_with_server(websocket, network_id, partner_id, agent, game, episode_logger):
     """
     Perform repeated interactions with the server after the connection has been established.
@@ -69,17 +111,16 @@ async def interact_with_server(websocket, network_id, partner_id, agent, game, e
         experiment_path (str): The path to save experiment data.
         max_game_length (int): The maximum number of actions to perform.
     """
-    response = await websocket.recv()
-    message_data = json.loads(response)
+    message_data = await receive_message(websocket)
     delay = agent.delay
 
     i = 0
     while not game.check_done(message_data):
         log_separator(f"Action-Perception Loop: {i}", logger=episode_logger)
-        time.sleep(delay)
+        await asyncio.sleep(delay)
         if message_data.get("command") == "Screenshot" or message_data.get("command") == "ActionAck":
             observation = game.feed_sim_response(message_data, i)
-            user_message = agent.act(observation, i)
+            user_message = await get_agent_action(agent, observation, i)
             game.feed_agent_response(user_message)
 
         # Exit the loop if the user wants to close the connection
@@ -118,8 +159,7 @@ async def interact_with_server(websocket, network_id, partner_id, agent, game, e
                 "payload": base64.b64encode(b"Optional binary data").decode("utf-8")
             }
             await websocket.send(json.dumps(message_data))
-            response = await websocket.recv()
-            message_data = json.loads(response)
+            message_data = await receive_message(websocket)
 
         i += 1
         game._save_logs()
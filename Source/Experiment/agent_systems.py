@@ -1,10 +1,10 @@
 import base64
 from logging import raiseExceptions
 
-import requests
+import httpx
 import io
 import os
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 import google.generativeai as genai
 from abc import ABC, abstractmethod
 import re
@@ -18,6 +18,7 @@ from transformers import AutoProcessor, AutoTokenizer
 from vllm import LLM, SamplingParams
 
 DEBUG = False
+OPENAI_TIMEOUT = httpx.Timeout(120.0, connect=10.0)  # Seconds before a request to the OpenAI API is given up
 
 class Agent(ABC):
     """
@@ -29,6 +30,8 @@ class Agent(ABC):
     def act(self, observation, i):
         """
         Abstract method to perform an action in the environment.
+        Agents that wait for a remote API define it as `async def act`, synchronous agents are run in a worker
+        thread by the action-perception loop.
 
         Parameters:
             action (any): The action to perform.
@@ -67,7 +70,7 @@ class UserAgent(Agent):
     def __init__(self):
         pass
 
-    def act(self, observation):
+    def act(self, observation, i=None):
         """
         Simulates the process of responding to an observation by asking for user input.
 
@@ -431,11 +434,16 @@ class GPT4Agent(LLMAgent):
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        self.client = httpx.AsyncClient(timeout=OPENAI_TIMEOUT)
         self.model = "gpt-4o"
         self.chat_history = []
         self.content = []  
 
-    def act(self, observation, loop_iteration):
+    async def post_chat_completion(self, payload):
+        """Send a chat completion request to the OpenAI API without blocking the event loop."""
+        return await self.client.post("https://api.openai.com/v1/chat/completions", headers=self.headers, json=payload)
+
+    async def act(self, observation, loop_iteration):
         sceneUnderstanding = False #TODO dirty quick code to manually change agent for scene understanding
         if sceneUnderstanding:
             try:
@@ -458,11 +466,7 @@ class GPT4Agent(LLMAgent):
                     "max_tokens": 500
                 }
 
-                response = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers=self.headers,
-                    json=payload
-                )
+                response = await self.post_chat_completion(payload)
 
                 action, thoughts = self.parse_action(response.json()['choices'][0]['message']['content'], split_at='description:')
                 thoughts = self.parse_action_rmv_special_chars(thoughts)
@@ -657,10 +661,7 @@ class GPT4Agent(LLMAgent):
                     "max_tokens": 500
                 }
 
-                response = requests.post("https://api.openai.com/v1/chat/completions",
-                    headers=self.headers,
-                    json=payload
-                )
+                response = await self.post_chat_completion(payload)
 
                 action, thoughts = self.parse_action(response.json()['choices'][0]['message']['content'])
                 thoughts = self.parse_action_rmv_special_chars(thoughts)
@@ -737,11 +738,7 @@ class GPT4Agent(LLMAgent):
                     "temperature": 0.5 # default is 0
                 }
 
-                response = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers=self.headers,
-                    json=payload
-                )
+                response = await self.post_chat_completion(payload)
 
                 action, thoughts = self.parse_action(response.json()['choices'][0]['message']['content'])
                 thoughts = self.parse_action_rmv_special_chars(thoughts)
@@ -766,12 +763,12 @@ class ClaudeAgent(LLMAgent):
 
     def __init__(self, episode_path, episode_logger, api_key_file_path, instruction_prompt_file_path, visual_state_embedding, single_images=True, COT=False, delay=0, max_history=0):
         super().__init__(episode_path, episode_logger, api_key_file_path, instruction_prompt_file_path, visual_state_embedding, single_images, COT, delay, max_history)
-        self.client = Anthropic(api_key=self.api_keys['CLAUDE_API_KEY'])
+        self.client = AsyncAnthropic(api_key=self.api_keys['CLAUDE_API_KEY'])
         self.model = "claude-3-5-sonnet-20241022"
         self.chat_history = []
         self.content = []  
        
-    def act(self, observation, loop_iteration):
+    async def act(self, observation, loop_iteration):
         if isinstance(observation, Image.Image):
             try:
                 if self.goal_state is None:
@@ -942,7 +939,7 @@ class ClaudeAgent(LLMAgent):
                 formatted_message = format_message_structure(messages)
                 self.episode_logger.info(formatted_message)
 
-                message = self.client.messages.create(
+                message = await self.client.messages.create(
                     model=self.model,
                     max_tokens=500,
                     system=self.system_prompt,
@@ -1015,7 +1012,7 @@ class ClaudeAgent(LLMAgent):
                 self.episode_logger.info(formatted_message)
 
 
-                message = self.client.messages.create(
+                message = await self.client.messages.create(
                     model=self.model,
                     max_tokens=500,
                     system=self.system_prompt,
@@ -1049,7 +1046,7 @@ class GeminiAgent(LLMAgent):
         self.chat_history = []
         self.content = [] 
 
-    def act(self, observation, loop_iteration):
+    async def act(self, observation, loop_iteration):
         if isinstance(observation, Image.Image):
             try:
                 if self.goal_state is None:
@@ -1197,7 +1194,7 @@ class GeminiAgent(LLMAgent):
 
 
                 # Generate response using Gemini
-                response = self.model.generate_content(
+                response = await self.model.generate_content_async(
                     messages,
                     generation_config=genai.GenerationConfig(
                         max_output_tokens=500
@@ -1275,7 +1272,7 @@ class GeminiAgent(LLMAgent):
                     """
                 ]
 
-                response = self.model.generate_content(content)
+                response = await self.model.generate_content_async(content)
                 action, thoughts = self.parse_action(response.text)
                 thoughts = self.parse_action_rmv_special_chars(thoughts)
                 action = self.parse_action_rmv_special_chars(action)
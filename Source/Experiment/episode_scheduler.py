@@ -0,0 +1,216 @@
+"""
+- asyncio episode scheduler, runs the episodes of an experiment concurrently on a pool of simulator sessions
+- a session is one connection to the relay registered with one game client (partner id), either a headless simulator
+  (see headless_simulator) or a WebGL build, so every session plays one episode at a time
+- pending episodes are dispatched to free sessions in the order of the sequential loop (env, agent, game, config),
+  a per agent type limit caps the number of concurrent episodes, e.g. to respect API rate limits
+- every episode keeps its directory layout, metadata and logger, completed episodes are added to the experiment
+  checkpoint as soon as they finish, so an interrupted experiment resumes with the missing episodes
+"""
+
+# Import statements
+import os
+import json
+import base64
+import asyncio
+import fnmatch
+import logging
+
+import experiment_utilities as util
+from headless_simulator import run_headless_simulator_in_background
+from init_experiment_components import init_env, init_agent, init_game
+from action_perception_loop import initialize_connection, interact_with_server as action_perception_loop
+from checkpoints import save_checkpoint
+from experiment_logging import setup_episode_logging, log_separator
+
+
+async def open_sessions(uri, num_sessions=1, headless=False, screenshot_mode='blank'):
+    """
+    Connect the sessions of the pool.
+
+    Args:
+        uri (str): The WebSocket URI of the relay.
+        num_sessions (int): Number of sessions, i.e. of episodes played at the same time.
+        headless (bool): Start one headless simulator per session, otherwise the user enters the id of one WebGL
+            client per session.
+        screenshot_mode (str): Screenshots of the headless simulators, see HeadlessSimulator.
+
+    Returns:
+        list: The sessions as (websocket, network_id, partner_id) tuples.
+    """
+    sessions = []
+    for _ in range(num_sessions):
+        if headless:
+            simulator_id = run_headless_simulator_in_background(uri, screenshot_mode)
+            sessions.append(await initialize_connection(uri, partner_id=simulator_id))
+        else:
+            sessions.append(await initialize_connection(uri))
+    logging.info(f"Opened {len(sessions)} simulator sessions")
+    return sessions
+
+
+async def close_sessions(sessions):
+    for websocket, _, _ in sessions:
+        await websocket.close()
+
+
+def collect_episodes(games, agents, envs, experiment_dir):
+    """
+    List the episodes of an experiment in the order of the sequential experiment loop.
+
+    Args:
+        games (dict): Game name -> game params.
+        agents (dict): Agent name -> agent params.
+        envs (dict): Env name -> env params.
+        experiment_dir (str): Directory of the experiment.
+
+    Returns:
+        list: One dict per episode with its name, path, config file and params.
+    """
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    episodes = []
+    for env_name, env_params in envs.items():
+        for agent_name, agent_params in agents.items():
+            for game_name, game_params in games.items():
+                config_dir = os.path.join(base_dir, 'Data', 'Configs', game_params.get('config_id', None))
+
+                # Load all config files from config_ID collection
+                json_file_paths = []
+                for file_name in sorted(os.listdir(config_dir)):  # Sort the file names alphabetically
+                    if fnmatch.fnmatch(file_name, "config*.json"):  # Match files like config*.json
+                        json_file_paths.append(os.path.join(config_dir, file_name))
+
+                num_game_env = game_params.get('num_game_env', 0)
+                if num_game_env > len(json_file_paths):
+                    logging.warning(
+                        f"Number of game environments exceeds the number of config files in the dataset, "
+                        f"setting num_game_env to {len(json_file_paths)}."
+                    )
+                    num_game_env = len(json_file_paths)
+
+                for config_file_path in json_file_paths[:num_game_env]:
+                    json_base_name = os.path.splitext(os.path.basename(config_file_path))[0]
+                    episode_name = f"episode_{agent_name}_{game_name}_{env_name}_{json_base_name}"
+                    episodes.append({
+                        "name": episode_name,
+                        "path": os.path.join(experiment_dir, 'Episodes', episode_name),
+                        "config_file_path": config_file_path,
+                        "env": (env_name, env_params),
+                        "agent": (agent_name, agent_params),
+                        "game": (game_name, game_params)
+                    })
+    return episodes
+
+
+async def run_episode(session, episode):
+    """
+    Play one episode on a session.
+
+    Args:
+        session (tuple): (websocket, network_id, partner_id) of a free session.
+        episode (dict): The episode, see collect_episodes.
+    """
+    websocket, network_id, partner_id = session
+    env_name, env_params = episode["env"]
+    agent_name, agent_params = episode["agent"]
+    game_name, game_params = episode["game"]
+    episode_name, episode_path = episode["name"], episode["path"]
+    os.makedirs(episode_path, exist_ok=True)
+
+    # Move the JSON and image files to the experiment path using the new utility function
+    log_separator(episode_name, char="-")
+    util.copy_json_to_experiment(episode["config_file_path"], episode_path)
+
+    # Save the envs, agents, and games data into a JSON file in the episode_path
+    metadata = {
+        "env": {env_name: env_params},
+        "agent": {agent_name: agent_params},
+        "game": {game_name: game_params}
+    }
+    metadata_file_path = os.path.join(episode_path, 'metadata.json')
+    with open(metadata_file_path, 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent=4)
+
+    # Set up logging for the episode
+    episode_logger = setup_episode_logging(episode_path, episode_name)
+
+    config = init_env(env_params, episode_path, episode_logger)
+    agent = init_agent(agent_params, episode_path, config, episode_logger)
+    game = init_game(game_params, episode_path, episode_logger)
+
+    try:
+        episode_logger.info(f"Running episode: {episode_name}")
+        # Set up environment
+        setup_config_file = util.load_single_json_from_directory(episode_path)
+        message_data = {
+            "command": "Setup",
+            "from": network_id,
+            "to": partner_id,
+            "messages": [json.dumps(setup_config_file)],
+            "payload": base64.b64encode(b"nothing here").decode("utf-8"),
+        }
+        await websocket.send(json.dumps(message_data))
+
+        # Run the client
+        logging.info(f"Start Game with agent: {agent_name}, game: {game_name}, env: {env_name}, "
+                     f"config: {config.get('config_instance_id', [])}")
+        await action_perception_loop(websocket, network_id, partner_id, agent, game, episode_logger)
+        episode_logger.info(f"Completed episode: {episode_name}")
+
+    except Exception as e:
+        # Handle any errors that occur within the action-perception loop
+        logging.error(f"An error occurred during the action-perception loop: {e}")
+        episode_logger.error(f"Error during episode {episode_name}: {e}")
+        raise  # Re-raise the exception to propagate it after logging
+
+
+async def run_episodes(episodes, sessions, experiment_id, state, pbar=None, concurrency_limits=None):
+    """
+    Run the episodes that are not completed yet, each on the next free session.
+
+    Args:
+        episodes (list): The episodes, see collect_episodes.
+        sessions (list): The session pool, see open_sessions.
+        experiment_id (str): The ID of the experiment, for the checkpoint.
+        state (dict): The checkpoint state, completed episodes are appended to state["completed"].
+        pbar (tqdm, optional): Progress bar, updated once per completed episode.
+        concurrency_limits (dict, optional): Agent type -> maximum number of concurrent episodes of that agent type,
+            agent types without a limit can use every session.
+    """
+    free_sessions = asyncio.Queue()
+    for session in sessions:
+        free_sessions.put_nowait(session)
+    concurrency_limits = concurrency_limits or {}
+    agent_semaphores = {}
+
+    async def dispatch(episode):
+        agent_type = episode["agent"][1].get('agent_type')
+        if agent_type not in agent_semaphores:
+            agent_semaphores[agent_type] = asyncio.Semaphore(concurrency_limits.get(agent_type, len(sessions)))
+
+        async with agent_semaphores[agent_type]:
+            session = await free_sessions.get()
+            try:
+                await run_episode(session, episode)
+            finally:
+                free_sessions.put_nowait(session)
+
+        state["completed"].append(episode["name"])
+        save_checkpoint(experiment_id, state)
+        logging.info(f"Episode {episode['name']} completed successfully.")
+        if pbar is not None:
+            pbar.update(1)
+
+    tasks = []
+    for episode in episodes:
+        if episode["name"] in state["completed"]:
+            logging.info(f"Skipping completed episode: {episode['name']}")
+            continue  # Skip if already completed
+        tasks.append(asyncio.create_task(dispatch(episode)))
+
+    try:
+        await asyncio.gather(*tasks)
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -73,20 +73,14 @@ class GameSystem:
 
         # add 2D modality
         if self.representation_type=='vision' or self.representation_type == 'text':
-            encoded_data = response.get("payload")
-            img_observation = base64.b64decode(encoded_data)
-            image = Image.frombytes('RGBA', (1200, 900), img_observation, 'raw')
-            image = image.transpose(Image.FLIP_TOP_BOTTOM)
+            image = self.decode_screenshot(response)
 
             filename = os.path.join(self.obs_dir, f"obs_{i}_3D")
 
         elif self.representation_type=='schematic':
             image = render_schematic(sim_message.get("board_data", []))
 
-            encoded_data = response.get("payload")
-            img_observation = base64.b64decode(encoded_data)
-            image2 = Image.frombytes('RGBA', (1200, 900), img_observation, 'raw')
-            image2 = image2.transpose(Image.FLIP_TOP_BOTTOM)
+            image2 = self.decode_screenshot(response)
 
             filename = os.path.join(self.obs_dir, f"obs_{i}_2D")
             filename2 = os.path.join(self.obs_dir, f"obs_{i}_3D")
@@ -125,6 +119,21 @@ class GameSystem:
         return current_board_state if self.representation_type=='text' else image
 
 
+    def decode_screenshot(self, response):
+        """
+        Decode the screenshot of a simulation response.
+        Args:
+            response (dict): The response, the payload holds the raw pixels (sent as binary frame) or their base64
+                encoding.
+        Returns:
+            PIL.Image.Image: The 1200x900 RGBA screenshot.
+        """
+        payload = response.get("payload")
+        img_observation = payload if isinstance(payload, bytes) else base64.b64decode(payload)
+        image = Image.frombytes('RGBA', (1200, 900), img_observation, 'raw')
+        return image.transpose(Image.FLIP_TOP_BOTTOM)
+
+
     def check_done(self, response):
         """
         Check if the game system is done.
@@ -0,0 +1,387 @@
+"""
+- headless pure-Python simulator of the Sliding Geom Puzzle, a drop-in for the Unity WebGL build when no display or
+  browser is available, e.g. for text-only and AIAgent baseline sweeps on a server
+- it registers with the relay (web_server) like the WebGL build, answers the Handshake of its partner and implements
+  the Setup, GameInteraction and Reset commands, every Setup and GameInteraction is answered with an ActionAck
+- the game logic follows the Unity scripts (TurnManager, TargetBehaviour, LevelManager): commands are decoded the same
+  way, moves are validated against the board bounds and the occupied cells, the validity messages, board_data,
+  board_state and game_done of the ActionAck have the same format
+- no 3D scene is rendered, the screenshot payload is a blank (transparent) or a schematic 1200x900 RGBA frame, so the
+  'vision' representation of the games needs the Unity build
+- if the partner offers binary frames in its Handshake (see web_server), screenshots are sent as a JSON header frame
+  followed by a binary frame with the raw pixels, otherwise base64 encoded in the payload like the Unity build does
+"""
+
+# Import statements
+import re
+import json
+import base64
+import asyncio
+import logging
+import threading
+import functools
+import websockets
+
+from web_server import BINARY_FRAMES
+
+SERVER_ID = "0000-0000-0000-0000"
+SCREENSHOT_SIZE = (1200, 900)
+SCREENSHOT_MODES = ['blank', 'schematic']
+
+KNOWN_COMMANDS = ["move", "start", "reset", "done"]
+KNOWN_OBJECTS = ["cube", "tile", "sphere", "cylinder", "pyramid", "cone", "prism"]
+KNOWN_DIRECTIONS = ["left", "right", "up", "down"]
+WORD_TO_NUMBER = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                  "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+DIRECTION_OFFSETS = {"up": (0, 1), "down": (0, -1), "right": (1, 0), "left": (-1, 0)}
+
+
+def decode_command(command):
+    """
+    Decode an agent command the way the Unity TurnManager does.
+
+    Args:
+        command (str): A single command, e.g. "move red cube left" or "move tile 3 up".
+
+    Returns:
+        tuple: (command, body, attribute, direction, repetition), empty strings for the parts that were not found, the
+        attribute is the color of a geom or the number of a tile.
+    """
+    command = command.lower()
+    cmd = next((known for known in KNOWN_COMMANDS if known in command), "")
+    body = next((known for known in KNOWN_OBJECTS if known in command), "")
+    direction = next((known for known in KNOWN_DIRECTIONS if known in command), "")
+
+    attribute = ""
+    if body:
+        tokens = command.split(" ")
+        for index, token in enumerate(tokens):
+            if token == body:
+                if body == "tile":
+                    attribute = tokens[index + 1] if index + 1 < len(tokens) else ""
+                else:
+                    attribute = tokens[index - 1] if index > 0 else ""
+
+    repetition = 1
+    if body != "tile":
+        match = re.search(r"(\d+)", command)
+        if match:
+            repetition = int(match.group(1))
+        else:
+            repetition = next((number for word, number in WORD_TO_NUMBER.items() if word in command), 1)
+    return cmd, body, attribute, direction, repetition
+
+
+def grid_to_chess(x, z):
+    """Convert grid coordinates to a chess coordinate, e.g. (0, 0) to 'A1'."""
+    return f"{chr(ord('A') + x)}{z + 1}" if 0 <= x < 26 else f"Invalid{z + 1}"
+
+
+def get_object_name(landmark):
+    """Return the name agents use for a landmark, 'tile <geom_nr>' for tiles and '<color> <body>' for geoms."""
+    body = landmark['body'].lower()
+    if body == "tile":
+        return f"tile {str(landmark['geom_nr']).lower()}"
+    return f"{landmark['color'].lower()} {body}"
+
+
+class SGPGame:
+
+    def __init__(self, config):
+        """
+        Load a level from a config, the geoms are shown at their goal coordinates until the "start" command.
+
+        Args:
+            config (dict): The config of the episode, as sent with the Setup command.
+        """
+        self.grid_size = config['grid_size']
+        self.auto_done_check = config.get('auto_done_check', False)
+        self.landmarks = config['landmarks']
+        self.objects = {get_object_name(landmark): index for index, landmark in enumerate(self.landmarks)}
+        self.positions = [tuple(int(c) for c in landmark['goal_coordinate']) for landmark in self.landmarks]
+        self.goals = list(self.positions)
+        self.is_initialized = False
+        self.is_solved = False
+        self.received_done = False
+        self.command_count = 0
+        self.action_count = 0
+        self.actions = []
+
+    def _set_validity(self, validity):
+        self.actions[-1]['valididy'].append(validity)
+
+    def _evaluate_goal(self):
+        self.is_solved = all(position == goal for position, goal in zip(self.positions, self.goals))
+
+    def _start(self):
+        self.positions = [tuple(int(c) for c in landmark['start_coordinate']) for landmark in self.landmarks]
+        self.is_initialized = True
+        for _ in self.landmarks:
+            self._set_validity("set objects position to initial positions")
+
+    def _move(self, index, direction):
+        """Move a geom one cell, if the destination is on the board and free."""
+        if not self.is_initialized:
+            # Every geom of the scene refuses the move, as in Unity
+            for _ in self.landmarks:
+                self._set_validity("you can not move before start action")
+            return
+        if index is None or direction not in DIRECTION_OFFSETS:
+            return
+
+        dx, dz = DIRECTION_OFFSETS[direction]
+        x, z = self.positions[index]
+        destination = (x + dx, z + dz)
+        if destination in self.positions:
+            self._set_validity("Destination occupied")
+        elif not (0 <= destination[0] < self.grid_size and 0 <= destination[1] < self.grid_size):
+            self._set_validity("Destination out of bounds")
+        else:
+            self.positions[index] = destination
+            self._set_validity("was legal move")
+        if self.auto_done_check:
+            self._evaluate_goal()
+
+    def interact(self, commands):
+        """
+        Apply the commands of one GameInteraction.
+
+        Args:
+            commands (list): The commands of the agent, e.g. ["move red cube left", "done"].
+
+        Returns:
+            bool: True if the level ends, i.e. on "reset" or if the puzzle is solved and checked.
+        """
+        self.command_count += 1
+        reset_level = False
+        for command in commands:
+            self.action_count += 1
+            self.actions.append({"command_count": self.command_count, "action_count": self.action_count,
+                                 "prompt": command, "valididy": []})
+            cmd, body, attribute, direction, repetition = decode_command(command)
+            if cmd == "move":
+                name = f"{body} {attribute}" if body == "tile" else f"{attribute} {body}"
+                index = self.objects.get(name)
+                if index is None:
+                    self._set_validity(f"{name} is not a valid object")
+                for _ in range(repetition):
+                    self._move(index, direction)
+            elif cmd == "start":
+                self._start()
+                self._set_validity("valid command. start of experiment")
+            elif cmd == "done":
+                self.received_done = True
+                self._set_validity("valid command. evaluating the board")
+                self._evaluate_goal()
+            elif cmd == "reset":
+                reset_level = True
+            else:
+                self._set_validity("not a legal command")
+
+        if self.received_done or self.auto_done_check:
+            self.received_done = False
+            reset_level = reset_level or self.is_solved
+        return reset_level
+
+    def get_board_data(self):
+        """Return the geoms with their current and goal coordinates, in the format of the Unity ObjectData."""
+        return [{
+            "body": landmark['body'].lower(),
+            "color": landmark['color'],
+            "current_coordinate": [float(c) for c in position],
+            "goal_coordinate": [float(c) for c in goal]
+        } for landmark, position, goal in zip(self.landmarks, self.positions, self.goals)]
+
+    def get_event_log(self):
+        """Return the log of the last GameInteraction, as sent in the messages of an ActionAck, and clear it."""
+        event_log = {
+            "Actions": self.actions,
+            "board_state": [f"{grid_to_chess(*position)} {landmark['color']} {landmark['body'].lower()}"
+                            for landmark, position in zip(self.landmarks, self.positions)],
+            "board_data": self.get_board_data(),
+            "game_done": self.is_solved
+        }
+        self.actions = []
+        return json.dumps(event_log)
+
+
+@functools.lru_cache(maxsize=None)
+def get_blank_screenshot():
+    """Return a transparent raw 1200x900 RGBA frame (computed once)."""
+    return bytes(SCREENSHOT_SIZE[0] * SCREENSHOT_SIZE[1] * 4)
+
+
+@functools.lru_cache(maxsize=None)
+def get_blank_screenshot_base64():
+    """Return the blank frame base64 encoded (computed once)."""
+    return base64.b64encode(get_blank_screenshot()).decode('utf-8')
+
+
+def get_schematic_screenshot(game):
+    """Render the board schematically to a raw 1200x900 RGBA frame, bottom row first like the Unity textures."""
+    from PIL import Image
+    from render_2D import render_schematic
+
+    image = render_schematic(game.get_board_data(), game.grid_size).convert('RGBA')
+    if image.size != SCREENSHOT_SIZE:
+        image = image.resize(SCREENSHOT_SIZE)
+    image = image.transpose(Image.FLIP_TOP_BOTTOM)
+    return image.tobytes()
+
+
+class HeadlessSimulator:
+
+    def __init__(self, uri="ws://localhost:1984", screenshot_mode='blank'):
+        """
+        Create a simulator client of the relay.
+
+        Args:
+            uri (str): The WebSocket URI of the relay.
+            screenshot_mode (str): 'blank' for transparent frames (fastest) or 'schematic' for 2D renderings.
+        """
+        if screenshot_mode not in SCREENSHOT_MODES:
+            raise ValueError(f"Unknown screenshot_mode '{screenshot_mode}'. Must be one of {SCREENSHOT_MODES}.")
+        self.uri = uri
+        self.screenshot_mode = screenshot_mode
+        self.network_id = None
+        self.partner_id = None
+        self.binary_frames = False
+        self.game = None
+        self.websocket = None
+
+    async def connect(self, timeout=10):
+        """Connect to the relay and wait for its Handshake, retrying while the relay is still starting."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                self.websocket = await websockets.connect(self.uri, max_size=10000000, ping_interval=10,
+                                                          ping_timeout=360)
+                break
+            except OSError:
+                if loop.time() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+        message_data = json.loads(await self.websocket.recv())
+        if message_data.get("command") != "Handshake":
+            raise RuntimeError("Handshake failed: Unexpected response from server.")
+        await self.handle_message(message_data)
+        logging.info(f"Headless simulator registered with network id: {self.network_id}")
+        return self.network_id
+
+    async def send(self, command, messages, payload="", **fields):
+        message_data = {
+            "command": command,
+            "from": self.network_id,
+            "to": self.partner_id,
+            "messages": messages,
+            "payload": payload,
+            **fields
+        }
+        await self.websocket.send(json.dumps(message_data))
+
+    async def send_action_ack(self):
+        messages = [self.game.get_event_log()]
+        if self.screenshot_mode == 'schematic':
+            screenshot = get_schematic_screenshot(self.game)
+        else:
+            screenshot = get_blank_screenshot()
+
+        if self.binary_frames:
+            # Header frame, the raw pixels follow in a binary frame
+            await self.send("ActionAck", messages, binary_payload=True)
+            await self.websocket.send(screenshot)
+        elif self.screenshot_mode == 'blank':
+            await self.send("ActionAck", messages, get_blank_screenshot_base64())
+        else:
+            await self.send("ActionAck", messages, base64.b64encode(screenshot).decode('utf-8'))
+
+    async def handle_message(self, message_data):
+        """Answer a single message of the partner."""
+        command = message_data.get("command")
+        messages = message_data.get("messages") or []
+
+        if command == "Handshake" and message_data.get("from") == SERVER_ID:
+            self.network_id = message_data.get("to")
+        elif command == "Handshake":
+            self.partner_id = message_data.get("from")
+            self.binary_frames = BINARY_FRAMES in message_data.get("capabilities", [])
+            logging.info(f"Headless simulator registered partner id: {self.partner_id}")
+            capabilities = [BINARY_FRAMES] if self.binary_frames else []
+            await self.send("ACK", ["Handshake Acknowledged!"], capabilities=capabilities)
+        elif command == "Setup":
+            self.game = SGPGame(json.loads(messages[0]))
+            await self.send_action_ack()
+        elif command == "GameInteraction":
+            if self.game is None:
+                logging.warning("Headless simulator received GameInteraction without a loaded level, ignored.")
+                return
+            reset_level = self.game.interact(messages)
+            await self.send_action_ack()
+            if reset_level:
+                self.game = None
+        elif command == "Reset":
+            self.game = None
+        elif command == "Error":
+            logging.warning(f"Headless simulator received an error: {messages}")
+        else:
+            logging.debug(f"Headless simulator ignored command {command}")
+
+    async def run(self):
+        """Serve the partner until the connection is closed."""
+        if self.websocket is None:
+            await self.connect()
+        try:
+            async for message in self.websocket:
+                if message != "":
+                    await self.handle_message(json.loads(message))
+        except websockets.ConnectionClosed:
+            logging.info(f"Headless simulator {self.network_id} disconnected")
+
+
+def run_headless_simulator_in_background(uri="ws://localhost:1984", screenshot_mode='blank', timeout=10):
+    """
+    Run a headless simulator in a background thread.
+
+    Args:
+        uri (str): The WebSocket URI of the relay.
+        screenshot_mode (str): 'blank' or 'schematic', see HeadlessSimulator.
+        timeout (float): Seconds to wait for the relay.
+
+    Returns:
+        str: The network id of the simulator, to be registered as partner id by the action-perception client.
+    """
+    simulator = HeadlessSimulator(uri, screenshot_mode)
+    registered = threading.Event()
+    errors = []
+
+    async def serve():
+        try:
+            await simulator.connect(timeout)
+        except Exception as e:
+            errors.append(e)
+            raise
+        finally:
+            registered.set()
+        await simulator.run()
+
+    thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+    thread.start()
+    registered.wait()
+    if errors:
+        raise errors[0]
+    logging.info("Headless simulator started in the background.")
+    return simulator.network_id
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        # Connect to a running relay and print the id to enter as remote client id
+        simulator = HeadlessSimulator()
+        print(f"Headless simulator network id: {await simulator.connect()}")
+        await simulator.run()
+
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+- throughput benchmark of the relay (web_server.handle_client) with local mock clients, no WebGL build or agent needed
+- the relay runs in its own process, pairs of mock clients register with it and every sender streams messages to its
+  receiver through the relay
+- message kinds: 'screenshot' is an ActionAck with a base64 1200x900 RGBA frame inside the JSON (as sent by the WebGL
+  build), 'binary' is the same ActionAck as JSON header plus binary frame (see web_server.BINARY_FRAMES) and
+  'interaction' is a small GameInteraction
+- reports the received messages/s and MB/s
+"""
+
+# Import statements
+import json
+import time
+import base64
+import asyncio
+import multiprocessing
+import websockets
+
+from web_server import handle_client
+
+MESSAGE_KINDS = ['screenshot', 'binary', 'interaction']
+FRAME_SIZE = 1200 * 900 * 4
+
+
+def run_relay(port):
+    """Serve the relay on a port until the process is terminated."""
+    async def serve():
+        async with websockets.serve(handle_client, "localhost", port, max_size=10000000):
+            await asyncio.Future()
+
+    asyncio.run(serve())
+
+
+async def connect_client(uri, timeout=10):
+    """Connect a mock client to the relay, retrying while it is starting, and return (websocket, network_id)."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        try:
+            websocket = await websockets.connect(uri, max_size=10000000)
+            break
+        except OSError:
+            if loop.time() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+    handshake = json.loads(await websocket.recv())
+    return websocket, handshake["to"]
+
+
+def make_frames(kind, from_id, to_id):
+    """Return the WebSocket frames of one message of a kind."""
+    message_data = {
+        "command": "ActionAck",
+        "from": from_id,
+        "to": to_id,
+        "messages": [json.dumps({"Actions": [], "board_state": ["A1 red cube"], "board_data": [], "game_done": False})],
+        "payload": ""
+    }
+    if kind == 'screenshot':
+        message_data["payload"] = base64.b64encode(bytes(FRAME_SIZE)).decode('utf-8')
+        return [json.dumps(message_data)]
+    if kind == 'binary':
+        message_data["binary_payload"] = True
+        return [json.dumps(message_data), bytes(FRAME_SIZE)]
+    if kind == 'interaction':
+        message_data.update(command="GameInteraction", messages=["move red cube left"])
+        return [json.dumps(message_data)]
+    raise ValueError(f"Unknown message kind '{kind}'. Must be one of {MESSAGE_KINDS}.")
+
+
+async def benchmark_relay(kind, num_messages=50, num_pairs=1, port=1985):
+    """
+    Measure the throughput of the relay for one message kind.
+
+    Args:
+        kind (str): One of MESSAGE_KINDS.
+        num_messages (int): Messages sent by every sender.
+        num_pairs (int): Number of sender/receiver pairs streaming at the same time.
+        port (int): Port of the relay, not the default 1984 so that it can run next to an experiment.
+
+    Returns:
+        dict: Received messages, MB, seconds, messages/s and MB/s.
+    """
+    relay = multiprocessing.Process(target=run_relay, args=(port,), daemon=True)
+    relay.start()
+    try:
+        uri = f"ws://localhost:{port}"
+        pairs = []
+        for _ in range(num_pairs):
+            pairs.append((await connect_client(uri), await connect_client(uri)))
+
+        async def send(websocket, frames):
+            for _ in range(num_messages):
+                for frame in frames:
+                    await websocket.send(frame)
+
+        async def receive(websocket, frames_per_message):
+            num_bytes = 0
+            for _ in range(num_messages * frames_per_message):
+                num_bytes += len(await websocket.recv())
+            return num_bytes
+
+        start_time = time.perf_counter()
+        tasks = []
+        for (sender, sender_id), (receiver, receiver_id) in pairs:
+            frames = make_frames(kind, sender_id, receiver_id)
+            tasks.append(send(sender, frames))
+            tasks.append(receive(receiver, len(frames)))
+        results = await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - start_time
+
+        for (sender, _), (receiver, _) in pairs:
+            await sender.close()
+            await receiver.close()
+    finally:
+        relay.terminate()
+        relay.join()
+
+    num_received = num_messages * num_pairs
+    megabytes = sum(results[1::2]) / 1e6
+    return {
+        "kind": kind,
+        "messages": num_received,
+        "MB": megabytes,
+        "seconds": seconds,
+        "messages_per_second": num_received / seconds,
+        "MB_per_second": megabytes / seconds
+    }
+
+
+if __name__ == "__main__":
+    for kind, num_messages in (('screenshot', 50), ('binary', 50), ('interaction', 5000)):
+        result = asyncio.run(benchmark_relay(kind, num_messages=num_messages, num_pairs=2))
+        print(f"{kind:>12}: {result['messages']} messages, {result['MB']:.1f} MB in {result['seconds']:.2f} s, "
+              f"{result['messages_per_second']:.1f} messages/s, {result['MB_per_second']:.1f} MB/s")
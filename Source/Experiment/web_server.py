@@ -11,8 +11,15 @@ import time  # Example to show main script continuing work
 import threading
 import logging
 
+from Source.Utility.routing_header import parse_routing_header
+
 connected_clients = {}
 
+# Capability offered in the Handshake of a client: screenshots are sent as a JSON header with "binary_payload": true,
+# followed by a binary frame with the raw pixels, which the relay forwards to the receiver of the header
+BINARY_FRAMES = "binary_frames"
+
+
 async def handle_client(websocket, path):
 
     client_id = str(uuid.uuid4())
@@ -34,6 +41,7 @@ async def handle_client(websocket, path):
     }
     #websocket.send(f"Handshake")
     await websocket.send(json.dumps(handshake_data))
+    binary_target = None  # Receiver of the binary frame announced by the last header
     try:
         # Continuously listen for messages from the client
         #async for message in websocket:
@@ -41,21 +49,32 @@ async def handle_client(websocket, path):
 
             message = await websocket.recv()
 
+            # Forward the raw pixels of the last header without decoding them
+            if isinstance(message, bytes) and binary_target is not None:
+                if binary_target in connected_clients:
+                    await connected_clients[binary_target].send(message)
+                binary_target = None
+                continue
+
             #print(message)
-            # Parse the incoming message as JSON
+            # Read only the routing header, the message is forwarded as received
+            if isinstance(message, bytes):
+                message = message.decode('utf-8')
             if message != "":
-                message_data = json.loads(message)
+                message_data = parse_routing_header(message)
                 #if message_data.get("command") == "ClientClose":
                 #    raise websocket.ConnectionClosed
                 to_client_id = message_data.get("to")
                 from_client_id = message_data.get("from")
                 command =  message_data.get("command")
-                msg = message_data.get("messages")[0]
-                logging.debug(f"Packet from {from_client_id} to {to_client_id}: command {command} with message {msg}")
+                logging.debug(f"Packet from {from_client_id} to {to_client_id}: command {command} ({len(message)} characters)")
+
+                if message_data.get("binary_payload"):
+                    binary_target = to_client_id
 
                 if to_client_id in connected_clients:
                     # Route the message to the intended recipient
-                    await connected_clients[to_client_id].send(json.dumps(message_data))
+                    await connected_clients[to_client_id].send(message)
                 else:
                     # Notify the sender that the target client is not connected
                     error_message = {
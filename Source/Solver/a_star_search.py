@@ -0,0 +1,76 @@
+"""
+- A* search on packed integer states, used by the plain and the bounded A* backend of the shortest path solver
+- with max_depth the search stops early once no path within the depth limit can exist, which is checked on the
+  f-score of the heap top, so every pop costs O(log n) instead of a scan over the whole open set
+- outdated heap entries are skipped lazily and expanded states are kept in a closed set
+- the heuristic of a state is f - g of its heap entry, neighbors are scored from it incrementally, see
+  heuristics.get_scored_neighbors
+"""
+
+# Import statements
+import heapq
+
+from Source.Solver.heuristics import get_heuristic, get_scored_neighbors, DEFAULT_HEURISTIC
+
+
+def a_star_packed(codec, initial_state, goal_state, max_depth=None, heuristic=DEFAULT_HEURISTIC):
+    """
+    Solve the sliding geom puzzle with the A* algorithm and an optional early stopping condition.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        initial_state (int): Packed starting state.
+        goal_state (int): Packed goal state.
+        max_depth (int, optional): The maximum depth to search. If None, search is unlimited.
+        heuristic (str, optional): Consistent heuristic, one of HEURISTICS.
+
+    Returns:
+        list: List of packed states from initial to goal, or None if no solution is found within the max depth
+    """
+    estimate = get_heuristic(codec, goal_state, heuristic)
+    scored_neighbors = get_scored_neighbors(codec, goal_state, heuristic)
+
+    # Priority queue for A* search ordered by f_score, ties go to the deeper state
+    # Outdated entries of a state are skipped when popped instead of being removed
+    open_set = [(estimate(initial_state), 0, initial_state)]
+    came_from = {}  # Map to reconstruct the path
+    g_score = {initial_state: 0}
+    closed_set = set()
+
+    while open_set:
+        # Get the state with the lowest f_score
+        current_f_score, negative_g_score, current = heapq.heappop(open_set)
+        if current in closed_set:
+            continue
+
+        # Early stop criteria: The heap top has the lowest f_score in the open set, all other paths are even longer
+        if max_depth is not None and current_f_score > max_depth:
+            return None  # No solution possible within the given max depth
+
+        # If the current state is the goal state, reconstruct the path
+        if current == goal_state:
+            path = [current]
+            while current in came_from:
+                current = came_from[current]
+                path.append(current)
+            return path[::-1]
+
+        # The heuristics are consistent, so the first expansion of a state is along a shortest path
+        closed_set.add(current)
+
+        # Explore neighbors
+        tentative_g_score = 1 - negative_g_score
+        for neighbor, neighbor_estimate in scored_neighbors(current, current_f_score + negative_g_score):
+            if neighbor in closed_set:
+                continue
+
+            if tentative_g_score < g_score.get(neighbor, float('inf')):  # Found a better path
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                f_score = tentative_g_score + neighbor_estimate
+
+                # Push to the priority queue if it’s within the max depth (only if max_depth is specified)
+                if max_depth is None or f_score <= max_depth:
+                    heapq.heappush(open_set, (f_score, -tentative_g_score, neighbor))
+
+    return None  # No solution found within the max depth
@@ -0,0 +1,220 @@
+"""
+- batch API of the shortest path solver, solve_many solves thousands of puzzles of one board size at once
+- puzzles are packed in the calling process and dispatched in chunks to a pool of worker processes, results are
+  streamed back in the order of the puzzles
+- every puzzle gets its own time limit, a search that runs out of time is interrupted with SIGALRM and yields None,
+  on platforms without SIGALRM (Windows) the time limit is not enforced
+- workers install the SIGALRM handler once, in the calling process it is only installed around each search and the
+  previous handler is restored, off the main thread no handler can be installed and the time limit is not enforced
+- with a SolverCache, cached puzzles are answered in the calling process and only the misses are sent to the workers
+- map_many runs other tasks on the same pool, e.g. whole evaluation episodes that each need one oracle per goal, every
+  worker opens its own connection to the solver cache
+"""
+
+# Import statements
+import os
+import time
+import signal
+import random
+import threading
+import multiprocessing
+
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.shortest_path_solver import SOLVER_BACKENDS, solve_packed
+from Source.Solver.heuristics import DEFAULT_HEURISTIC
+from Source.Solver.solver_cache import SolverCache
+
+CHUNK_SIZE = 16  # Puzzles sent to a worker at once
+
+_worker_settings = {}  # Solver settings of a worker process, set by _init_worker
+_worker_codecs = {}  # Number of geoms -> PackedStateCodec of a worker process
+
+
+class SolverTimeout(Exception):
+    """Raised inside a worker when a search exceeds its time limit."""
+
+
+def _raise_timeout(signum, frame):
+    raise SolverTimeout()
+
+
+def _init_worker(board_size, max_depth, backend, heuristic, timeout, in_process=False, cache_file_path=None):
+    """
+    Store the solver settings shared by all puzzles of a solve_many call in the worker (or calling) process. With a
+    cache_file_path, the worker opens the solver cache for map_many, SQLite connections must not cross a fork.
+    """
+    _worker_settings.update(board_size=board_size, max_depth=max_depth, backend=backend, heuristic=heuristic,
+                            timeout=timeout, in_process=in_process,
+                            solver_cache=None if cache_file_path is None else SolverCache(cache_file_path))
+    _worker_codecs.clear()
+    if timeout is not None and hasattr(signal, 'SIGALRM') and not in_process:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _solve_task(task):
+    """
+    Solve one packed puzzle with the settings of the worker.
+
+    Args:
+        task (tuple): (number of geoms, packed initial state, packed goal state).
+
+    Returns:
+        tuple: (timed out, path), path is the list of packed states from initial to goal, or None if no solution is
+        found within the max depth or the time limit.
+    """
+    num_geoms, initial_state, goal_state = task
+    if num_geoms not in _worker_codecs:
+        _worker_codecs[num_geoms] = PackedStateCodec(_worker_settings['board_size'], num_geoms)
+    codec = _worker_codecs[num_geoms]
+
+    timeout = _worker_settings['timeout']
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    previous_handler = None
+    if use_alarm and _worker_settings['in_process']:
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        else:
+            use_alarm = False  # Signal handlers can only be installed on the main thread
+    if use_alarm:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return False, solve_packed(codec, initial_state, goal_state, _worker_settings['max_depth'],
+                                   _worker_settings['backend'], _worker_settings['heuristic'])
+    except SolverTimeout:
+        return True, None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if _worker_settings['in_process']:
+                signal.signal(signal.SIGALRM, signal.SIG_DFL if previous_handler is None else previous_handler)
+
+
+def _map_task(function_task):
+    """Run one task of map_many in a worker process and commit what it stored in the solver cache."""
+    function, task = function_task
+    solver_cache = _worker_settings['solver_cache']
+    result = function(task, solver_cache)
+    if solver_cache is not None:
+        solver_cache.commit()
+    return result
+
+
+def map_many(function, tasks, workers=None, cache=None):
+    """
+    Run a function on many tasks with a pool of worker processes, like solve_many but for tasks that are more than one
+    puzzle, e.g. all step states of an episode measured against its goal with one oracle.
+
+    Args:
+        function (callable): Module-level function called as function(task, cache), its results must be picklable.
+        tasks (list): The picklable tasks.
+        workers (int, optional): Number of worker processes, the number of CPU cores if None. With 1 the tasks are
+            run in the calling process.
+        cache (SolverCache, optional): Solver cache passed to the function, every worker opens its own connection to
+            the same database.
+
+    Yields:
+        The result of the function for every task in order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield function(task, cache)
+        return
+
+    cache_file_path = None
+    if cache is not None:
+        cache.commit()  # Make the entries of this process visible to the workers
+        cache_file_path = cache.file_path
+    pool = multiprocessing.Pool(min(workers, len(tasks)), initializer=_init_worker,
+                                initargs=(None, None, None, DEFAULT_HEURISTIC, None, False, cache_file_path))
+    try:
+        yield from pool.imap(_map_task, [(function, task) for task in tasks])
+    finally:
+        pool.terminate()
+
+
+def solve_many(board_size, pairs, workers=None, max_depth=None, backend=None, heuristic=DEFAULT_HEURISTIC,
+               timeout=None, chunk_size=CHUNK_SIZE, cache=None):
+    """
+    Solve many puzzles of one board size with a pool of worker processes.
+
+    Args:
+        board_size (int): Board size (n x n).
+        pairs (list): List of (initial state, goal state) pairs, each a list of [x, y] pairs or an (n, 2) array.
+        workers (int, optional): Number of worker processes, the number of CPU cores if None. With 1 the puzzles are
+            solved in the calling process.
+        max_depth (int, optional): The maximum length of the returned paths. If None, search is unlimited.
+        backend (str, optional): One of SOLVER_BACKENDS, see get_default_backend if None. The distance tables are
+            not shared with the workers, 'table' and 'auto' fall back to the default search backend.
+        heuristic (str, optional): Admissible heuristic of the search, one of HEURISTICS.
+        timeout (float, optional): Time limit per puzzle in seconds. If None, searches are not limited. Not enforced
+            when the puzzles are solved in the calling process off the main thread.
+        chunk_size (int, optional): Number of puzzles sent to a worker at once.
+        cache (SolverCache, optional): Cache that is asked before and updated after the searches.
+
+    Yields:
+        list: For every pair in order, the list of states from initial to goal in JSON-compatible format, or None if
+        no solution is found within the max depth or the time limit.
+    """
+    if backend not in SOLVER_BACKENDS and backend is not None:
+        raise ValueError(f"Unsupported solver backend: {backend}. Must be one of {SOLVER_BACKENDS}.")
+    if backend in ('table', 'auto'):
+        backend = None
+
+    workers = workers or os.cpu_count() or 1
+    codecs = {}
+    puzzles = []  # (number of geoms, cache hit, cached path) of every pair
+    tasks = []  # Packed puzzles that are not answered by the cache
+    for initial_state, goal_state in pairs:
+        num_geoms = len(initial_state)
+        if num_geoms not in codecs:
+            codecs[num_geoms] = PackedStateCodec(board_size, num_geoms)
+        codec = codecs[num_geoms]
+        task = (num_geoms, codec.pack(initial_state), codec.pack(goal_state))
+
+        hit, path = (False, None) if cache is None else cache.get_path(codec, task[1], task[2], max_depth)
+        puzzles.append((num_geoms, hit, path))
+        if not hit:
+            tasks.append(task)
+
+    settings = (board_size, max_depth, backend, heuristic, timeout)
+    pool = None
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(*settings, in_process=True)
+        results = map(_solve_task, tasks)
+    else:
+        pool = multiprocessing.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=settings)
+        results = pool.imap(_solve_task, tasks, chunksize=chunk_size)
+
+    try:
+        unsolved_tasks = iter(tasks)
+        for num_geoms, hit, path in puzzles:
+            if not hit:
+                _, initial_state, goal_state = next(unsolved_tasks)
+                timed_out, path = next(results)
+                if cache is not None and not timed_out:
+                    cache.put_path(codecs[num_geoms], initial_state, goal_state, path, max_depth)
+            yield None if path is None else [codecs[num_geoms].unpack(state) for state in path]
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+if __name__ == "__main__":
+    # Throughput of one process against a pool with one worker per core on random 5x5 puzzles
+    rng = random.Random(0)
+    codec = PackedStateCodec(5, 10)
+    pairs = []
+    for _ in range(200):
+        goal_state = codec.pack(divmod(cell, 5) for cell in rng.sample(range(25), 10))
+        initial_state = goal_state
+        for _ in range(rng.randint(5, 20)):
+            initial_state = rng.choice(codec.neighbors(initial_state))
+        pairs.append((codec.unpack(initial_state), codec.unpack(goal_state)))
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start_time = time.perf_counter()
+        paths = list(solve_many(5, pairs, workers=workers, timeout=10))
+        seconds = time.perf_counter() - start_time
+        print(f"{workers} workers: {len(pairs) / seconds:.1f} puzzles/s, "
+              f"{sum(path is None for path in paths)} timeouts")
@@ -0,0 +1,143 @@
+"""
+- micro-benchmark of the bounded A* search on the workload of the config generation
+- find_config_by_random_expand solves the current state and all of its neighbors with max_depth set to the target
+  path length at every step, the benchmark records these queries for random 4x4 and 5x5 goal states and replays them
+- the legacy search scans the whole open set for the lowest f-score on every pop, it is only kept here to measure the
+  speedup of the heap-ordered early termination in a_star_search
+"""
+
+# Import statements
+import time
+import heapq
+import random
+
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.a_star_search import a_star_packed
+
+
+def legacy_bounded_a_star_packed(codec, initial_state, goal_state, max_depth):
+    """Bounded A* with the O(n) open set scan of the early stopping check, as used before the heap-top check."""
+    distances = codec.manhattan_table(goal_state)
+
+    open_set = []
+    heapq.heappush(open_set, (0, initial_state))
+    came_from = {}
+    g_score = {initial_state: 0}
+    f_score = {initial_state: codec.manhattan(initial_state, distances)}
+
+    while open_set:
+        current_f_score, current = heapq.heappop(open_set)
+
+        if current == goal_state:
+            path = [current]
+            while current in came_from:
+                current = came_from[current]
+                path.append(current)
+            return path[::-1]
+
+        if g_score[current] > max_depth:
+            continue
+
+        if open_set and min(f_score[t] for _, t in open_set) > max_depth:
+            return None
+
+        for neighbor in codec.neighbors(current):
+            tentative_g_score = g_score[current] + 1
+
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                f_score[neighbor] = tentative_g_score + codec.manhattan(neighbor, distances)
+
+                if f_score[neighbor] <= max_depth:
+                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+
+    return None
+
+
+def record_generation_queries(board_size, num_geoms, path_length, num_puzzles=5, max_steps=100, seed=0):
+    """
+    Record the bounded searches that find_config_by_random_expand runs for random goal states.
+
+    Args:
+        board_size (int): Board size (n x n).
+        num_geoms (int): Number of geoms on the board.
+        path_length (int): The target shortest path length of the generated configs.
+        num_puzzles (int, optional): Number of random goal states.
+        max_steps (int, optional): Maximum number of backward moves per goal state.
+        seed (int, optional): Seed of the goal states and the neighbor order.
+
+    Returns:
+        list: List of (packed state, packed goal state, max_depth) queries.
+    """
+    rng = random.Random(seed)
+    codec = PackedStateCodec(board_size, num_geoms)
+    queries = []
+
+    for _ in range(num_puzzles):
+        goal = codec.pack(divmod(cell, board_size) for cell in rng.sample(range(board_size ** 2), num_geoms))
+        current_state = goal
+        for _ in range(max_steps):
+            queries.append((current_state, goal, path_length))
+            current_path_length = len(a_star_packed(codec, current_state, goal, path_length)) - 1
+            if current_path_length == path_length:
+                break
+
+            neighbors = codec.neighbors(current_state)
+            rng.shuffle(neighbors)
+            next_state = None
+            for neighbor in neighbors:
+                queries.append((neighbor, goal, path_length))
+                neighbor_path = a_star_packed(codec, neighbor, goal, path_length)
+                if neighbor_path is not None and len(neighbor_path) - 1 > current_path_length:
+                    next_state = neighbor
+                    break
+            if next_state is None:
+                break
+            current_state = next_state
+
+    return queries
+
+
+def benchmark_bounded_a_star(workloads=((4, 8, 12), (4, 10, 16), (5, 10, 14)), num_puzzles=5):
+    """
+    Replay the generation queries with the legacy and the current bounded A* and print a summary.
+
+    Args:
+        workloads (tuple, optional): Tuples of (board_size, num_geoms, path_length).
+        num_puzzles (int, optional): Number of random goal states per workload.
+
+    Returns:
+        list: List of dicts with the workload, the number of queries and the seconds of both searches.
+    """
+    results = []
+    print(f"{'board':>6}{'geoms':>7}{'c1':>5}{'queries':>9}{'legacy [s]':>12}{'heap top [s]':>14}{'speedup':>9}")
+    for board_size, num_geoms, path_length in workloads:
+        codec = PackedStateCodec(board_size, num_geoms)
+        queries = record_generation_queries(board_size, num_geoms, path_length, num_puzzles)
+
+        start_time = time.perf_counter()
+        legacy_paths = [legacy_bounded_a_star_packed(codec, *query) for query in queries]
+        legacy_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        paths = [a_star_packed(codec, *query) for query in queries]
+        seconds = time.perf_counter() - start_time
+
+        for legacy_path, path in zip(legacy_paths, paths):
+            assert (legacy_path is None) == (path is None) and (path is None or len(path) == len(legacy_path))
+
+        print(f"{board_size:>6}{num_geoms:>7}{path_length:>5}{len(queries):>9}{legacy_seconds:>12.3f}"
+              f"{seconds:>14.3f}{legacy_seconds / seconds:>8.1f}x")
+        results.append({
+            'workload': (board_size, num_geoms, path_length),
+            'queries': len(queries),
+            'legacy_seconds': legacy_seconds,
+            'seconds': seconds
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_bounded_a_star()
@@ -0,0 +1,122 @@
+"""
+- benchmark of the admissible heuristics of the shortest path search per (c1, c2) complexity bin
+- puzzles are sampled by random walks from random goal states and binned by their shortest path length c1 and their
+  detour c2 = (c1 - manhattan) / 2, the shipped config datasets only cover c2 = 0
+- every heuristic solves every puzzle with plain A*, node expansions are counted by a codec that counts the
+  neighbor generations and the wall time is measured per bin
+"""
+
+# Import statements
+import time
+import random
+
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.a_star_search import a_star_packed
+from Source.Solver.heuristics import get_heuristic, HEURISTICS
+
+
+class CountingCodec(PackedStateCodec):
+    """Packed state codec that counts how many states were expanded."""
+
+    def __init__(self, board_size, num_geoms):
+        super().__init__(board_size, num_geoms)
+        self.expansions = 0
+
+    def neighbors(self, packed):
+        self.expansions += 1
+        return super().neighbors(packed)
+
+    def scored_neighbors(self, packed, manhattan, table):
+        self.expansions += 1
+        return super().scored_neighbors(packed, manhattan, table)
+
+
+def sample_binned_puzzles(board_size, num_geoms, walk_lengths, puzzles_per_bin=5, max_samples=600, seed=0):
+    """
+    Sample puzzles by random walks from random goal states and group them by (c1, c2).
+
+    Args:
+        board_size (int): Board size (n x n).
+        num_geoms (int): Number of geoms on the board.
+        walk_lengths (range): Number of random moves from the goal state to the initial state.
+        puzzles_per_bin (int, optional): Maximum number of puzzles kept per (c1, c2) bin.
+        max_samples (int, optional): Number of random walks.
+        seed (int, optional): Seed of the random walks.
+
+    Returns:
+        dict: (c1, c2) -> list of (packed initial state, packed goal state).
+    """
+    rng = random.Random(seed)
+    codec = PackedStateCodec(board_size, num_geoms)
+    bins = {}
+
+    for _ in range(max_samples):
+        goal_state = codec.pack(divmod(cell, board_size) for cell in rng.sample(range(board_size ** 2), num_geoms))
+        initial_state = goal_state
+        for _ in range(rng.choice(walk_lengths)):
+            initial_state = rng.choice(codec.neighbors(initial_state))
+
+        c1 = len(a_star_packed(codec, initial_state, goal_state, heuristic='linear_conflict')) - 1
+        manhattan = get_heuristic(codec, goal_state, 'manhattan')(initial_state)
+        puzzles = bins.setdefault((c1, (c1 - manhattan) // 2), [])
+        if len(puzzles) < puzzles_per_bin:
+            puzzles.append((initial_state, goal_state))
+
+    return bins
+
+
+def benchmark_heuristics(board_size=5, num_geoms=10, walk_lengths=range(5, 36), puzzles_per_bin=5, max_samples=600,
+                         heuristics=HEURISTICS):
+    """
+    Compare node expansions and wall time of the heuristics for every (c1, c2) bin and print a summary.
+
+    Args:
+        board_size (int, optional): Board size (n x n).
+        num_geoms (int, optional): Number of geoms on the board.
+        walk_lengths (range, optional): Number of random moves from the goal state to the initial state.
+        puzzles_per_bin (int, optional): Maximum number of puzzles per (c1, c2) bin.
+        max_samples (int, optional): Number of random walks.
+        heuristics (list, optional): The heuristics to compare.
+
+    Returns:
+        dict: (c1, c2) -> heuristic -> dict with the total 'expansions' and 'seconds' of the bin.
+    """
+    bins = sample_binned_puzzles(board_size, num_geoms, walk_lengths, puzzles_per_bin, max_samples)
+    results = {}
+
+    for complexity in sorted(bins):
+        results[complexity] = {}
+        for heuristic in heuristics:
+            codec = CountingCodec(board_size, num_geoms)
+            start_time = time.perf_counter()
+            for initial_state, goal_state in bins[complexity]:
+                path = a_star_packed(codec, initial_state, goal_state, heuristic=heuristic)
+                assert len(path) - 1 == complexity[0], f"{heuristic} found a path of length {len(path) - 1}"
+            results[complexity][heuristic] = {
+                'expansions': codec.expansions,
+                'seconds': time.perf_counter() - start_time
+            }
+
+    print(f"Benchmark of heuristics on {board_size}x{board_size} boards with {num_geoms} geoms")
+    header = f"{'c1':>4}{'c2':>4}{'puzzles':>9}"
+    for heuristic in heuristics:
+        header += f"{heuristic + ' exp':>22}{'[ms]':>10}"
+    print(header)
+    totals = {heuristic: [0, 0.0] for heuristic in heuristics}
+    for (c1, c2), bin_results in results.items():
+        row = f"{c1:>4}{c2:>4}{len(bins[(c1, c2)]):>9}"
+        for heuristic in heuristics:
+            row += f"{bin_results[heuristic]['expansions']:>22}{1000 * bin_results[heuristic]['seconds']:>10.1f}"
+            totals[heuristic][0] += bin_results[heuristic]['expansions']
+            totals[heuristic][1] += bin_results[heuristic]['seconds']
+        print(row)
+    row = f"{'total':>17}"
+    for heuristic in heuristics:
+        row += f"{totals[heuristic][0]:>22}{1000 * totals[heuristic][1]:>10.1f}"
+    print(row)
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_heuristics()
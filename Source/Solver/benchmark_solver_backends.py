@@ -0,0 +1,100 @@
+"""
+- benchmark of the shortest path solver backends on a shipped SGP config dataset
+- every backend solves the start/goal pair of every config, the found path lengths are checked against complexity_c1
+- distance tables are loaded (or built) before the timing starts, so the 'table' backend measures the lookup only
+"""
+
+# Import statements
+import os
+import json
+import time
+import fnmatch
+
+from Source.Solver.shortest_path_solver import solve
+from Source.Solver.distance_tables import get_distance_table, AUTO_BUILD_TABLE_STATES
+
+
+def load_config_puzzles(config_id):
+    """
+    Load board size, start state, goal state and shortest path length of every config in a dataset.
+
+    Args:
+        config_id (str): The ID of the config dataset in Data/Configs.
+
+    Returns:
+        list: List of dicts with 'config_instance_id', 'board_size', 'initial_state', 'goal_state' and 'c1'.
+    """
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    config_dir = os.path.join(base_dir, 'Data', 'Configs', config_id)
+
+    puzzles = []
+    for file_name in sorted(os.listdir(config_dir)):
+        if fnmatch.fnmatch(file_name, "config*.json"):
+            with open(os.path.join(config_dir, file_name), 'r') as f:
+                config = json.load(f)
+            puzzles.append({
+                'config_instance_id': config['config_instance_id'],
+                'board_size': config['grid_size'],
+                'initial_state': [landmark['start_coordinate'] for landmark in config['landmarks']],
+                'goal_state': [landmark['goal_coordinate'] for landmark in config['landmarks']],
+                'c1': config['complexity_c1'],
+            })
+    return puzzles
+
+
+def benchmark_solver_backends(config_id, backends=('a_star', 'bounded_a_star', 'ida_star', 'bidirectional', 'bfs',
+                                                        'table'),
+                              max_build_states=AUTO_BUILD_TABLE_STATES):
+    """
+    Time every solver backend on all configs of a dataset and print a summary.
+
+    Args:
+        config_id (str): The ID of the config dataset in Data/Configs.
+        backends (tuple): The backends to compare.
+        max_build_states (int, optional): Largest state space for which missing distance tables are built, configs
+            without a table are skipped by the 'table' backend.
+
+    Returns:
+        dict: Backend -> list of dicts with 'config_instance_id', 'path_length' and 'seconds'.
+    """
+    puzzles = load_config_puzzles(config_id)
+    results = {backend: [] for backend in backends}
+
+    for puzzle in puzzles:
+        board_size, initial_state, goal_state = puzzle['board_size'], puzzle['initial_state'], puzzle['goal_state']
+        has_table = get_distance_table(board_size, goal_state, max_build_states) is not None
+
+        for backend in backends:
+            if backend == 'table' and not has_table:
+                continue
+
+            # The known shortest path length is the depth bound that the config generation uses as well
+            start_time = time.perf_counter()
+            path = solve(board_size, initial_state, goal_state, max_depth=puzzle['c1'], backend=backend)
+            seconds = time.perf_counter() - start_time
+
+            path_length = None if path is None else len(path) - 1
+            if path_length != puzzle['c1']:
+                print(f"Mismatch for {puzzle['config_instance_id']} with {backend}: "
+                      f"found {path_length}, expected {puzzle['c1']}")
+            results[backend].append({
+                'config_instance_id': puzzle['config_instance_id'],
+                'path_length': path_length,
+                'seconds': seconds
+            })
+
+    print(f"Benchmark of solver backends on {config_id} ({len(puzzles)} configs)")
+    print(f"{'backend':<16}{'solved':>8}{'total [s]':>12}{'mean [ms]':>12}{'max [ms]':>12}")
+    for backend, backend_results in results.items():
+        if not backend_results:
+            print(f"{backend:<16}{0:>8}{'-':>12}{'-':>12}{'-':>12}")
+            continue
+        seconds = [result['seconds'] for result in backend_results]
+        print(f"{backend:<16}{len(backend_results):>8}{sum(seconds):>12.3f}"
+              f"{1000 * sum(seconds) / len(seconds):>12.2f}{1000 * max(seconds):>12.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_solver_backends('SGP_ID_20241212_024852')
@@ -0,0 +1,110 @@
+"""
+- bidirectional breadth-first search on packed integer states
+- both endpoints of a config are fully specified and every move can be undone, so the search grows one frontier from
+  the initial state and one from the goal state and stops once they meet in the middle
+- the smaller frontier is always expanded by one full layer, after a layer that found meeting states the shortest of
+  the paths through them is optimal, because every shorter path would have met in an earlier layer
+- each side only has to reach about half the path length, so for deep puzzles the stored states drop from the
+  size of a ball of radius c1 to two balls of radius c1 / 2
+- with max_depth, states whose depth plus Manhattan distance to the opposite endpoint exceeds it are not stored,
+  which keeps the bounded searches of the config generation small
+"""
+
+# Import statements
+from Source.Solver.heuristics import get_heuristic, get_scored_neighbors
+
+
+def reconstruct_path(meeting_state, forward_parents, backward_parents):
+    """
+    Join the paths from the initial state to a meeting state and from the meeting state to the goal state.
+
+    Args:
+        meeting_state (int): Packed state reached by both searches.
+        forward_parents (dict): Packed state -> predecessor on the way from the initial state (None for the root).
+        backward_parents (dict): Packed state -> successor on the way to the goal state (None for the root).
+
+    Returns:
+        list: List of packed states from initial to goal.
+    """
+    path = []
+    state = meeting_state
+    while state is not None:
+        path.append(state)
+        state = forward_parents[state]
+    path.reverse()
+
+    state = backward_parents[meeting_state]
+    while state is not None:
+        path.append(state)
+        state = backward_parents[state]
+    return path
+
+
+def bidirectional_search_packed(codec, initial_state, goal_state, max_depth=None):
+    """
+    Solve the sliding geom puzzle with a bidirectional breadth-first search that meets in the middle.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        initial_state (int): Packed starting state.
+        goal_state (int): Packed goal state.
+        max_depth (int, optional): The maximum depth to search. If None, search is unlimited.
+
+    Returns:
+        list: List of packed states from initial to goal, or None if no solution is found within the max depth
+    """
+    if initial_state == goal_state:
+        return [initial_state]
+
+    # Frontier states carry their Manhattan distance to the opposite endpoint, it is updated by the delta of every move
+    forward_neighbors = get_scored_neighbors(codec, goal_state, 'manhattan')
+    backward_neighbors = get_scored_neighbors(codec, initial_state, 'manhattan')
+    endpoint_distance = get_heuristic(codec, goal_state, 'manhattan')(initial_state)
+
+    forward_parents = {initial_state: None}
+    backward_parents = {goal_state: None}
+    forward_frontier = [(initial_state, endpoint_distance)]
+    backward_frontier = [(goal_state, endpoint_distance)]
+    forward_depth = backward_depth = 0
+
+    while forward_frontier and backward_frontier:
+        if max_depth is not None and forward_depth + backward_depth >= max_depth:
+            return None  # No solution possible within the given max depth
+
+        # Expand the smaller frontier by one full layer
+        forward = len(forward_frontier) <= len(backward_frontier)
+        if forward:
+            frontier, parents, other_parents = forward_frontier, forward_parents, backward_parents
+            scored_neighbors = forward_neighbors
+            forward_depth += 1
+            side_depth = forward_depth
+        else:
+            frontier, parents, other_parents = backward_frontier, backward_parents, forward_parents
+            scored_neighbors = backward_neighbors
+            backward_depth += 1
+            side_depth = backward_depth
+        budget = None if max_depth is None else max_depth - side_depth
+
+        next_frontier = []
+        meeting_states = []
+        for state, state_estimate in frontier:
+            for neighbor, neighbor_estimate in scored_neighbors(state, state_estimate):
+                if neighbor not in parents:
+                    if budget is not None and neighbor_estimate > budget:
+                        continue  # Every path through this state is longer than max_depth
+                    parents[neighbor] = state
+                    next_frontier.append((neighbor, neighbor_estimate))
+                    if neighbor in other_parents:
+                        meeting_states.append(neighbor)
+
+        if meeting_states:
+            # All meeting states are reached with the same number of moves on this side, but not on the other one
+            paths = [reconstruct_path(state, forward_parents, backward_parents) for state in meeting_states]
+            return min(paths, key=len)
+
+        if forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None  # The goal state is not reachable from the initial state
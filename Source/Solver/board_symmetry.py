@@ -0,0 +1,219 @@
+"""
+- canonicalization of puzzles under the symmetries of the square board
+- the shortest path length is invariant under the eight rotations and reflections of the board (the dihedral group
+  D4), applied jointly to the initial and the goal state, and geom identity does not matter to the solver either
+- a puzzle is mapped to a canonical representative by transforming both states with every symmetry, relabelling the
+  geoms by their transformed goal cell and keeping the smallest result, so all up to 8 * k! equivalent puzzles share
+  one solver cache entry, one distance table and one entry in the dedup set of the config generation
+- paths found for the canonical puzzle are mapped back with the inverse symmetry and geom order
+"""
+
+# Import statements
+import random
+
+SYMMETRIES = ['identity', 'rotate_90', 'rotate_180', 'rotate_270', 'flip_rows', 'flip_columns', 'transpose',
+              'anti_transpose']
+
+_cell_maps = {}  # Board size -> (cell maps, inverse cell maps) of all symmetries
+
+
+def transform_coordinate(x, y, board_size, symmetry):
+    """Apply one of the SYMMETRIES to an [x, y] coordinate."""
+    last = board_size - 1
+    return {
+        'identity': (x, y),
+        'rotate_90': (y, last - x),
+        'rotate_180': (last - x, last - y),
+        'rotate_270': (last - y, x),
+        'flip_rows': (last - x, y),
+        'flip_columns': (x, last - y),
+        'transpose': (y, x),
+        'anti_transpose': (last - y, last - x),
+    }[symmetry]
+
+
+def get_cell_maps(board_size):
+    """
+    Return the cell permutation of every symmetry and its inverse.
+
+    Args:
+        board_size (int): Board size (n x n).
+
+    Returns:
+        tuple: (cell maps, inverse cell maps), one list per symmetry in the order of SYMMETRIES, mapping a cell index
+        (x * board_size + y) to the transformed cell index.
+    """
+    if board_size not in _cell_maps:
+        cell_maps = []
+        inverse_cell_maps = []
+        for symmetry in SYMMETRIES:
+            cell_map = []
+            for cell in range(board_size ** 2):
+                x, y = transform_coordinate(*divmod(cell, board_size), board_size, symmetry)
+                cell_map.append(x * board_size + y)
+            inverse_cell_map = [0] * len(cell_map)
+            for cell, transformed_cell in enumerate(cell_map):
+                inverse_cell_map[transformed_cell] = cell
+            cell_maps.append(cell_map)
+            inverse_cell_maps.append(inverse_cell_map)
+        _cell_maps[board_size] = (cell_maps, inverse_cell_maps)
+    return _cell_maps[board_size]
+
+
+def canonicalize_cells(board_size, initial_cells, goal_cells):
+    """
+    Find the canonical representative of a puzzle given as cell indices.
+
+    Args:
+        board_size (int): Board size (n x n).
+        initial_cells (list): Initial cell index of every geom.
+        goal_cells (list): Goal cell index of every geom.
+
+    Returns:
+        tuple: (canonical initial cells, canonical goal cells, symmetry index, geom order), canonical geom j is the
+        original geom order[j] moved by the symmetry, the canonical goal cells are sorted ascending.
+    """
+    cell_maps, _ = get_cell_maps(board_size)
+    best = None
+    for symmetry, cell_map in enumerate(cell_maps):
+        order = sorted(range(len(goal_cells)), key=lambda geom: cell_map[goal_cells[geom]])
+        placements = [(cell_map[goal_cells[geom]], cell_map[initial_cells[geom]]) for geom in order]
+        if best is None or placements < best[0]:
+            best = (placements, symmetry, order)
+
+    placements, symmetry, order = best
+    return [initial_cell for _, initial_cell in placements], [goal_cell for goal_cell, _ in placements], symmetry, order
+
+
+def canonicalize_goal_cells(board_size, goal_cells):
+    """
+    Find the canonical representative of a set of goal cells, used to share distance tables between goals.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_cells (list): Goal cell index of every geom.
+
+    Returns:
+        tuple: (canonical goal cells sorted ascending, symmetry index, geom order), like canonicalize_cells.
+    """
+    cell_maps, _ = get_cell_maps(board_size)
+    best = None
+    for symmetry, cell_map in enumerate(cell_maps):
+        order = sorted(range(len(goal_cells)), key=lambda geom: cell_map[goal_cells[geom]])
+        canonical_goal_cells = tuple(cell_map[goal_cells[geom]] for geom in order)
+        if best is None or canonical_goal_cells < best[0]:
+            best = (canonical_goal_cells, symmetry, order)
+    return best
+
+
+def canonical_puzzle_key(board_size, initial_state, goal_state):
+    """
+    Return a hashable key that is equal for all puzzles that are the same up to board symmetry and geom identity.
+
+    Args:
+        board_size (int): Board size (n x n).
+        initial_state (list): List of starting geom positions (list of [x, y] pairs or an (n, 2) array).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+
+    Returns:
+        tuple: (board size, canonical initial cells, canonical goal cells).
+    """
+    initial_cells = [int(x) * board_size + int(y) for x, y in initial_state]
+    goal_cells = [int(x) * board_size + int(y) for x, y in goal_state]
+    canonical_initial_cells, canonical_goal_cells, _, _ = canonicalize_cells(board_size, initial_cells, goal_cells)
+    return board_size, tuple(canonical_initial_cells), tuple(canonical_goal_cells)
+
+
+class CanonicalPuzzle:
+
+    def __init__(self, codec, initial_state, goal_state):
+        """
+        Canonicalize a puzzle given as packed states.
+
+        Args:
+            codec (PackedStateCodec): Codec matching the board size and number of geoms.
+            initial_state (int): Packed starting state.
+            goal_state (int): Packed goal state.
+        """
+        self.codec = codec
+        cell_maps, inverse_cell_maps = get_cell_maps(codec.board_size)
+        initial_cells, goal_cells, self.symmetry, self.order = canonicalize_cells(
+            codec.board_size, codec.cells(initial_state), codec.cells(goal_state))
+        self.cell_map = cell_maps[self.symmetry]
+        self.inverse_cell_map = inverse_cell_maps[self.symmetry]
+        self.initial_state = self._pack(initial_cells)
+        self.goal_state = self._pack(goal_cells)
+
+    def _pack(self, cells):
+        packed = 0
+        for shift, cell in zip(self.codec.shifts, cells):
+            packed |= cell << shift
+        return packed
+
+    def to_canonical(self, packed):
+        """Map a packed state of the original puzzle into the canonical frame."""
+        cells = self.codec.cells(packed)
+        return self._pack([self.cell_map[cells[geom]] for geom in self.order])
+
+    def from_canonical(self, packed):
+        """Map a packed state of the canonical frame back to the original puzzle."""
+        cells = [0] * len(self.order)
+        for canonical_cell, geom in zip(self.codec.cells(packed), self.order):
+            cells[geom] = self.inverse_cell_map[canonical_cell]
+        return self._pack(cells)
+
+
+def verify_symmetry_invariance(board_size=4, num_geoms=6, num_puzzles=20, walk_length=25, seed=0):
+    """
+    Check that shortest path lengths are identical under every symmetry and geom relabelling, and that all
+    equivalent puzzles share one canonical representative whose paths map back to valid paths.
+
+    Args:
+        board_size (int, optional): Board size (n x n).
+        num_geoms (int, optional): Number of geoms on the board.
+        num_puzzles (int, optional): Number of random puzzles.
+        walk_length (int, optional): Maximum number of random moves from the goal state to the initial state.
+        seed (int, optional): Seed of the random puzzles.
+    """
+    # Imported here, the solver itself depends on this module through the distance tables
+    from Source.Solver.packed_state import PackedStateCodec
+    from Source.Solver.shortest_path_solver import solve_packed
+
+    rng = random.Random(seed)
+    codec = PackedStateCodec(board_size, num_geoms)
+    cell_maps, _ = get_cell_maps(board_size)
+
+    for _ in range(num_puzzles):
+        goal_state = codec.pack(divmod(cell, board_size) for cell in rng.sample(range(board_size ** 2), num_geoms))
+        initial_state = goal_state
+        for _ in range(rng.randint(0, walk_length)):
+            initial_state = rng.choice(codec.neighbors(initial_state))
+        path_length = len(solve_packed(codec, initial_state, goal_state)) - 1
+        canonical = CanonicalPuzzle(codec, initial_state, goal_state)
+
+        for cell_map in cell_maps:
+            relabelling = rng.sample(range(num_geoms), num_geoms)
+            transformed = [codec.pack(divmod(cell_map[codec.cells(state)[geom]], board_size) for geom in relabelling)
+                           for state in (initial_state, goal_state)]
+            transformed_path = solve_packed(codec, *transformed)
+            assert len(transformed_path) - 1 == path_length, "Shortest path length changed under a symmetry"
+
+            transformed_canonical = CanonicalPuzzle(codec, *transformed)
+            assert (transformed_canonical.initial_state, transformed_canonical.goal_state) == \
+                   (canonical.initial_state, canonical.goal_state), "Equivalent puzzles have different representatives"
+
+        # A path of the canonical puzzle maps back to a valid shortest path of the original puzzle
+        path = [canonical.from_canonical(state)
+                for state in solve_packed(codec, canonical.initial_state, canonical.goal_state)]
+        assert path[0] == initial_state and path[-1] == goal_state and len(path) - 1 == path_length
+        assert all(b in codec.neighbors(a) for a, b in zip(path, path[1:])), "Restored path has an invalid move"
+        assert canonical.to_canonical(initial_state) == canonical.initial_state
+
+    print(f"Verified {num_puzzles} puzzles on {board_size}x{board_size} with {num_geoms} geoms under "
+          f"{len(SYMMETRIES)} symmetries")
+
+
+if __name__ == "__main__":
+    verify_symmetry_invariance(board_size=3, num_geoms=5)
+    verify_symmetry_invariance(board_size=4, num_geoms=6)
+    verify_symmetry_invariance(board_size=5, num_geoms=8, num_puzzles=10, walk_length=15)
@@ -0,0 +1,337 @@
+"""
+- dense distance-to-goal tables for small boards (e.g. 3x3 with any number of geoms, 4x4 with up to 6 geoms)
+- every placement of k distinct geoms on the N cells of the board is ranked to a dense integer in [0, N!/(N-k)!)
+- one uint8 table per goal stores the shortest path length of every placement, 255 marks unreachable placements
+- tables are built once with a vectorized breadth-first search from the goal and saved as .npy files in
+  Data/DistanceTables, later they are memory-mapped so that all processes share them through the page cache
+- geom identity does not matter to the solver, so geoms are relabelled by their goal cell and one table serves all
+  goals that occupy the same set of cells
+- the goal cells are also mapped to their canonical representative under the eight board symmetries, so one table
+  serves all rotations and reflections of a goal as well, see board_symmetry
+"""
+
+# Import statements
+import os
+import json
+import math
+import random
+import numpy as np
+
+from Source.Solver.board_symmetry import get_cell_maps, canonicalize_goal_cells
+
+MAX_TABLE_STATES = 6_000_000  # 16P6 = 5,765,760 placements, just under 6 MB per table
+AUTO_BUILD_TABLE_STATES = 600_000  # Largest tables built on demand (16P5 = 524,160), larger ones must be prebuilt
+UNREACHABLE = 255
+CHUNK_SIZE = 1 << 18  # Frontier states expanded at once during the table construction
+
+_loaded_tables = {}  # Table file path -> memory-mapped table, shared by all DistanceTable instances of a process
+
+
+def num_placements(num_cells, num_geoms):
+    """Return the number of placements of num_geoms distinct geoms on num_cells cells."""
+    return math.perm(num_cells, num_geoms)
+
+
+def is_table_eligible(board_size, num_geoms, max_table_states=MAX_TABLE_STATES):
+    """Check if the full state space of a board is small enough for a dense distance table."""
+    return num_placements(board_size ** 2, num_geoms) <= max_table_states
+
+
+def rank_placements(cells, num_cells):
+    """
+    Rank placements of distinct geoms to dense integers.
+
+    The rank is a mixed-radix number whose i-th digit is the index of geom i's cell among the cells that are not
+    taken by geoms 0..i-1, so digit i lies in [0, num_cells - i).
+
+    Args:
+        cells (ndarray): Array of shape (m, k) holding the cell index of every geom.
+        num_cells (int): Number of cells on the board.
+
+    Returns:
+        ndarray: Array of shape (m,) with the int64 rank of every placement.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    num_geoms = cells.shape[1]
+    ranks = np.zeros(cells.shape[0], dtype=np.int64)
+    for i in range(num_geoms):
+        digit = cells[:, i] - (cells[:, :i] < cells[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (num_cells - i) + digit
+    return ranks
+
+
+def unrank_placements(ranks, num_cells, num_geoms):
+    """
+    Invert rank_placements.
+
+    Args:
+        ranks (ndarray): Array of shape (m,) with placement ranks.
+        num_cells (int): Number of cells on the board.
+        num_geoms (int): Number of geoms per placement.
+
+    Returns:
+        ndarray: Array of shape (m, k) holding the cell index of every geom.
+    """
+    ranks = np.asarray(ranks, dtype=np.int64).copy()
+    digits = np.empty((ranks.shape[0], num_geoms), dtype=np.int64)
+    for i in reversed(range(num_geoms)):
+        ranks, digits[:, i] = np.divmod(ranks, num_cells - i)
+
+    cells = np.empty_like(digits)
+    free = np.ones((ranks.shape[0], num_cells), dtype=bool)
+    rows = np.arange(ranks.shape[0])
+    for i in range(num_geoms):
+        # The cell of geom i is the digit-th cell that is still free
+        free_count = np.cumsum(free, axis=1)
+        cells[:, i] = np.argmax(free_count == digits[:, i:i + 1] + 1, axis=1)
+        free[rows, cells[:, i]] = False
+    return cells
+
+
+def expand_placements(cells, board_size):
+    """
+    Generate all successors of a batch of placements by sliding one geom into an adjacent empty cell.
+
+    Args:
+        cells (ndarray): Array of shape (m, k) holding the cell index of every geom.
+        board_size (int): Board size (n x n).
+
+    Returns:
+        ndarray: Array of shape (s, k) with the successor placements.
+    """
+    rows, cols = np.divmod(cells, board_size)
+    successors = []
+    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Possible moves: up, down, left, right
+        new_rows, new_cols = rows + dx, cols + dy
+        new_cells = new_rows * board_size + new_cols
+        inside = (new_rows >= 0) & (new_rows < board_size) & (new_cols >= 0) & (new_cols < board_size)
+        occupied = (new_cells[:, :, None] == cells[:, None, :]).any(axis=2)
+        state_idx, geom_idx = np.nonzero(inside & ~occupied)
+        moved = cells[state_idx]
+        moved[np.arange(len(state_idx)), geom_idx] = new_cells[state_idx, geom_idx]
+        successors.append(moved)
+    return np.concatenate(successors)
+
+
+def build_distance_table(board_size, goal_cells):
+    """
+    Build the dense distance table for a goal with a level-synchronous breadth-first search.
+    Moves are reversible, so the search from the goal yields the distance of every placement to the goal.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_cells (list): Goal cell index of every geom.
+
+    Returns:
+        ndarray: uint8 array indexed by placement rank, UNREACHABLE for placements that cannot reach the goal.
+    """
+    num_cells = board_size ** 2
+    num_geoms = len(goal_cells)
+    table = np.full(num_placements(num_cells, num_geoms), UNREACHABLE, dtype=np.uint8)
+
+    frontier = rank_placements(np.array([goal_cells]), num_cells)
+    table[frontier] = 0
+    depth = 0
+    while frontier.size:
+        depth += 1
+        if depth >= UNREACHABLE:
+            raise ValueError(f"Distances of {depth} and above cannot be stored in a uint8 table.")
+        for start in range(0, frontier.size, CHUNK_SIZE):
+            cells = unrank_placements(frontier[start:start + CHUNK_SIZE], num_cells, num_geoms)
+            ranks = rank_placements(expand_placements(cells, board_size), num_cells)
+            table[ranks[table[ranks] == UNREACHABLE]] = depth
+
+        # Scanning the table is cheaper than deduplicating the successors of the whole layer
+        frontier = np.flatnonzero(table == depth)
+    return table
+
+
+def get_goal_cells(board_size, goal_state):
+    """Return the sorted tuple of canonical goal cells that identifies the table of a goal state."""
+    goal_cells = [int(x) * board_size + int(y) for x, y in goal_state]
+    return canonicalize_goal_cells(board_size, goal_cells)[0]
+
+
+def get_table_file_path(board_size, goal_cells):
+    """Return the .npy file path of the table for a sorted tuple of goal cells."""
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    table_dir = os.path.join(base_dir, 'Data', 'DistanceTables', f"b_{board_size}_g_{len(goal_cells)}")
+    return os.path.join(table_dir, f"goal_{'_'.join(str(cell) for cell in goal_cells)}.npy")
+
+
+def load_distance_table(board_size, goal_cells):
+    """
+    Memory-map the table for a sorted tuple of goal cells, building and saving it first if it does not exist yet.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_cells (tuple): Goal cell index of every geom, sorted ascending.
+
+    Returns:
+        ndarray: The read-only memory-mapped uint8 table.
+    """
+    file_path = get_table_file_path(board_size, goal_cells)
+    if file_path in _loaded_tables:
+        return _loaded_tables[file_path]
+
+    if not os.path.exists(file_path):
+        table = build_distance_table(board_size, list(goal_cells))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Write to a temporary file first, so concurrent processes never map a partially written table
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp_file_path, file_path)
+
+    table = np.load(file_path, mmap_mode='r')
+    _loaded_tables[file_path] = table
+    return table
+
+
+class DistanceTable:
+
+    def __init__(self, board_size, goal_state):
+        """
+        Load the distance table for a goal state.
+
+        Args:
+            board_size (int): Board size (n x n).
+            goal_state (list): List of goal geom positions (list of [x, y] pairs).
+        """
+        self.board_size = board_size
+        self.num_cells = board_size ** 2
+        goal_cells = [int(x) * board_size + int(y) for x, y in goal_state]
+
+        # Map the goal to its canonical symmetry and relabel geoms by their canonical goal cell, the table is
+        # indexed with the cells of the canonical frame and geoms in this order
+        canonical_goal_cells, symmetry, self.order = canonicalize_goal_cells(board_size, goal_cells)
+        self.goal_cells = np.array(canonical_goal_cells)
+        cell_maps, inverse_cell_maps = get_cell_maps(board_size)
+        self.cell_map = cell_maps[symmetry]
+        self.inverse_cell_map = inverse_cell_maps[symmetry]
+        self.table = load_distance_table(board_size, canonical_goal_cells)
+
+    def _table_cells(self, state):
+        """Convert a state into the canonical cell indices of the relabelled geoms."""
+        return [self.cell_map[int(state[i][0]) * self.board_size + int(state[i][1])] for i in self.order]
+
+    def _lookup(self, cells):
+        return int(self.table[rank_placements(np.array([cells]), self.num_cells)[0]])
+
+    def _restore_state(self, cells):
+        """Convert canonical cell indices of the relabelled geoms back into a state of the original frame."""
+        state = [None] * len(cells)
+        for table_idx, geom_idx in enumerate(self.order):
+            state[geom_idx] = list(divmod(self.inverse_cell_map[int(cells[table_idx])], self.board_size))
+        return state
+
+    def distance(self, state):
+        """
+        Return the shortest path length from a state to the goal state, or None if the goal is unreachable.
+
+        Args:
+            state (list): List of geom positions (list of [x, y] pairs or an (n, 2) array).
+        """
+        distance = self._lookup(self._table_cells(state))
+        return None if distance == UNREACHABLE else distance
+
+    def path(self, state):
+        """
+        Reconstruct a shortest path by repeatedly moving to a neighbor that is one step closer to the goal.
+
+        Args:
+            state (list): List of geom positions (list of [x, y] pairs or an (n, 2) array).
+
+        Returns:
+            list: List of states from state to goal in JSON-compatible format, or None if the goal is unreachable.
+        """
+        cells = self._table_cells(state)
+        distance = self._lookup(cells)
+        if distance == UNREACHABLE:
+            return None
+
+        path = [cells]
+        while distance > 0:
+            successors = expand_placements(np.array([cells]), self.board_size)
+            successor_distances = self.table[rank_placements(successors, self.num_cells)]
+            cells = successors[np.argmax(successor_distances == distance - 1)].tolist()
+            distance -= 1
+            path.append(cells)
+
+        # Restore the original board orientation and geom order
+        return [self._restore_state(cells) for cells in path]
+
+    def sample_state(self, distance, manhattan=None):
+        """
+        Draw a state uniformly from all states at an exact distance to the goal state.
+
+        Args:
+            distance (int): The shortest path length of the drawn state.
+            manhattan (int, optional): Only draw states with this cumulative Manhattan distance to the goal.
+
+        Returns:
+            list: The drawn state in JSON-compatible format, or None if no state matches.
+        """
+        ranks = np.flatnonzero(self.table == distance)
+        if manhattan is not None and ranks.size:
+            cells = unrank_placements(ranks, self.num_cells, len(self.order))
+            rows, columns = np.divmod(cells, self.board_size)
+            goal_rows, goal_columns = np.divmod(self.goal_cells, self.board_size)
+            ranks = ranks[(np.abs(rows - goal_rows) + np.abs(columns - goal_columns)).sum(axis=1) == manhattan]
+        if not ranks.size:
+            return None
+
+        rank = ranks[random.randrange(ranks.size)]
+        return self._restore_state(unrank_placements(np.array([rank]), self.num_cells, len(self.order))[0])
+
+
+def get_distance_table(board_size, goal_state, max_build_states=AUTO_BUILD_TABLE_STATES):
+    """
+    Return the distance table for a goal state if one can be used, otherwise None.
+    Tables that already exist on disk are always used, missing tables are only built for small state spaces.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs).
+        max_build_states (int, optional): Largest state space for which a missing table is built.
+
+    Returns:
+        DistanceTable: The table for the goal state, or None.
+    """
+    num_states = num_placements(board_size ** 2, len(goal_state))
+    if num_states > MAX_TABLE_STATES:
+        return None
+    if num_states > max_build_states and not os.path.exists(
+            get_table_file_path(board_size, get_goal_cells(board_size, goal_state))):
+        return None
+    return DistanceTable(board_size, goal_state)
+
+
+def build_distance_tables_for_configs(config_id):
+    """
+    Prebuild the distance tables for the goal states of all configs in a dataset, including large tables.
+
+    Args:
+        config_id (str): The ID of the config dataset in Data/Configs.
+    """
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    config_dir = os.path.join(base_dir, 'Data', 'Configs', config_id)
+
+    goals = set()
+    for file_name in sorted(os.listdir(config_dir)):
+        if file_name.startswith('config') and file_name.endswith('.json'):
+            with open(os.path.join(config_dir, file_name), 'r') as f:
+                config = json.load(f)
+            board_size = config['grid_size']
+            goal_state = [landmark['goal_coordinate'] for landmark in config['landmarks']]
+            if is_table_eligible(board_size, len(goal_state)):
+                goals.add((board_size, get_goal_cells(board_size, goal_state)))
+
+    for i, (board_size, goal_cells) in enumerate(sorted(goals)):
+        print(f"Building distance table {i + 1}/{len(goals)} for {board_size}x{board_size} goal {goal_cells}")
+        load_distance_table(board_size, goal_cells)
+
+
+if __name__ == "__main__":
+    build_distance_tables_for_configs('SGP_ID_20241212_024852')
@@ -0,0 +1,267 @@
+"""
+- vectorized expansion of whole search frontiers with NumPy and a level-synchronous breadth-first search built on it
+- a frontier is an (N, G, 2) int8 array of N states with G geoms, expand_frontier marks all geoms in a padded
+  occupancy grid per state and produces every legal successor, the index of its parent, the moved geom and the change
+  of the Manhattan distance to the goal in a handful of array operations
+- states are keyed by the same int as PackedStateCodec.pack, stored as int64, so boards need
+  num_geoms * codec.bits <= 63 (up to 12 geoms on 5x5, 10 geoms on 8x8)
+- the state graph is bipartite and undirected, so the successors of layer d that are not in layer d - 1 are exactly
+  layer d + 1 and no global visited set is needed
+- with max_depth, states whose depth plus Manhattan distance to the goal exceeds it are dropped, the distance is
+  updated incrementally from the deltas of the expansion
+- exact_distance_layers runs the same search backwards from a goal and keeps every layer, i.e. all states at an exact
+  distance to the goal, which the config generation samples start states from
+"""
+
+# Import statements
+import numpy as np
+
+# Move directions in the order of PackedStateCodec.neighbors: up, down, left, right
+DIRECTIONS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.int8)
+
+
+def expand_moves(frontier, board_size):
+    """
+    Find all legal moves of a frontier of states without building the successor states.
+
+    Args:
+        frontier (np.ndarray): (N, G, 2) int8 array of geom positions.
+        board_size (int): Board size (n x n).
+
+    Returns:
+        tuple: (parents, moved_geoms, directions), (M,) arrays with the frontier index, the geom index and the
+        index into DIRECTIONS of every legal move, ordered by parent, then geom, then direction.
+    """
+    # Occupancy grid with a blocked border, flattened per state, so moves off the board are rejected by the same
+    # lookup as collisions
+    padded_size = board_size + 2
+    padded_cells = (frontier[:, :, 0].astype(np.intp) + 1) * padded_size + frontier[:, :, 1] + 1
+    occupancy = np.ones((len(frontier), padded_size, padded_size), dtype=bool)
+    occupancy[:, 1:-1, 1:-1] = False
+    occupancy = occupancy.reshape(len(frontier), -1)
+    np.put_along_axis(occupancy, padded_cells, True, axis=1)
+
+    # Target cell of every geom in every direction, (N, G * 4)
+    offsets = DIRECTIONS[:, 0].astype(np.intp) * padded_size + DIRECTIONS[:, 1]
+    targets = (padded_cells[:, :, None] + offsets).reshape(len(frontier), -1)
+    free = ~np.take_along_axis(occupancy, targets, axis=1)
+
+    parents, moves = np.nonzero(free)
+    moved_geoms, directions = np.divmod(moves, len(DIRECTIONS))
+    return parents, moved_geoms, directions
+
+
+def expand_frontier(frontier, board_size, goal=None):
+    """
+    Generate all legal successors of a frontier of states.
+
+    Args:
+        frontier (np.ndarray): (N, G, 2) int8 array of geom positions.
+        board_size (int): Board size (n x n).
+        goal (np.ndarray, optional): (G, 2) array of goal positions. If None, no Manhattan deltas are computed.
+
+    Returns:
+        tuple: (successors, parents, moved_geoms, manhattan_deltas), successors is an (M, G, 2) int8 array, parents
+        and moved_geoms are (M,) arrays with the frontier index and the geom index of every move, manhattan_deltas is
+        an (M,) int8 array with the change of the Manhattan distance to the goal (+1 or -1), or None without a goal.
+        Successors are ordered by parent, then geom, then direction.
+    """
+    parents, moved_geoms, directions = expand_moves(frontier, board_size)
+    successors = frontier[parents]
+    successors[np.arange(len(parents)), moved_geoms] += DIRECTIONS[directions]
+
+    manhattan_deltas = None
+    if goal is not None:
+        manhattan_deltas = get_manhattan_deltas(frontier, goal, parents, moved_geoms, directions)
+    return successors, parents, moved_geoms, manhattan_deltas
+
+
+def get_manhattan_deltas(frontier, goal, parents, moved_geoms, directions):
+    """Return the change of the Manhattan distance to the goal of every move as an (M,) int8 array."""
+    goal = np.asarray(goal, dtype=np.int8)
+    offsets = goal[moved_geoms] - frontier[parents, moved_geoms]
+    # Moving towards the goal along the axis of the move shortens the distance, every other move lengthens it
+    along_move = (offsets * DIRECTIONS[directions]).sum(axis=1)
+    return np.where(along_move > 0, -1, 1).astype(np.int8)
+
+
+def get_key_shifts(codec):
+    """Return the bit shift of every geom as an int64 array, raise ValueError if a packed state exceeds 63 bits."""
+    if codec.bits * codec.num_geoms > 63:
+        raise ValueError(f"{codec.num_geoms} geoms on {codec.board_size}x{codec.board_size} do not fit into int64 keys, "
+                         f"use another solver backend.")
+    return np.array(codec.shifts, dtype=np.int64)
+
+
+def pack_frontier(codec, frontier, shifts=None):
+    """Pack an (N, G, 2) frontier into an (N,) int64 array of the keys used by PackedStateCodec.pack."""
+    shifts = get_key_shifts(codec) if shifts is None else shifts
+    cells = frontier[:, :, 0].astype(np.int64) * codec.board_size + frontier[:, :, 1]
+    return (cells << shifts).sum(axis=1)
+
+
+def unpack_frontier(codec, keys, shifts=None):
+    """Unpack an (N,) int64 array of packed states into an (N, G, 2) int8 frontier."""
+    shifts = get_key_shifts(codec) if shifts is None else shifts
+    cells = (np.asarray(keys, dtype=np.int64)[:, None] >> shifts) & codec.mask
+    return np.stack(np.divmod(cells, codec.board_size), axis=-1).astype(np.int8)
+
+
+def bfs_search_packed(codec, initial_state, goal_state, max_depth=None):
+    """
+    Level-synchronous breadth-first search that expands one whole layer per step with expand_moves.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        initial_state (int): Packed starting state.
+        goal_state (int): Packed goal state.
+        max_depth (int, optional): The maximum length of the returned path. If None, search is unlimited.
+
+    Returns:
+        list: List of packed states from initial to goal, or None if no solution is found within the max depth
+    """
+    if initial_state == goal_state:
+        return [initial_state]
+
+    shifts = get_key_shifts(codec)
+    goal = unpack_frontier(codec, [goal_state], shifts)[0]
+    frontier = unpack_frontier(codec, [initial_state], shifts)
+    keys = np.array([initial_state], dtype=np.int64)
+    manhattan = np.abs(frontier.astype(np.int16) - goal).sum(axis=(1, 2))
+
+    # Every layer holds its sorted keys and the index of every state's parent in the previous layer
+    layers = [(keys, None)]
+    depth = 0
+    while len(keys) and (max_depth is None or depth < max_depth):
+        parents, moved_geoms, directions = expand_moves(frontier, codec.board_size)
+        successor_manhattan = manhattan[parents] + get_manhattan_deltas(frontier, goal, parents, moved_geoms,
+                                                                        directions)
+        depth += 1
+
+        if max_depth is not None:
+            within_depth = depth + successor_manhattan <= max_depth
+            parents, moved_geoms, directions = parents[within_depth], moved_geoms[within_depth], directions[within_depth]
+            successor_manhattan = successor_manhattan[within_depth]
+
+        # A move only changes the bit field of the moved geom, so successor keys are updated instead of packed
+        cell_offsets = DIRECTIONS[directions, 0].astype(np.int64) * codec.board_size + DIRECTIONS[directions, 1]
+        successor_keys = keys[parents] + (cell_offsets << shifts[moved_geoms])
+
+        # Keep the first occurrence of every new state, states of the previous layer are already explored
+        keys, first = np.unique(successor_keys, return_index=True)
+        if depth > 1:
+            previous_keys = layers[-2][0]
+            positions = np.minimum(np.searchsorted(previous_keys, keys), len(previous_keys) - 1)
+            is_new = previous_keys[positions] != keys
+            keys, first = keys[is_new], first[is_new]
+
+        layers.append((keys, parents[first]))
+        frontier, manhattan = unpack_frontier(codec, keys, shifts), successor_manhattan[first]
+
+        goal_index = np.searchsorted(keys, goal_state)
+        if goal_index < len(keys) and keys[goal_index] == goal_state:
+            path = []
+            index = goal_index
+            for layer_keys, layer_parents in reversed(layers):
+                path.append(int(layer_keys[index]))
+                if layer_parents is not None:
+                    index = layer_parents[index]
+            return path[::-1]
+
+    return None
+
+
+def exact_distance_layers(codec, goal_state, depth, max_states=None):
+    """
+    Collect all states at every distance up to depth from a goal state with a backward breadth-first search.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        goal_state (int): Packed goal state.
+        depth (int): The largest distance to collect.
+        max_states (int, optional): Maximum number of states in all layers. If None, the search is unlimited.
+
+    Returns:
+        list: depth + 1 sorted int64 arrays of packed states, layer d holds the states at distance d (empty once the
+        state space is exhausted), or None if the layers would exceed max_states.
+    """
+    shifts = get_key_shifts(codec)
+    layers = [np.array([goal_state], dtype=np.int64)]
+    num_states = 1
+    while len(layers) <= depth:
+        keys = layers[-1]
+        if not len(keys):
+            layers.append(keys)  # The state space is exhausted
+            continue
+        if max_states is not None and len(layers) > 1:
+            # Give up before expanding a layer that would exceed the limit at the growth rate of the last one
+            if num_states + len(keys) * len(keys) / max(1, len(layers[-2])) > max_states:
+                return None
+        parents, moved_geoms, directions = expand_moves(unpack_frontier(codec, keys, shifts), codec.board_size)
+        cell_offsets = DIRECTIONS[directions, 0].astype(np.int64) * codec.board_size + DIRECTIONS[directions, 1]
+        keys = np.unique(keys[parents] + (cell_offsets << shifts[moved_geoms]))
+        if len(layers) > 1:
+            keys = keys[~np.isin(keys, layers[-2], assume_unique=True)]
+
+        num_states += len(keys)
+        if max_states is not None and num_states > max_states:
+            return None
+        layers.append(keys)
+    return layers
+
+
+def layer_path(codec, layers, state, distance):
+    """
+    Reconstruct a shortest path from a state to the goal by stepping to a neighbor in the next lower layer.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        layers (list): Layers of exact_distance_layers.
+        state (int): Packed state in layers[distance].
+        distance (int): The distance of the state to the goal.
+
+    Returns:
+        list: List of packed states from the state to the goal.
+    """
+    path = [state]
+    for lower_layer in reversed(layers[:distance]):
+        neighbors = np.array(codec.neighbors(path[-1]), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(lower_layer, neighbors), len(lower_layer) - 1)
+        path.append(int(neighbors[np.argmax(lower_layer[positions] == neighbors)]))
+    return path
+
+
+if __name__ == "__main__":
+    import time
+    import random
+
+    from Source.Solver.packed_state import PackedStateCodec
+    from Source.Solver.a_star_search import a_star_packed
+
+    # Compare with bounded A* on the workload of the config generation, where max_depth is the target path length,
+    # long random walks on dense boards give puzzles with detours, where the frontiers are wide
+    rng = random.Random(0)
+    for board_size, num_geoms, walk_length in [(4, 10, 40), (5, 12, 40)]:
+        codec = PackedStateCodec(board_size, num_geoms)
+        bfs_seconds = a_star_seconds = 0
+        for _ in range(10):
+            goal_state = codec.pack(divmod(cell, board_size) for cell in rng.sample(range(board_size ** 2), num_geoms))
+            initial_state = goal_state
+            for _ in range(walk_length):
+                initial_state = rng.choice(codec.neighbors(initial_state))
+            path_length = len(a_star_packed(codec, initial_state, goal_state)) - 1
+
+            start_time = time.perf_counter()
+            a_star_path = a_star_packed(codec, initial_state, goal_state, path_length)
+            a_star_seconds += time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            path = bfs_search_packed(codec, initial_state, goal_state, path_length)
+            bfs_seconds += time.perf_counter() - start_time
+
+            assert len(path) == len(a_star_path) and path[0] == initial_state and path[-1] == goal_state
+            assert all(b in codec.neighbors(a) for a, b in zip(path, path[1:])), "BFS path has an invalid move"
+            assert path_length < 2 or bfs_search_packed(codec, initial_state, goal_state, path_length - 1) is None
+
+        print(f"{board_size}x{board_size} with {num_geoms} geoms: bfs {bfs_seconds:.3f} s, "
+              f"bounded a_star {a_star_seconds:.3f} s")
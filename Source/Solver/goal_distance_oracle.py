@@ -0,0 +1,121 @@
+"""
+- goal distance oracle that answers shortest path lengths to one fixed goal state
+- runs a single backward breadth-first search from the goal, which is the same as a forward search because every
+  move of a geom can be undone by the reverse move
+- the search is expanded layer by layer only until all requested states are covered, afterwards every lookup is O(1)
+- used for evaluation, where all step states of an episode are measured against the same goal state
+- on small boards the oracle reads from the dense distance table of the goal instead of searching
+- with a SolverCache, states measured in earlier runs are answered from the cache and newly covered states are
+  added to it
+"""
+
+# Import statements
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.distance_tables import get_distance_table
+from Source.Solver.shortest_path_solver import solve_packed
+
+
+class GoalDistanceOracle:
+
+    def __init__(self, board_size, goal_state, max_states=2_000_000, use_distance_table=True, backend='a_star',
+                 cache=None):
+        """
+        Initialize the oracle with the goal state as the only explored state.
+
+        Args:
+            board_size (int): Board size (n x n).
+            goal_state (list): List of goal geom positions (list of [x, y] pairs).
+            max_states (int, optional): Maximum number of states the backward search may store. States that are not
+                covered when the limit is hit are solved individually with the backend. If None, the search is
+                unlimited.
+            use_distance_table (bool, optional): Answer from a dense distance table if the board is small enough.
+            backend (str, optional): Search backend for the states that are solved individually, e.g. 'bidirectional'.
+            cache (SolverCache, optional): Persistent cache of shortest path lengths.
+        """
+        self.board_size = board_size
+        self.goal_state = goal_state
+        self.codec = PackedStateCodec(board_size, len(goal_state))
+        self.max_states = max_states
+        self.backend = backend
+        self.cache = cache
+        self.table = get_distance_table(board_size, goal_state) if use_distance_table else None
+
+        self.goal = self.codec.pack(goal_state)
+        self.distances = {self.goal: 0}  # Packed state -> shortest path length to the goal
+        self.frontier = [self.goal]
+        self.depth = 0
+        self.cached_distances = {}  # Packed state -> shortest path length found in the cache
+
+    def cover(self, states):
+        """
+        Expand the backward search until all given states have a known distance to the goal.
+
+        Args:
+            states (list): States to cover (list of lists of [x, y] pairs or (n, 2) arrays).
+        """
+        if self.table is not None:
+            return  # Every state is already covered by the distance table
+
+        pending = {self.codec.pack(state) for state in states}
+        pending.difference_update(self.distances)
+        pending.difference_update(self.cached_distances)
+
+        if self.cache is not None:
+            for state in list(pending):
+                distance = self.cache.get_length(self.codec, state, self.goal)
+                if distance is not None:
+                    self.cached_distances[state] = distance
+                    pending.discard(state)
+        requested = set(pending)
+
+        while pending and self.frontier:
+            if self.max_states is not None and len(self.distances) >= self.max_states:
+                # Solve the remaining states individually instead of growing the table any further
+                for state in pending:
+                    path = solve_packed(self.codec, state, self.goal, backend=self.backend, cache=self.cache)
+                    if path is not None:
+                        self.distances[state] = len(path) - 1
+                break
+
+            next_frontier = []
+            next_depth = self.depth + 1
+            for state in self.frontier:
+                for neighbor in self.codec.neighbors(state):
+                    if neighbor not in self.distances:
+                        self.distances[neighbor] = next_depth
+                        next_frontier.append(neighbor)
+                        pending.discard(neighbor)
+            self.frontier = next_frontier
+            self.depth = next_depth
+
+        if self.cache is not None:
+            for state in requested:
+                if state in self.distances:
+                    self.cache.put_length(self.codec, state, self.goal, self.distances[state])
+
+    def distance(self, state):
+        """
+        Return the shortest path length from a state to the goal state.
+
+        Args:
+            state (list): List of geom positions (list of [x, y] pairs or an (n, 2) array).
+
+        Returns:
+            int: The number of moves on a shortest path to the goal state.
+        """
+        if self.table is not None:
+            distance = self.table.distance(state)
+            if distance is None:
+                raise ValueError(f"State {state} cannot reach the goal state.")
+            return distance
+
+        packed = self.codec.pack(state)
+        if packed in self.cached_distances:
+            return self.cached_distances[packed]
+        if packed not in self.distances:
+            self.cover([state])
+        if packed in self.cached_distances:
+            return self.cached_distances[packed]
+        if packed not in self.distances:
+            raise ValueError(f"State {self.codec.unpack(packed)} cannot reach the goal state.")
+        return self.distances[packed]
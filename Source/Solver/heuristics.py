@@ -0,0 +1,235 @@
+"""
+- admissible heuristics of the shortest path search on packed integer states
+- 'manhattan': cumulative Manhattan distance of all geoms to their goal cells
+- 'linear_conflict': Manhattan distance plus a detour penalty for geoms that block each other on a shared row or
+  column, adapted to partial boards with empty cells:
+    - geoms that are on the row (column) of their goal cell can only pass each other by leaving that line,
+      empty cells do not change this because two geoms can never share or swap cells within one line
+    - the geoms of a line that stay on it keep their order, so at least k - LIS of the k geoms of the line have to
+      leave it, where LIS is the longest run of geoms that is already in goal order
+    - leaving the line and coming back costs 2 moves that the Manhattan distance does not count, leaving a row costs
+      vertical moves and leaving a column horizontal ones, so the row and column penalties add up
+    - a move enters or leaves the goal line of one geom only, so the heuristic changes by exactly one per move and
+      stays consistent
+- 'walking_distance': vertical plus horizontal walking distance, for the sliding tile puzzle (one empty cell) and
+  partial boards alike:
+    - per row, only the number of geoms of every goal row and the number of empty cells is kept, a vertical move
+      takes one geom of any goal row into a vertically adjacent empty cell, the exact number of vertical moves to reach
+      the goal counts is the vertical walking distance, and likewise for the columns
+    - every geom needs at least its own vertical distance, so the walking distance dominates the Manhattan distance,
+      it also counts geoms that have to make way for each other across rows
+    - the distances are precomputed by a breadth-first search over the row (column) counts from the goal counts and
+      cached per goal layout, e.g. 24,964 table entries for the 15-puzzle
+    - a move changes the counts of one direction by one step, so the heuristic changes by exactly one per move and
+      stays consistent
+    - boards whose tables would exceed MAX_WALKING_DISTANCE_STATES (e.g. the 24-puzzle) fall back to
+      'linear_conflict'
+- the searches expand states with get_scored_neighbors, which carries the Manhattan distance forward by the +1/-1
+  delta of the moved geom, the linear conflict penalty is recounted per neighbor
+- c2 of a config is (c1 - manhattan) / 2, so the number of conflicts is a lower bound on c2 and the penalty pays off
+  most on high-c2 configs
+"""
+
+# Import statements
+from bisect import bisect_left
+from collections import deque
+
+HEURISTICS = ['manhattan', 'linear_conflict', 'walking_distance']
+DEFAULT_HEURISTIC = 'manhattan'
+MAX_WALKING_DISTANCE_STATES = 100_000  # Largest walking distance table built
+
+_walking_distance_tables = {}  # (board size, geoms per goal line) -> walking distance table, None if too large
+
+
+def longest_increasing_subsequence(values):
+    """Return the length of the longest strictly increasing subsequence of a list of values."""
+    tails = []
+    for value in values:
+        index = bisect_left(tails, value)
+        if index == len(tails):
+            tails.append(value)
+        else:
+            tails[index] = value
+    return len(tails)
+
+
+def count_line_conflicts(line):
+    """
+    Count the geoms that have to leave a line so that the remaining ones are in goal order.
+
+    Args:
+        line (list): List of (current position, goal position) pairs along the line of all geoms whose current and
+            goal cell are both on it.
+
+    Returns:
+        int: The minimum number of geoms that have to leave the line.
+    """
+    if len(line) < 2:
+        return 0
+    if len(line) == 2:
+        (position_a, goal_a), (position_b, goal_b) = line
+        return int((position_a < position_b) != (goal_a < goal_b))
+    line.sort()
+    return len(line) - longest_increasing_subsequence([goal for _, goal in line])
+
+
+def build_walking_distance_table(board_size, goal_line_counts, max_states=MAX_WALKING_DISTANCE_STATES):
+    """
+    Compute the walking distance of all line count matrices with a breadth-first search from the goal.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_line_counts (tuple): Number of geoms whose goal cell is on every line (row or column).
+        max_states (int, optional): Maximum number of table entries.
+
+    Returns:
+        dict: Map from a flat count matrix (entry line * n + goal line holds the number of geoms on the line whose goal
+        cell is on the goal line) to its walking distance, or None if the table exceeds max_states.
+    """
+    n = board_size
+    goal = [0] * n ** 2
+    for line, count in enumerate(goal_line_counts):
+        goal[line * n + line] = count
+    goal = tuple(goal)
+
+    table = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        counts = queue.popleft()
+        distance = table[counts] + 1
+        line_sizes = [sum(counts[line * n:(line + 1) * n]) for line in range(n)]
+        for line in range(n):
+            for target in (line - 1, line + 1):
+                if not 0 <= target < n or line_sizes[target] == n:
+                    continue  # No empty cell on the target line
+                for goal_line in range(n):
+                    if counts[line * n + goal_line]:
+                        moved = list(counts)
+                        moved[line * n + goal_line] -= 1
+                        moved[target * n + goal_line] += 1
+                        moved = tuple(moved)
+                        if moved not in table:
+                            table[moved] = distance
+                            queue.append(moved)
+                            if len(table) > max_states:
+                                return None
+    return table
+
+
+def get_walking_distance_table(board_size, goal_line_counts):
+    """Return the cached walking distance table of a goal layout, see build_walking_distance_table."""
+    key = (board_size, tuple(goal_line_counts))
+    if key not in _walking_distance_tables:
+        _walking_distance_tables[key] = build_walking_distance_table(board_size, key[1])
+    return _walking_distance_tables[key]
+
+
+def get_heuristic(codec, goal_packed, heuristic=DEFAULT_HEURISTIC):
+    """
+    Create the heuristic function of one goal state.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        goal_packed (int): The packed goal state.
+        heuristic (str, optional): One of HEURISTICS.
+
+    Returns:
+        function: Maps a packed state to a lower bound on its shortest path length to the goal state.
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unsupported heuristic: {heuristic}. Must be one of {HEURISTICS}.")
+
+    distances = codec.manhattan_table(goal_packed)
+    if heuristic == 'manhattan':
+        return lambda packed: codec.manhattan(packed, distances)
+
+    n = codec.board_size
+    goals = [divmod(cell, n) for cell in codec.cells(goal_packed)]
+    if heuristic == 'walking_distance':
+        walking_distance = get_walking_distance(codec, goals)
+        if walking_distance is not None:
+            return walking_distance
+    # Per geom and cell: Manhattan distance, key and entry of the goal row and the goal column if the cell is on them
+    layout = []
+    for cell_distances, (goal_x, goal_y) in zip(distances, goals):
+        cell_lines = []
+        for cell in range(n ** 2):
+            x, y = divmod(cell, n)
+            row = (goal_x, (y, goal_y)) if x == goal_x else None
+            column = (goal_y, (x, goal_x)) if y == goal_y else None
+            cell_lines.append((cell_distances[cell], row, column))
+        layout.append(cell_lines)
+
+    def linear_conflict(packed):
+        manhattan = 0
+        rows = {}
+        columns = {}
+        for cell_lines, cell in zip(layout, codec.cells(packed)):
+            distance, row, column = cell_lines[cell]
+            manhattan += distance
+            if row is not None:
+                rows.setdefault(row[0], []).append(row[1])
+            if column is not None:
+                columns.setdefault(column[0], []).append(column[1])
+
+        conflicts = 0
+        for line in rows.values():
+            conflicts += count_line_conflicts(line)
+        for line in columns.values():
+            conflicts += count_line_conflicts(line)
+        return manhattan + 2 * conflicts
+
+    return linear_conflict
+
+
+def get_walking_distance(codec, goals):
+    """
+    Create the walking distance function of one goal state.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        goals (list): The goal (x, y) of every geom.
+
+    Returns:
+        function: Maps a packed state to its walking distance, or None if the tables of the goal are too large.
+    """
+    n = codec.board_size
+    row_table = get_walking_distance_table(n, [sum(x == row for x, _ in goals) for row in range(n)])
+    column_table = get_walking_distance_table(n, [sum(y == column for _, y in goals) for column in range(n)])
+    if row_table is None or column_table is None:
+        return None
+
+    # Per geom and cell: the entry of the row and the column count matrix it adds to
+    entries = [[(cell // n * n + goal_x, cell % n * n + goal_y) for cell in range(n ** 2)] for goal_x, goal_y in goals]
+    empty = [0] * n ** 2
+
+    def walking_distance(packed):
+        rows = empty[:]
+        columns = empty[:]
+        for cell_entries, cell in zip(entries, codec.cells(packed)):
+            row_entry, column_entry = cell_entries[cell]
+            rows[row_entry] += 1
+            columns[column_entry] += 1
+        return row_table[tuple(rows)] + column_table[tuple(columns)]
+
+    return walking_distance
+
+
+def get_scored_neighbors(codec, goal_packed, heuristic=DEFAULT_HEURISTIC):
+    """
+    Create the neighbor generation of one goal state that scores every neighbor with the heuristic.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        goal_packed (int): The packed goal state.
+        heuristic (str, optional): One of HEURISTICS.
+
+    Returns:
+        function: Maps a packed state and its heuristic value to a list of (neighbor, heuristic value) pairs.
+    """
+    if heuristic == 'manhattan':
+        table = codec.move_table(goal_packed)
+        return lambda packed, estimate: codec.scored_neighbors(packed, estimate, table)
+
+    estimate = get_heuristic(codec, goal_packed, heuristic)
+    return lambda packed, _: [(neighbor, estimate(neighbor)) for neighbor in codec.neighbors(packed)]
@@ -0,0 +1,88 @@
+"""
+- iterative deepening A* (IDA*) on packed integer states
+- every iteration is a depth-first search bounded by an f-score threshold, which is raised to the smallest f-score
+  that exceeded it until the goal is found
+- apart from the current path only a transposition table of bounded size is kept, it stores the smallest g-score at
+  which a state was expanded in the current iteration and evicts the least recently used state once it is full,
+  so memory stays flat even for long shortest paths on large boards
+"""
+
+# Import statements
+import math
+from collections import OrderedDict
+
+from Source.Solver.heuristics import get_heuristic, get_scored_neighbors, DEFAULT_HEURISTIC
+
+TRANSPOSITION_TABLE_SIZE = 1_000_000
+
+
+def ida_star_packed(codec, initial_state, goal_state, max_depth=None, max_table_size=TRANSPOSITION_TABLE_SIZE,
+                    heuristic=DEFAULT_HEURISTIC):
+    """
+    Solve the sliding geom puzzle with the IDA* algorithm.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        initial_state (int): Packed starting state.
+        goal_state (int): Packed goal state.
+        max_depth (int, optional): The maximum depth to search. If None, the thresholds are raised until the search
+            space is exhausted, which is only practical for solvable puzzles.
+        max_table_size (int, optional): Maximum number of states in the transposition table.
+        heuristic (str, optional): Admissible heuristic, one of HEURISTICS.
+
+    Returns:
+        list: List of packed states from initial to goal, or None if no solution is found within the max depth
+    """
+    if initial_state == goal_state:
+        return [initial_state]
+
+    initial_estimate = get_heuristic(codec, goal_state, heuristic)(initial_state)
+    scored_neighbors = get_scored_neighbors(codec, goal_state, heuristic)
+    threshold = initial_estimate
+
+    while True:
+        if max_depth is not None and threshold > max_depth:
+            return None  # No solution possible within the given max depth
+
+        # A state reached again with a g-score that is not smaller was already searched with at least as much budget
+        transpositions = OrderedDict()
+        path = [initial_state]
+        on_path = {initial_state}
+        stack = [iter(scored_neighbors(initial_state, initial_estimate))]
+        next_threshold = math.inf  # Smallest f-score beyond the threshold
+
+        while stack:
+            neighbor, neighbor_estimate = next(stack[-1], (None, None))
+            if neighbor is None:
+                # All neighbors of the last state on the path are searched, backtrack
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            if neighbor in on_path:
+                continue
+
+            g_score = len(path)
+            f_score = g_score + neighbor_estimate
+            if f_score > threshold:
+                next_threshold = min(next_threshold, f_score)
+                continue
+            if neighbor == goal_state:
+                path.append(neighbor)
+                return path
+
+            seen_g_score = transpositions.get(neighbor)
+            if seen_g_score is not None:
+                transpositions.move_to_end(neighbor)
+                if seen_g_score <= g_score:
+                    continue
+            transpositions[neighbor] = g_score
+            if len(transpositions) > max_table_size:
+                transpositions.popitem(last=False)  # Evict the least recently used state
+
+            path.append(neighbor)
+            on_path.add(neighbor)
+            stack.append(iter(scored_neighbors(neighbor, neighbor_estimate)))
+
+        if next_threshold == math.inf:
+            return None  # Search space exhausted
+        threshold = next_threshold
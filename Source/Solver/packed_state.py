@@ -0,0 +1,131 @@
+"""
+- compact integer encoding of board states for the shortest path search
+- every geom's cell index (x * board_size + y) is stored in a fixed-width bit field of one Python int,
+  5 bits per geom cover boards up to 5x5 and 6 bits boards up to 8x8
+- neighbor generation and Manhattan scoring work directly on the packed ints, so the search dicts key on small ints
+  instead of tuples of tuples and no NumPy arrays are allocated per expanded state
+- a move changes the Manhattan distance of the moved geom only, by +1 or -1, so scored_neighbors emits this delta
+  with every neighbor and the searches carry the heuristic forward instead of summing over all geoms
+"""
+
+# Import statements
+import numpy as np
+
+
+class PackedStateCodec:
+
+    def __init__(self, board_size, num_geoms):
+        """
+        Precompute the bit layout and the cell adjacency for a board.
+
+        Args:
+            board_size (int): Board size (n x n).
+            num_geoms (int): Number of geoms on the board.
+        """
+        self.board_size = board_size
+        self.num_geoms = num_geoms
+        self.bits = max(1, (board_size ** 2 - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.shifts = [i * self.bits for i in range(num_geoms)]
+
+        # Adjacent cells in the move order of get_neighbors: up, down, left, right
+        self.adjacent = []
+        for cell in range(board_size ** 2):
+            x, y = divmod(cell, board_size)
+            targets = []
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < board_size and 0 <= new_y < board_size:
+                    targets.append(new_x * board_size + new_y)
+            self.adjacent.append(targets)
+
+    def pack(self, state):
+        """Pack a list of [x, y] pairs (or an (n, 2) array) into a single int."""
+        packed = 0
+        for shift, (x, y) in zip(self.shifts, state):
+            packed |= (int(x) * self.board_size + int(y)) << shift
+        return packed
+
+    def cells(self, packed):
+        """Return the cell index of every geom in a packed state."""
+        mask = self.mask
+        return [(packed >> shift) & mask for shift in self.shifts]
+
+    def unpack(self, packed):
+        """Unpack a packed state into a JSON-compatible list of [x, y] pairs."""
+        return [list(divmod(cell, self.board_size)) for cell in self.cells(packed)]
+
+    def unpack_array(self, packed):
+        """Unpack a packed state into an (n, 2) integer array, the format used by the config generators."""
+        return np.array(self.unpack(packed), dtype=int).reshape(-1, 2)
+
+    def neighbors(self, packed):
+        """
+        Generate all valid neighboring states of a packed state.
+        A neighbor is obtained by sliding a geom into an adjacent empty cell, which only changes its own bit field.
+        """
+        cells = self.cells(packed)
+        occupied = set(cells)
+        neighbors = []
+        for shift, cell in zip(self.shifts, cells):
+            for target in self.adjacent[cell]:
+                if target not in occupied:
+                    neighbors.append(packed + ((target - cell) << shift))
+        return neighbors
+
+    def manhattan_table(self, goal_packed):
+        """
+        Precompute the Manhattan distance of every cell to the goal cell of every geom.
+
+        Args:
+            goal_packed (int): The packed goal state.
+
+        Returns:
+            list: One list per geom, indexed by cell, holding the distance to that geom's goal cell.
+        """
+        n = self.board_size
+        table = []
+        for goal_cell in self.cells(goal_packed):
+            goal_x, goal_y = divmod(goal_cell, n)
+            table.append([abs(cell // n - goal_x) + abs(cell % n - goal_y) for cell in range(n ** 2)])
+        return table
+
+    def move_table(self, goal_packed):
+        """
+        Precompute the moves of every geom from every cell with their effect on the Manhattan distance to the goal.
+
+        Args:
+            goal_packed (int): The packed goal state.
+
+        Returns:
+            list: One list per geom, indexed by cell, holding a (target cell, packed offset, Manhattan delta) tuple for
+            every adjacent cell, the packed offset is added to a packed state to move the geom.
+        """
+        table = []
+        for shift, distances in zip(self.shifts, self.manhattan_table(goal_packed)):
+            table.append([[(target, (target - cell) << shift, distances[target] - distances[cell])
+                           for target in self.adjacent[cell]] for cell in range(self.board_size ** 2)])
+        return table
+
+    def scored_neighbors(self, packed, manhattan, table):
+        """
+        Generate all valid neighboring states of a packed state together with their Manhattan distance.
+
+        Args:
+            packed (int): The packed state.
+            manhattan (int): The Manhattan distance of the packed state to the goal.
+            table (list): The move table of the goal, see move_table.
+
+        Returns:
+            list: List of (neighbor, Manhattan distance) pairs, in the order of neighbors.
+        """
+        cells = self.cells(packed)
+        occupied = set(cells)
+        return [(packed + offset, manhattan + delta)
+                for cell_moves, cell in zip(table, cells)
+                for target, offset, delta in cell_moves[cell] if target not in occupied]
+
+    def manhattan(self, packed, table):
+        """Calculate the cumulative Manhattan distance of a packed state using a precomputed goal table."""
+        mask = self.mask
+        return sum(distances[(packed >> shift) & mask] for shift, distances in zip(self.shifts, table))
@@ -0,0 +1,136 @@
+"""
+- productive-move oracle: classifies every legal move of a state by its effect on the distance to one goal state
+- the distances come from the per-goal table of a GoalDistanceOracle, i.e. the dense distance table on small boards
+  or the backward breadth-first search from the goal, so a state and all of its moves cost lookups only, instead of
+  one A* run per candidate move
+- every decreasing move is optimal, whichever shortest path it belongs to
+- the state graph is bipartite, so a legal move always changes the distance by exactly one, 'keeping' only occurs for
+  steps that leave the board unchanged, e.g. illegal actions of an agent
+- classify_episode is the lookup pass used by the episode evaluation and the mistake analysis
+"""
+
+# Import statements
+from Source.Solver.goal_distance_oracle import GoalDistanceOracle
+
+MOVE_CLASSES = ['decreasing', 'keeping', 'increasing']
+MOVE_DIRECTIONS = ['up', 'down', 'left', 'right']  # [x, y] offsets (-1, 0), (1, 0), (0, -1), (0, 1)
+
+
+class ProductiveMoveOracle:
+
+    def __init__(self, board_size, goal_state, **oracle_kwargs):
+        """
+        Initialize the oracle of one goal state.
+
+        Args:
+            board_size (int): Board size (n x n).
+            goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+            **oracle_kwargs: Passed on to GoalDistanceOracle, e.g. backend or cache.
+        """
+        self.oracle = GoalDistanceOracle(board_size, goal_state, **oracle_kwargs)
+        self.codec = self.oracle.codec
+
+    def cover(self, states):
+        """
+        Make the distances of the given states and of all their neighbors available, with one backward search.
+
+        Args:
+            states (list): States to cover (list of lists of [x, y] pairs or (n, 2) arrays).
+        """
+        covered = []
+        for state in states:
+            packed = self.codec.pack(state)
+            covered.append(packed)
+            covered.extend(self.codec.neighbors(packed))
+        self.oracle.cover([self.codec.unpack(packed) for packed in covered])
+
+    def distance(self, state):
+        """Return the shortest path length from a state to the goal state."""
+        return self.oracle.distance(state)
+
+    def moves(self, state):
+        """
+        Classify every legal move of a state.
+
+        Args:
+            state (list): List of geom positions (list of [x, y] pairs or an (n, 2) array).
+
+        Returns:
+            list: One dict per legal move with 'geom' (index), 'direction' (one of MOVE_DIRECTIONS), 'state' (the
+            resulting state as a list of [x, y] pairs), 'distance' (its distance to the goal) and 'class' (one of
+            MOVE_CLASSES).
+        """
+        packed = self.codec.pack(state)
+        distance = self.distance(state)
+        self.cover([state])
+
+        n = self.codec.board_size
+        cell_offsets = [-n, n, -1, 1]  # Cell index offset of every direction in MOVE_DIRECTIONS
+        cells = self.codec.cells(packed)
+        occupied = set(cells)
+        moves = []
+        for geom, (shift, cell) in enumerate(zip(self.codec.shifts, cells)):
+            for target in self.codec.adjacent[cell]:
+                if target in occupied:
+                    continue
+                neighbor_state = self.codec.unpack(packed + ((target - cell) << shift))
+                neighbor_distance = self.distance(neighbor_state)
+                moves.append({
+                    'geom': geom,
+                    'direction': MOVE_DIRECTIONS[cell_offsets.index(target - cell)],
+                    'state': neighbor_state,
+                    'distance': neighbor_distance,
+                    'class': classify_distance_change(distance, neighbor_distance)
+                })
+        return moves
+
+    def productive_moves(self, state):
+        """Return the moves of a state that decrease the distance to the goal, i.e. all optimal next moves."""
+        return [move for move in self.moves(state) if move['class'] == 'decreasing']
+
+
+def classify_distance_change(distance, next_distance):
+    """Return the class of a step from a state with a given distance to the goal to one with next_distance."""
+    if next_distance < distance:
+        return 'decreasing'
+    if next_distance > distance:
+        return 'increasing'
+    return 'keeping'
+
+
+def classify_episode(board_size, goal_state, step_states, oracle=None, **oracle_kwargs):
+    """
+    Classify every step of an episode with one productive-move oracle.
+
+    Args:
+        board_size (int): Board size (n x n).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+        step_states (list): The state after every step, starting with the initial state.
+        oracle (ProductiveMoveOracle, optional): Oracle of the goal state to reuse, e.g. one shared with the distance
+            check of the evaluation. If None, one is built.
+        **oracle_kwargs: Passed on to GoalDistanceOracle, e.g. backend or cache.
+
+    Returns:
+        dict: A dictionary containing:
+            - 'distances' (list): Distance to the goal of every state.
+            - 'classes' (list): Class of every step (one of MOVE_CLASSES), one less than the states.
+            - 'productive_options' (list): Number of optimal moves available in every state.
+    """
+    if oracle is None:
+        oracle = ProductiveMoveOracle(board_size, goal_state, **oracle_kwargs)
+    oracle.cover(step_states)
+
+    distances = [oracle.distance(state) for state in step_states]
+    productive_options = [len(oracle.productive_moves(state)) for state in step_states]
+    classes = [classify_distance_change(distance, next_distance)
+               for distance, next_distance in zip(distances[:-1], distances[1:])]
+    return {'distances': distances, 'classes': classes, 'productive_options': productive_options}
+
+
+if __name__ == "__main__":
+    goal_state = [[0, 0], [1, 1], [2, 2], [3, 3]]
+    state = [[0, 1], [1, 0], [3, 2], [2, 3]]
+    oracle = ProductiveMoveOracle(4, goal_state)
+    print(f"Distance to goal: {oracle.distance(state)}")
+    for move in oracle.moves(state):
+        print(f"  geom {move['geom']} {move['direction']:<5} -> distance {move['distance']} ({move['class']})")
@@ -0,0 +1,204 @@
+"""
+- shared shortest path solver for the sliding geom puzzle, used by config generation, evaluation and the random path
+  generation, so that every fix to the search only has to be made once
+- the search itself is done by a pluggable backend:
+    - 'a_star': plain A*, max_depth is only applied to the found path
+    - 'bounded_a_star': A* that stops early once no path within max_depth can exist
+    - 'ida_star': iterative deepening A*, for long shortest paths where A* runs out of memory
+    - 'bidirectional': breadth-first search from both endpoints that meets in the middle, for deep puzzles
+    - 'bfs': level-synchronous breadth-first search that expands whole layers with NumPy, for wide frontiers
+    - 'table': lookup in the dense distance tables of small boards
+    - 'auto': the distance table if one is available, otherwise the default backend
+- all backends return None if the goal cannot be reached within max_depth
+- the search backends take an admissible heuristic, see heuristics.HEURISTICS
+- results of the search backends can be kept in a persistent SolverCache, see solver_cache.get_solver_cache
+"""
+
+# Import statements
+import numpy as np
+
+from Source.Solver.packed_state import PackedStateCodec
+from Source.Solver.a_star_search import a_star_packed
+from Source.Solver.ida_star_search import ida_star_packed
+from Source.Solver.bidirectional_search import bidirectional_search_packed
+from Source.Solver.frontier_search import bfs_search_packed, expand_frontier
+from Source.Solver.distance_tables import get_distance_table
+from Source.Solver.heuristics import DEFAULT_HEURISTIC
+
+SOLVER_BACKENDS = ['a_star', 'bounded_a_star', 'ida_star', 'bidirectional', 'bfs', 'table', 'auto']
+
+
+def calculate_manhattan_heuristic(initial_states, goal_states):
+    """Calculate the cumulative Manhattan distance of all geoms from their initial to their goal positions."""
+
+    # Ensure the arrays have the same shape
+    assert initial_states.shape == goal_states.shape, "Initial and goal states must have the same shape."
+
+    # Calculate Manhattan distances
+    distances = np.abs(initial_states - goal_states).sum(axis=1)  # Sum differences along coordinates for each object
+
+    # Return cumulative Manhattan distance
+    return int(distances.sum())
+
+
+def get_neighbors(state, n):
+    """
+    Generate all valid neighboring states for a given state.
+    A neighbor is obtained by sliding a tile into an adjacent empty position.
+    """
+    successors, _, _, _ = expand_frontier(np.asarray(state, dtype=np.int8)[None], n)
+    return list(successors.astype(int))
+
+
+def get_default_backend(max_depth=None):
+    """Return the backend used if none is specified, the bounded search only pays off with a depth limit."""
+    return 'a_star' if max_depth is None else 'bounded_a_star'
+
+
+def solve_packed(codec, initial_state, goal_state, max_depth=None, backend=None, heuristic=DEFAULT_HEURISTIC,
+                 cache=None):
+    """
+    Solve a puzzle given as packed states with one of the search backends.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        initial_state (int): Packed starting state.
+        goal_state (int): Packed goal state.
+        max_depth (int, optional): The maximum length of the returned path. If None, search is unlimited.
+        backend (str, optional): One of 'a_star', 'bounded_a_star', 'ida_star', 'bidirectional' or 'bfs', see
+            get_default_backend if None.
+        heuristic (str, optional): Admissible heuristic of the search, one of HEURISTICS. Not used by the
+            bidirectional search and the breadth-first search.
+        cache (SolverCache, optional): Cache that is asked before and updated after the search.
+
+    Returns:
+        list: List of packed states from initial to goal, or None if no solution is found within the max depth
+    """
+    if cache is not None:
+        hit, path = cache.get_path(codec, initial_state, goal_state, max_depth)
+        if hit:
+            return path
+
+    backend = backend or get_default_backend(max_depth)
+    if backend == 'a_star':
+        path = a_star_packed(codec, initial_state, goal_state, heuristic=heuristic)
+    elif backend == 'bounded_a_star':
+        path = a_star_packed(codec, initial_state, goal_state, max_depth, heuristic=heuristic)
+    elif backend == 'ida_star':
+        path = ida_star_packed(codec, initial_state, goal_state, max_depth, heuristic=heuristic)
+    elif backend == 'bidirectional':
+        path = bidirectional_search_packed(codec, initial_state, goal_state, max_depth)
+    elif backend == 'bfs':
+        path = bfs_search_packed(codec, initial_state, goal_state, max_depth)
+    else:
+        raise ValueError(f"Unsupported backend for packed states: {backend}")
+
+    if cache is not None:
+        cache.put_path(codec, initial_state, goal_state, path, max_depth)
+    if path is None or (max_depth is not None and len(path) - 1 > max_depth):
+        return None
+    return path
+
+
+def solve(board_size, initial_state, goal_state, max_depth=None, backend=None, heuristic=DEFAULT_HEURISTIC,
+          cache=None):
+    """
+    Find a shortest move sequence from the initial state to the goal state.
+
+    Args:
+        board_size (int): Board size (n x n).
+        initial_state (list): List of starting geom positions (list of [x, y] pairs or an (n, 2) array).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+        max_depth (int, optional): The maximum length of the returned path. If None, search is unlimited.
+        backend (str, optional): One of SOLVER_BACKENDS, see get_default_backend if None.
+        heuristic (str, optional): Admissible heuristic of the search backends, one of HEURISTICS.
+        cache (SolverCache, optional): Cache of the search backend results.
+
+    Returns:
+        list: List of states from initial to goal in JSON-compatible format, or None if no solution is found within
+        the max depth
+    """
+    if backend not in SOLVER_BACKENDS and backend is not None:
+        raise ValueError(f"Unsupported solver backend: {backend}. Must be one of {SOLVER_BACKENDS}.")
+
+    if backend in ('table', 'auto'):
+        table = get_distance_table(board_size, goal_state)
+        if table is not None:
+            path = table.path(initial_state)
+            if path is None or (max_depth is not None and len(path) - 1 > max_depth):
+                return None
+            return path
+        if backend == 'table':
+            raise ValueError(f"No distance table available for {board_size}x{board_size} with {len(goal_state)} geoms.")
+        backend = None
+
+    codec = PackedStateCodec(board_size, len(initial_state))
+    path = solve_packed(codec, codec.pack(initial_state), codec.pack(goal_state), max_depth, backend,
+                        heuristic, cache)
+    if path is None:
+        return None
+    return [codec.unpack(state) for state in path]  # Ensure JSON-compatible
+
+
+def a_star(n, initial_state, goal_state, max_depth=None, backend=None, heuristic=DEFAULT_HEURISTIC, cache=None):
+    """
+    Solve the n x n sliding tile puzzle using A* algorithm with an early stopping condition.
+    If no solution is possible within the given max depth, it returns None.
+
+    Args:
+        n (int): Board size (n x n)
+        initial_state (list): List of starting tile positions (list of [x, y] pairs)
+        goal_state (list): List of goal tile positions (list of [x, y] pairs)
+        max_depth (int, optional): The maximum depth to search. If None, search is unlimited.
+        backend (str, optional): Search backend, one of SOLVER_BACKENDS.
+        heuristic (str, optional): Admissible heuristic, one of HEURISTICS.
+        cache (SolverCache, optional): Cache of the search results.
+
+    Returns:
+        list: List of states from initial to goal in JSON-compatible format, or None if no solution is found within the max depth
+    """
+    return solve(n, initial_state, goal_state, max_depth, backend, heuristic, cache)
+
+
+def calculate_shortest_path_length(board_size, initial_state, goal_state, max_depth=None, backend='auto', cache=None):
+    """
+    Calculate the number of moves on a shortest path between two board states.
+
+    Args:
+        board_size (int): Board size (n x n).
+        initial_state (list): List of starting geom positions (list of [x, y] pairs or an (n, 2) array).
+        goal_state (list): List of goal geom positions (list of [x, y] pairs or an (n, 2) array).
+        max_depth (int, optional): The maximum depth to search. If None, search is unlimited.
+        backend (str, optional): Search backend, one of SOLVER_BACKENDS.
+        cache (SolverCache, optional): Cache of the search results.
+
+    Returns:
+        int: The shortest path length, or None if no solution is found within the max depth.
+    """
+    path = solve(board_size, initial_state, goal_state, max_depth, backend, cache=cache)
+    return None if path is None else len(path) - 1
+
+
+if __name__ == "__main__":
+    board_size = 5
+    initial_state = np.array([
+        [1, 0],
+        [4, 1],
+        [3, 0],
+        [0, 3],
+        [1, 4],
+    ])
+    goal_state = np.array([
+        [0, 2],
+        [1, 1],
+        [4, 0],
+        [3, 3],
+        [1, 0],
+    ])
+
+    for backend in ['a_star', 'bounded_a_star', 'ida_star']:
+        for heuristic in ['manhattan', 'linear_conflict']:
+            path = solve(board_size, initial_state, goal_state, max_depth=30, backend=backend, heuristic=heuristic)
+            print(f"{backend} ({heuristic}): {None if path is None else len(path) - 1}")
+    path = solve(board_size, initial_state, goal_state, max_depth=30, backend='bidirectional')
+    print(f"bidirectional: {None if path is None else len(path) - 1}")
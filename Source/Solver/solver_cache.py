@@ -0,0 +1,214 @@
+"""
+- persistent cache of solver results, shared by the config generation and the episode evaluation across runs
+- results are stored in an SQLite database in Data/SolverCache, every entry is addressed by the MD5 hash of a
+  canonical encoding of the puzzle: board size, number of geoms and the packed initial and goal state of its
+  canonical representative under board symmetry and geom relabelling, see board_symmetry
+- paths are stored in the frame of the canonical representative and mapped back to the frame of every lookup
+- an entry holds the shortest path length, optionally the shortest path itself, and for puzzles that could not be
+  solved within a max depth the smallest path length that is still possible, so later searches with a smaller or
+  equal max depth are answered from the cache as well
+- an LRU dict in front of the database answers repeated lookups of one run without touching the disk
+- hit and miss counts are kept per cache, get_solver_cache().report() prints them at the end of a run
+"""
+
+# Import statements
+import os
+import sqlite3
+import hashlib
+from collections import OrderedDict
+
+from Source.Solver.board_symmetry import CanonicalPuzzle
+
+MEMORY_CACHE_SIZE = 100_000  # Entries kept in the in-memory LRU front
+COMMIT_INTERVAL = 1_000  # Stores between two commits to the database
+
+_solver_caches = {}  # Database file path -> SolverCache, shared by all callers of a process
+
+
+def get_cache_file_path():
+    """Return the path of the default solver cache database."""
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(base_dir, 'Data', 'SolverCache', 'solver_cache.sqlite')
+
+
+def get_cache_key(codec, puzzle):
+    """
+    Create the content address of a puzzle.
+
+    Args:
+        codec (PackedStateCodec): Codec matching the board size and number of geoms.
+        puzzle (CanonicalPuzzle): The canonicalized puzzle.
+
+    Returns:
+        str: MD5 hash of the canonical encoding of the puzzle.
+    """
+    encoding = f"{codec.board_size}:{codec.num_geoms}:{puzzle.initial_state}:{puzzle.goal_state}"
+    return hashlib.md5(encoding.encode()).hexdigest()
+
+
+class SolverCache:
+
+    def __init__(self, file_path=None, memory_size=MEMORY_CACHE_SIZE):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            file_path (str, optional): Path of the SQLite database, see get_cache_file_path if None.
+            memory_size (int, optional): Maximum number of entries in the in-memory LRU front.
+        """
+        self.file_path = file_path or get_cache_file_path()
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # Key -> (path length, path, min length)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.uncommitted = 0
+
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        self.connection = sqlite3.connect(self.file_path, timeout=60)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            "key TEXT PRIMARY KEY, path_length INTEGER, path TEXT, min_length INTEGER NOT NULL)"
+        )
+        self.connection.commit()
+
+    def _remember(self, key, entry):
+        """Put an entry into the LRU front and evict the least recently used one once it is full."""
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _lookup(self, key):
+        """Return the entry of a key from the LRU front or the database, None if it is not cached."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            return entry, 'memory_hits'
+
+        row = self.connection.execute(
+            "SELECT path_length, path, min_length FROM solutions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, 'misses'
+
+        path_length, path, min_length = row
+        entry = (path_length, None if path is None else [int(state) for state in path.split(',')], min_length)
+        self._remember(key, entry)
+        return entry, 'disk_hits'
+
+    def _store(self, key, entry):
+        """Write an entry to the LRU front and the database."""
+        self._remember(key, entry)
+        path_length, path, min_length = entry
+        self.connection.execute(
+            "INSERT OR REPLACE INTO solutions (key, path_length, path, min_length) VALUES (?, ?, ?, ?)",
+            (key, path_length, None if path is None else ','.join(map(str, path)), min_length)
+        )
+        self.stats['stores'] += 1
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_INTERVAL:
+            self.commit()
+
+    def get_path(self, codec, initial_state, goal_state, max_depth=None):
+        """
+        Look up the shortest path of a puzzle.
+
+        Args:
+            codec (PackedStateCodec): Codec matching the board size and number of geoms.
+            initial_state (int): Packed starting state.
+            goal_state (int): Packed goal state.
+            max_depth (int, optional): The maximum length of the path. If None, the length is unlimited.
+
+        Returns:
+            tuple: (hit, path), hit is False if the puzzle has to be solved, otherwise path is the list of packed
+            states from initial to goal, or None if no path within max_depth exists.
+        """
+        puzzle = CanonicalPuzzle(codec, initial_state, goal_state)
+        entry, outcome = self._lookup(get_cache_key(codec, puzzle))
+        if entry is not None:
+            path_length, path, min_length = entry
+            if path is not None:
+                self.stats[outcome] += 1
+                if max_depth is not None and path_length > max_depth:
+                    return True, None
+                return True, [puzzle.from_canonical(state) for state in path]
+            if max_depth is not None and max_depth < min_length:
+                self.stats[outcome] += 1
+                return True, None
+        self.stats['misses'] += 1
+        return False, None
+
+    def put_path(self, codec, initial_state, goal_state, path, max_depth=None):
+        """
+        Store the result of a search.
+
+        Args:
+            codec (PackedStateCodec): Codec matching the board size and number of geoms.
+            initial_state (int): Packed starting state.
+            goal_state (int): Packed goal state.
+            path (list): List of packed states from initial to goal, or None if no path within max_depth exists.
+            max_depth (int, optional): The max depth of the search.
+        """
+        puzzle = CanonicalPuzzle(codec, initial_state, goal_state)
+        key = get_cache_key(codec, puzzle)
+        if path is not None:
+            self._store(key, (len(path) - 1, [puzzle.to_canonical(state) for state in path], len(path) - 1))
+        elif max_depth is not None:
+            entry, _ = self._lookup(key)
+            if entry is None or (entry[0] is None and entry[2] <= max_depth):
+                self._store(key, (None, None, max_depth + 1))
+
+    def get_length(self, codec, initial_state, goal_state):
+        """
+        Look up the shortest path length of a puzzle.
+
+        Args:
+            codec (PackedStateCodec): Codec matching the board size and number of geoms.
+            initial_state (int): Packed starting state.
+            goal_state (int): Packed goal state.
+
+        Returns:
+            int: The shortest path length, or None if it is not cached.
+        """
+        entry, outcome = self._lookup(get_cache_key(codec, CanonicalPuzzle(codec, initial_state, goal_state)))
+        if entry is None or entry[0] is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats[outcome] += 1
+        return entry[0]
+
+    def put_length(self, codec, initial_state, goal_state, path_length):
+        """Store the shortest path length of a puzzle whose path is not known, e.g. from a backward search."""
+        key = get_cache_key(codec, CanonicalPuzzle(codec, initial_state, goal_state))
+        entry, _ = self._lookup(key)
+        if entry is None or entry[0] is None:
+            self._store(key, (path_length, None, path_length))
+
+    def commit(self):
+        """Write all pending stores to the database."""
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def report(self):
+        """Commit pending stores and print the hit and miss statistics."""
+        self.commit()
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        hit_rate = 0 if lookups == 0 else (self.stats['memory_hits'] + self.stats['disk_hits']) / lookups
+        print(f"Solver cache: {lookups:,} lookups, {self.stats['memory_hits']:,} memory hits, "
+              f"{self.stats['disk_hits']:,} disk hits, {self.stats['misses']:,} misses ({hit_rate:.1%} hit rate), "
+              f"{self.stats['stores']:,} stores")
+
+
+def get_solver_cache(file_path=None):
+    """
+    Return the solver cache of a database, opened once per process.
+
+    Args:
+        file_path (str, optional): Path of the SQLite database, see get_cache_file_path if None.
+
+    Returns:
+        SolverCache: The shared cache.
+    """
+    file_path = file_path or get_cache_file_path()
+    if file_path not in _solver_caches:
+        _solver_caches[file_path] = SolverCache(file_path)
+    return _solver_caches[file_path]
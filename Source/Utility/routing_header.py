@@ -0,0 +1,84 @@
+"""
+- parser of the routing header of the JSON messages forwarded by the WebSocket relays (Experiment/web_server.py and
+  Utility/web_server.py)
+- reads only the top-level ROUTING_FIELDS of a message and skips all other values, e.g. base64 screenshots, without
+  decoding them
+"""
+
+import json
+
+# Top-level fields the relay reads to route a message, all other values are skipped without decoding them
+ROUTING_FIELDS = ("command", "from", "to", "binary_payload")
+# Below this size (characters) json.loads in C is faster than scanning the header in Python
+HEADER_SCAN_MIN_SIZE = 4096
+_json_decoder = json.JSONDecoder()
+
+
+def _skip_whitespace(message, index):
+    return json.decoder.WHITESPACE.match(message, index).end()
+
+
+def _skip_json_string(message, index):
+    """Return the index after the JSON string starting at message[index], without decoding it."""
+    end = message.find('"', index + 1)
+    while end != -1:
+        # A quote preceded by an odd number of backslashes is escaped
+        backslashes = 0
+        while message[end - 1 - backslashes] == '\\':
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + 1
+        end = message.find('"', end + 1)
+    raise ValueError("Unterminated string")
+
+
+def parse_routing_header(message):
+    """
+    Read the routing fields of a JSON message, without parsing or copying the (multi-megabyte) payload.
+
+    Args:
+        message (str): A JSON object, e.g. {"command": ..., "from": ..., "to": ..., "messages": [...], "payload": ...}.
+
+    Returns:
+        dict: The ROUTING_FIELDS present in the message.
+
+    Raises:
+        json.JSONDecodeError: If the message is not a JSON object.
+    """
+    if len(message) < HEADER_SCAN_MIN_SIZE:
+        message_data = json.loads(message)
+        if not isinstance(message_data, dict):
+            raise json.JSONDecodeError("Expected a JSON object", message[:100], 0)
+        return {key: message_data[key] for key in ROUTING_FIELDS if key in message_data}
+
+    header = {}
+    index = 0
+    try:
+        index = _skip_whitespace(message, index)
+        if message[index] != '{':
+            raise ValueError("Expected a JSON object")
+        index = _skip_whitespace(message, index + 1)
+        while message[index] != '}':
+            if message[index] != '"':
+                raise ValueError("Expected a key")
+            key, index = json.decoder.scanstring(message, index + 1)
+            index = _skip_whitespace(message, index)
+            if message[index] != ':':
+                raise ValueError("Expected ':'")
+            index = _skip_whitespace(message, index + 1)
+
+            if key in ROUTING_FIELDS:
+                header[key], index = _json_decoder.raw_decode(message, index)
+            elif message[index] == '"':
+                index = _skip_json_string(message, index)
+            else:
+                _, index = _json_decoder.raw_decode(message, index)
+
+            index = _skip_whitespace(message, index)
+            if message[index] == ',':
+                index = _skip_whitespace(message, index + 1)
+            elif message[index] != '}':
+                raise ValueError("Expected ',' or '}'")
+    except (ValueError, IndexError) as e:
+        raise json.JSONDecodeError(f"Invalid routing header: {e}", message[:100], index)
+    return header